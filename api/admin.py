@@ -0,0 +1,238 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal, Optional
+from pydantic import BaseModel
+from api.auth import get_current_admin_user
+from config.logging_config import get_logger
+from config.database_operations import buscar_reservas, buscar_usuarios
+from config.database_async import run_db
+from config.exportacion import FORMATOS, abrir_exportacion
+from config.importacion import ImportacionError, importar
+from config.database_instrumentation import get_query_stats, query_stats
+from config.database_pool import PoolTimeoutError
+import anyio
+import base64
+import hashlib
+import io
+import json
+
+logger = get_logger(__name__)
+
+# Todas las rutas de administración requieren un usuario administrador activo
+router = APIRouter(dependencies=[Depends(get_current_admin_user)])
+
+PAGINA_DEFAULT = 50
+PAGINA_MAX = 200
+
+class ReservaAdminResponse(BaseModel):
+    id: int
+    usuario_id: int
+    contacto: str
+    fecha_check_in: date
+    fecha_check_out: date
+    cantidad_habitaciones: int
+    precio_total: Decimal
+    estado: str
+    fecha_creacion: datetime
+
+class UsuarioAdminResponse(BaseModel):
+    id: int
+    nombre: str
+    apellido: str
+    email: str
+    activo: bool
+    fecha_registro: Optional[datetime] = None
+
+class PaginaReservas(BaseModel):
+    items: list[ReservaAdminResponse]
+    siguiente: Optional[str] = None
+
+class PaginaUsuarios(BaseModel):
+    items: list[UsuarioAdminResponse]
+    siguiente: Optional[str] = None
+
+def _filtros_hash(filtros):
+    return hashlib.sha1(json.dumps(filtros, default=str, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+
+def encode_cursor(clave, filtros):
+    """
+    Token opaco con la clave de la última fila y una huella de los filtros
+    """
+    payload = json.dumps({'k': clave, 'f': _filtros_hash(filtros)}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token, filtros):
+    """
+    Retorna la clave guardada en el token. Un token ilegible o generado con
+    otros filtros responde 400
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        clave, huella = payload['k'], payload['f']
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    if huella != _filtros_hash(filtros):
+        raise HTTPException(status_code=400, detail="El cursor no corresponde a estos filtros")
+    return clave
+
+# GET /api/admin/reservas - Búsqueda paginada de reservas
+@router.get("/admin/reservas", response_model=PaginaReservas)
+async def admin_buscar_reservas(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    estado: Optional[Literal['pendiente', 'confirmada', 'cancelada', 'finalizada']] = None,
+    usuario_id: Optional[int] = None,
+    limite: int = Query(PAGINA_DEFAULT, ge=1, le=PAGINA_MAX),
+    cursor: Optional[str] = None
+):
+    """
+    Reservas con check-in entre desde y hasta, ordenadas por check-in e id.
+    Para la página siguiente, enviar el valor de 'siguiente' como cursor
+    """
+    if desde and hasta and hasta < desde:
+        raise HTTPException(status_code=400, detail="La fecha final debe ser posterior a la inicial")
+
+    filtros = {'desde': desde, 'hasta': hasta, 'estado': estado, 'usuario_id': usuario_id}
+    despues = None
+    if cursor:
+        try:
+            fecha, reserva_id = decode_cursor(cursor, filtros)
+            despues = (date.fromisoformat(fecha), int(reserva_id))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+    try:
+        filas = await run_db(buscar_reservas, desde, hasta, estado, usuario_id, despues, limite + 1)
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Error en GET /api/admin/reservas: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al buscar reservas")
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = encode_cursor([ultima['fecha_check_in'].isoformat(), ultima['id']], filtros)
+    return {"items": filas, "siguiente": siguiente}
+
+# GET /api/admin/usuarios - Búsqueda paginada de usuarios
+@router.get("/admin/usuarios", response_model=PaginaUsuarios)
+async def admin_buscar_usuarios(
+    activo: Optional[bool] = None,
+    limite: int = Query(PAGINA_DEFAULT, ge=1, le=PAGINA_MAX),
+    cursor: Optional[str] = None
+):
+    """
+    Usuarios ordenados por id, opcionalmente filtrados por activo
+    """
+    filtros = {'activo': activo}
+    despues = None
+    if cursor:
+        try:
+            despues = int(decode_cursor(cursor, filtros))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+    try:
+        filas = await run_db(buscar_usuarios, activo, despues, limite + 1)
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Error en GET /api/admin/usuarios: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al buscar usuarios")
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = encode_cursor(filas[-1]['id'], filtros)
+    return {"items": filas, "siguiente": siguiente}
+
+# GET /api/admin/exportar/{recurso} - Descarga completa en CSV o NDJSON
+@router.get("/admin/exportar/{recurso}")
+async def admin_exportar(
+    recurso: Literal['reservas', 'pagos', 'usuarios'],
+    formato: Literal['csv', 'ndjson'] = 'csv',
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None
+):
+    """
+    Exporta el recurso completo, o filtrado por fecha (check-in, pago o
+    registro). Las filas se envían a medida que se leen de la base
+    """
+    if desde and hasta and hasta < desde:
+        raise HTTPException(status_code=400, detail="La fecha final debe ser posterior a la inicial")
+
+    try:
+        exportacion = await run_db(abrir_exportacion, recurso, formato, desde, hasta)
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Error en GET /api/admin/exportar/{recurso}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al exportar datos")
+
+    async def contenido():
+        try:
+            while (chunk := await run_db(exportacion.siguiente_lote)) is not None:
+                yield chunk
+        finally:
+            # Cerrar el cursor con nombre habla con PostgreSQL: en un hilo, como
+            # los lotes, y protegido de la cancelación si el cliente se desconectó
+            with anyio.CancelScope(shield=True):
+                await run_db(exportacion.cerrar)
+
+    filename = f"{recurso}_{date.today():%Y%m%d}.{formato}"
+    return StreamingResponse(
+        contenido(),
+        media_type=FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+# POST /api/admin/importar/{recurso} - Carga masiva desde CSV
+@router.post("/admin/importar/{recurso}")
+async def admin_importar(
+    recurso: Literal['usuarios', 'reservas'],
+    request: Request,
+    simular: bool = False
+):
+    """
+    Importa el CSV enviado como cuerpo de la petición (text/csv, UTF-8).
+    Retorna importadas y rechazadas con su motivo; con simular=true no se
+    guarda nada
+    """
+    try:
+        archivo = io.StringIO((await request.body()).decode('utf-8-sig'))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8")
+
+    try:
+        return await run_db(importar, simular=simular, **{recurso: archivo})
+    except ImportacionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Error en POST /api/admin/importar/{recurso}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al importar datos")
+
+# GET /api/admin/consultas - Estadísticas por huella de consulta
+@router.get("/admin/consultas")
+async def admin_consultas(
+    orden: Literal['total_ms', 'p95_ms', 'max_ms', 'cantidad', 'lentas'] = 'total_ms',
+    limite: int = Query(PAGINA_DEFAULT, ge=1, le=PAGINA_MAX)
+):
+    """
+    Consultas agrupadas por huella (SQL normalizado) con cantidad, tiempos
+    total, p50, p95 y máximo, filas y el último plan de las lentas
+    """
+    stats = get_query_stats()
+    stats['consultas'] = sorted(stats['consultas'], key=lambda consulta: consulta[orden], reverse=True)[:limite]
+    return stats
+
+# DELETE /api/admin/consultas - Reinicia las estadísticas de consultas
+@router.delete("/admin/consultas")
+async def admin_reiniciar_consultas():
+    query_stats.reset()
+    return {"message": "Estadísticas de consultas reiniciadas"}
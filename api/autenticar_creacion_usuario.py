@@ -2,15 +2,19 @@ from fastapi import APIRouter, Request, HTTPException, status, Form
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import EmailStr
-import jwt
-from datetime import datetime, timedelta, timezone
-from config.database_operations import authenticate_user
-from config.logging_config import logger
+from api.auth import login_user
+from api.static_files import cached_page_response, pages_directory
+from config.database_pool import PoolTimeoutError
+from config.page_cache import get_page_cache
+from config.logging_config import get_logger
 import os
 
+logger = get_logger(__name__)
+
 router = APIRouter()
-templates = Jinja2Templates(directory="public/pages/crear_usuario")
-login_templates = Jinja2Templates(directory="public/pages/login")
+templates = Jinja2Templates(directory=pages_directory("crear_usuario"))
+login_templates = Jinja2Templates(directory=pages_directory("login"))
+login_template_path = os.path.join(pages_directory("login"), "login.html")
 
 @router.get("/registrar")
 async def redirect_to_login():
@@ -23,66 +27,52 @@ async def redirect_to_login():
 @router.get("/login", response_class=HTMLResponse)
 async def show_login_form(request: Request):
     """
-    Mostrar el formulario de login
+    Mostrar el formulario de login. La plantilla no usa datos de la
+    petición: se renderiza una vez y se sirve desde memoria
     """
-    return login_templates.TemplateResponse("login.html", {"request": request})
+    page = get_page_cache().memoize(
+        'login/login.html', login_template_path,
+        lambda: login_templates.get_template("login.html").render()
+    )
+    return cached_page_response(request, page)
 
 @router.post("/login")
 async def login(request: Request):
     """
-    Autenticar usuario y retornar JWT token
+    Autenticar usuario y retornar JWT token (formulario OAuth2: username y
+    password). Equivale a /api/auth/login
     """
-    logger.info(f"🔍 DIAGNOSTIC - RAW REQUEST RECEIVED")
-    logger.info(f"🔍 DIAGNOSTIC - Method: {request.method}")
-    logger.info(f"🔍 DIAGNOSTIC - URL: {request.url}")
-    logger.info(f"🔍 DIAGNOSTIC - Content-Type: {request.headers.get('content-type', 'NOT SET')}")
-    
     try:
         body = await request.body()
-        logger.info(f"🔍 DIAGNOSTIC - Raw body length: {len(body)} bytes")
-        logger.info(f"🔍 DIAGNOSTIC - Raw body content: {body.decode('utf-8', errors='replace')}")
     except Exception as e:
-        logger.error(f"🔍 DIAGNOSTIC - Could not read raw body: {e}")
+        logger.error(f"No se pudo leer el cuerpo del login: {e}")
         raise HTTPException(status_code=400, detail="Could not read request body")
     
     try:
         from urllib.parse import parse_qs 
         body_str = body.decode('utf-8')
         form_data = parse_qs(body_str)
-        logger.info(f"🔍 DIAGNOSTIC - Parsed form data: {form_data}")
-        
+
         username = form_data.get('username', [None])[0]
         password = form_data.get('password', [None])[0]
         
         if not username or not password:
-            logger.error(f"🔍 DIAGNOSTIC - Missing credentials: username={username}, password={'SET' if password else 'NOT SET'}")
+            logger.warning("Login sin usuario o contraseña")
             raise HTTPException(status_code=422, detail="Missing username or password")
-        
-        logger.info(f"🔍 DIAGNOSTIC - Form parsed successfully: username='{username}', password_length={len(password)}")
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"🔍 DIAGNOSTIC - Error parsing form data: {e}")
+        logger.warning(f"Formulario de login inválido: {e}")
         raise HTTPException(status_code=422, detail=f"Invalid form data: {str(e)}")
     try:
-        user = authenticate_user(username, password)
-        if not user:
+        sesion = await login_user(username, password)
+        if not sesion:
             logger.error(f"Intento de login fallido: usuario {username} no encontrado o credenciales inválidas")
             raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
-        secret_key = os.getenv('JWT_SECRET', 'xPS9pT9NLXy42Q_DSHL-oYuA8WmEZoW13Kf6GvvMUW0')
-        logger.debug(f"JWT_SECRET used for encoding: '{secret_key}' (length: {len(secret_key)})")
-        payload = {
-            "sub": str(user["id"]),
-            "email": user["email"],
-            "exp": datetime.now(timezone.utc) + timedelta(hours=24)
-        }
-        token = jwt.encode(payload, secret_key, algorithm="HS256")
-        logger.debug(f"Generated token (first 50 chars): {token[:50]}...")
-
         logger.info(f"Usuario {username} autenticado exitosamente")
-        return {"access_token": token, "token_type": "bearer", "user": user}
-    except HTTPException:
+        return sesion
+    except (HTTPException, PoolTimeoutError):
         raise
     except Exception as e:
         logger.error(f"Error en login: {str(e)}")
@@ -6,11 +6,17 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import BaseModel
-import bcrypt
 import os
 from dotenv import load_dotenv
-from config.database_operations import get_user_by_id
-from config.logging_config import logger
+from config.database_operations import get_user_by_id, get_user_credentials
+from config.password_hashing import get_password_hasher, HasherSaturatedError
+from config.database_pool import PoolTimeoutError
+from config.database_async import run_db
+from config.cache import TTLCache
+from config.logging_config import get_logger
+from config.timing import span
+
+logger = get_logger(__name__)
 
 # Cargar variables de entorno desde .env
 load_dotenv()
@@ -22,6 +28,8 @@ if not SECRET_KEY:
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Vigencia del token que se emite al iniciar sesión
+LOGIN_TOKEN_EXPIRE = timedelta(hours=24)
 
 class Token(BaseModel):
     access_token: str
@@ -36,18 +44,64 @@ class User(BaseModel):
     apellido: str
     email: str
     activo: bool
+    es_admin: bool = False
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def verify_password(plain_password: str, hashed_password: str | bytes) -> bool:
-    """Verifica que la contraseña coincida con el hash"""
-    if isinstance(hashed_password, str):
-        hashed_password = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
+# Usuarios autenticados recientes, para no consultar la BD en cada petición.
+# La invalidación es local al proceso: con varios workers, USER_CACHE_TTL acota
+# cuánto puede tardar otro worker en ver un cambio
+user_cache = TTLCache(
+    maxsize=int(os.getenv('USER_CACHE_MAX', '1024')),
+    ttl=float(os.getenv('USER_CACHE_TTL', '60')),
+    name='usuarios_autenticados'
+)
+
+async def verify_password(plain_password: str, hashed_password: str | bytes) -> bool:
+    """Verifica que la contraseña coincida con el hash (en el pool de hashing)"""
+    try:
+        return await get_password_hasher().verify(plain_password, hashed_password)
+    except HasherSaturatedError:
+        logger.warning("Pool de hashing saturado verificando contraseña")
+        raise hasher_saturated_exception()
+
+async def get_password_hash(password: str) -> str:
+    """Genera un hash bcrypt de la contraseña (en el pool de hashing)"""
+    try:
+        return await get_password_hasher().hash(password)
+    except HasherSaturatedError:
+        logger.warning("Pool de hashing saturado generando hash")
+        raise hasher_saturated_exception()
+
+def hasher_saturated_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servicio temporalmente saturado. Intente nuevamente",
+        headers={"Retry-After": "1"},
+    )
+
+async def authenticate_user(identifier: str, password: str) -> dict | None:
+    """Autentica un usuario por email o DNI y contraseña"""
+    user = await run_db(get_user_credentials, identifier)
+    if not user:
+        logger.warning(f"Intento de login fallido: Usuario {identifier} no encontrado")
+        return None
 
-def get_password_hash(password: str) -> str:
-    """Genera un hash bcrypt de la contraseña"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    hashed_password = user.pop('password')
+    try:
+        password_match = await verify_password(password, hashed_password)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error verificando contraseña: {e}")
+        return None
+
+    if not password_match:
+        logger.warning(f"Intento de login fallido: contraseña incorrecta para {identifier}")
+        return None
+
+    logger.info(f"Usuario autenticado exitosamente: {identifier}")
+    return user
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Crea un token JWT con tiempo de expiración"""
@@ -57,9 +111,22 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with span('jwt'):
+        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+async def login_user(identifier: str, password: str) -> dict | None:
+    """
+    Autentica por email o DNI (una sola verificación bcrypt) y emite el token
+    de acceso. Retorna {"access_token", "token_type", "user"}, o None si las
+    credenciales no son válidas
+    """
+    user = await authenticate_user(identifier, password)
+    if not user:
+        return None
+    token = create_access_token({"sub": str(user["id"]), "email": user["email"]}, LOGIN_TOKEN_EXPIRE)
+    return {"access_token": token, "token_type": "bearer", "user": user}
+
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
     """Obtiene el usuario actual desde el token JWT"""
     credentials_exception = HTTPException(
@@ -69,7 +136,8 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Use
     )
     try:
         # Decodificar el token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with span('jwt'):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
         
         if user_id is None:
@@ -89,9 +157,19 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Use
         logger.warning(f"Token inválido: {str(e)}")
         raise credentials_exception
     
+    cached_user = user_cache.get(token_data.user_id)
+    if cached_user is not None:
+        return cached_user
+
+    # Si el usuario se modifica o desactiva mientras se lee, set() descarta
+    # lo leído en lugar de volver a cachear la versión anterior
+    generation = user_cache.generation()
+
     # Obtener usuario de la base de datos
     try:
-        user = get_user_by_id(user_id=token_data.user_id)
+        user = await run_db(get_user_by_id, user_id=token_data.user_id)
+    except PoolTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error al obtener usuario {token_data.user_id}: {str(e)}")
         raise HTTPException(
@@ -106,19 +184,27 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Use
     # Convertir a modelo User
     try:
         if isinstance(user, dict):
-            return User(**user)
+            current_user = User(**user)
         else:
-            return User(
+            current_user = User(
                 id=user.id,
                 nombre=user.nombre,
                 apellido=user.apellido,
                 email=user.email,
-                activo=user.activo
+                activo=user.activo,
+                es_admin=getattr(user, 'es_admin', False)
             )
     except Exception as e:
         logger.error(f"Error al crear objeto User: {str(e)}")
         raise credentials_exception
 
+    user_cache.set(current_user.id, current_user, generation=generation)
+    return current_user
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Descarta el usuario del cache tras modificarlo o desactivarlo"""
+    user_cache.invalidate(user_id)
+
 async def get_current_active_user(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> User:
@@ -126,4 +212,13 @@ async def get_current_active_user(
     if not current_user.activo:
         logger.warning(f"Intento de acceso con usuario inactivo: {current_user.id}")
         raise HTTPException(status_code=400, detail="Usuario inactivo")
+    return current_user
+
+async def get_current_admin_user(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+) -> User:
+    """Verifica que el usuario sea administrador"""
+    if not current_user.es_admin:
+        logger.warning(f"Intento de acceso a administración sin permiso: usuario {current_user.id}")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Se requieren permisos de administrador")
     return current_user
\ No newline at end of file
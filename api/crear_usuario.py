@@ -1,12 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from models.user import UserCreate, UserResponse
 from config.database_operations import insert_usuario
+from config.database_async import run_db
 from pydantic import BaseModel, EmailStr, ValidationError
 from datetime import datetime, timedelta, timezone
-from config.logging_config import logger
-import bcrypt
-from api.auth import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
-import os
+from config.logging_config import get_logger
+from api.auth import create_access_token, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+
+logger = get_logger(__name__)
 
 class UserCreateRequest(BaseModel):
     nombre: str
@@ -24,8 +25,6 @@ async def crear_usuario(request: UserCreateRequest):
     try:
         password = request.password
 
-        logger.info(f'Password received: {repr(password)}, len chars: {len(password)}, len bytes: {len(password.encode("utf-8"))}')
-
         try:
             user_data = UserCreate(
                 nombre=request.nombre,
@@ -36,9 +35,8 @@ async def crear_usuario(request: UserCreateRequest):
                 telefono=request.telefono,
                 password=password
             )
-            logger.info("DEBUG: UserCreate validation passed with plain password")
         except ValidationError as e:
-            logger.error(f"DEBUG: UserCreate validation failed: {type(e).__name__}: {str(e)}")
+            logger.warning(f"Datos de registro inválidos: {e.error_count()} errores")
             errors = e.errors()
             for error in errors:
                 if 'email' in error.get('loc', []):
@@ -54,19 +52,17 @@ async def crear_usuario(request: UserCreateRequest):
                 detail=error_msg
             )
         except Exception as e:
-            logger.error(f"DEBUG: UserCreate validation failed: {type(e).__name__}: {str(e)}")
+            logger.warning(f"Datos de registro inválidos: {type(e).__name__}: {str(e)}")
             raise HTTPException(
                 status_code=400,
                 detail=str(e)
             )
 
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = await get_password_hash(password)
 
         user_data.password = hashed_password
         
-        logger.info(f"🔍 DIAGNOSTIC - About to call insert_usuario with data: {user_data.model_dump(exclude={'password'})}")
-        user_id = insert_usuario(user_data)
-        logger.info(f"🔍 DIAGNOSTIC - insert_usuario returned: type={type(user_id)}, value={user_id if not isinstance(user_id, dict) else user_id}")
+        user_id = await run_db(insert_usuario, user_data)
 
         if isinstance(user_id, dict):
             error_type = user_id.get("type")
@@ -75,27 +71,19 @@ async def crear_usuario(request: UserCreateRequest):
             else:
                 raise HTTPException(status_code=500, detail=user_id["error"])
 
-        logger.info(f"🔍 DEBUG - User created with ID {user_id}, DB_HOST={os.getenv('DB_HOST', 'localhost')}, DB_NAME={os.getenv('DB_NAME', 'posada_db')}")
-
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         token = create_access_token(data={"sub": str(user_id)}, expires_delta=access_token_expires)
-        logger.debug(f"Generated token in crear_usuario (first 50 chars): {token[:50]}...")
 
         logger.info(f'Usuario creado exitosamente con ID {user_id}')
         
         user_response = None
         try:
-            logger.info(f'Construyendo UserResponse con id={user_id}')
-            logger.info(f'user_data.model_dump(exclude={{password}}): {user_data.model_dump(exclude={"password"})}')
-
             user_response = UserResponse(
                 id=user_id,
                 **user_data.model_dump(exclude={'password'}),
                 activo=True,
                 fecha_registro=datetime.now(timezone.utc)
             )
-            logger.info(f'UserResponse creado exitosamente: {user_response}')
-
         except Exception as e:
             logger.error(f'Error construyendo UserResponse: {type(e).__name__}: {str(e)}')
             logger.error(f'Traceback completo:', exc_info=True)
@@ -115,13 +103,10 @@ async def crear_usuario(request: UserCreateRequest):
             "user": user_response,
             "token": token
         }
-        logger.info(f'Response dict creado: {type(response_dict)}')
-
         return response_dict
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f'🔍 DIAGNOSTIC - Unhandled exception in crear_usuario: type={type(e).__name__}, message={str(e)}')
         logger.error(f'Error en registro: {e}', exc_info=True)
         raise HTTPException(
             status_code=500,
@@ -0,0 +1,48 @@
+"""
+Serialización JSON con orjson
+
+dumps() produce el mismo JSON que la respuesta de FastAPI con Pydantic en
+modo JSON (fechas ISO con Z para UTC, Decimal como texto), sin espacios y en UTF-8.
+
+RowsResponse serializa listados que vienen directo de la base de datos sin
+validarlos de nuevo contra el modelo de respuesta: cada fila (tupla) se
+proyecta a los campos del modelo, en su orden, y se codifica con orjson. El
+modelo se sigue declarando como response_model para la documentación.
+"""
+from decimal import Decimal
+from operator import itemgetter
+
+import orjson
+from fastapi.responses import JSONResponse
+from config.timing import span
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        # Como Pydantic en modo JSON: el valor exacto como texto
+        return str(obj)
+    raise TypeError(f"Tipo no serializable a JSON: {type(obj).__name__}")
+
+def dumps(content):
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+class RowsResponse(JSONResponse):
+    """
+    Listado de filas de la BD serializado sin pasar por el modelo.
+
+    `rows` es (columnas, filas) tal como lo retorna fetch_rows; la consulta
+    debe traer al menos los campos de `model`, con valores de los tipos que
+    el modelo declara. Las columnas que el modelo no tiene se descartan
+    """
+
+    def __init__(self, rows, model, status_code=200, headers=None):
+        columnas, filas = rows
+        self.campos = tuple(model.model_fields)
+        indices = [columnas.index(campo) for campo in self.campos]
+        self.valores = itemgetter(*indices) if len(indices) > 1 else (lambda fila: (fila[indices[0]],))
+        super().__init__(filas, status_code=status_code, headers=headers)
+
+    def render(self, filas):
+        with span('serialize'):
+            campos = self.campos
+            valores = self.valores
+            return dumps([dict(zip(campos, valores(fila))) for fila in filas])
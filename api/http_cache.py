@@ -0,0 +1,84 @@
+import hashlib
+import threading
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from config.database_async import run_db
+from config.versiones import get_cached_versions, read_versions
+
+def make_etag(*parts):
+    """
+    ETag débil derivado de las partes que determinan la respuesta
+    (versión del recurso, parámetros, formato...)
+    """
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+async def resource_versions(*recursos):
+    """
+    (versiones, fecha del cambio más reciente) de los recursos: de la copia
+    en memoria, sin usar el pool, o de la tabla si la copia no está al día
+    """
+    return get_cached_versions(*recursos) or await run_db(read_versions, *recursos)
+
+def cache_headers(etag, last_modified, cache_control):
+    return {
+        'ETag': etag,
+        'Last-Modified': format_datetime(last_modified, usegmt=True),
+        'Cache-Control': cache_control
+    }
+
+def is_not_modified(request: Request, etag, last_modified):
+    """
+    Evalúa If-None-Match (con comparación débil) o, si no viene,
+    If-Modified-Since
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        opaque = etag.removeprefix('W/')
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or opaque in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+def not_modified(headers):
+    return Response(status_code=304, headers=headers)
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+def check_not_modified(request: Request, endpoint, etag, last_modified):
+    """
+    Igual que is_not_modified, registrando peticiones, peticiones
+    condicionales y respuestas 304 por endpoint
+    """
+    conditional = 'if-none-match' in request.headers or 'if-modified-since' in request.headers
+    hit = conditional and is_not_modified(request, etag, last_modified)
+
+    with _stats_lock:
+        stats = _stats.setdefault(endpoint, {'peticiones': 0, 'condicionales': 0, 'not_modified': 0})
+        stats['peticiones'] += 1
+        stats['condicionales'] += conditional
+        stats['not_modified'] += hit
+    return hit
+
+def get_conditional_stats():
+    """
+    Peticiones, condicionales y 304 por endpoint, con la tasa de aciertos
+    sobre las peticiones condicionales
+    """
+    with _stats_lock:
+        return [
+            {
+                'endpoint': endpoint,
+                **stats,
+                'hit_ratio': round(stats['not_modified'] / stats['condicionales'], 4) if stats['condicionales'] else 0.0
+            }
+            for endpoint, stats in _stats.items()
+        ]
@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from config.database_operations import authenticate_user
-from config.logging_config import logger
+from api.auth import login_user
+from config.database_pool import PoolTimeoutError
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
@@ -9,33 +12,68 @@ class LoginRequest(BaseModel):
     dni: str
     password: str
 
+class AuthLoginRequest(BaseModel):
+    usuario: str  # DNI o email
+    password: str
+
+@router.post("/auth/login")
+async def auth_login(request: AuthLoginRequest):
+    """
+    Inicio de sesión en un solo paso: verifica la contraseña una vez y
+    retorna el usuario junto con el token de acceso
+    """
+    try:
+        sesion = await login_user(request.usuario, request.password)
+        if not sesion:
+            logger.warning(f"Intento de login fallido para {request.usuario}")
+            raise HTTPException(
+                status_code=401,
+                detail="Usuario o contraseña incorrectos"
+            )
+
+        user = sesion["user"]
+        logger.info(f"Login exitoso para usuario: {user['nombre']} {user['apellido']} (DNI: {user['dni']})")
+        return {"message": "Login exitoso", **sesion}
+
+    except (HTTPException, PoolTimeoutError):
+        raise
+    except Exception as e:
+        logger.error(f"Error en login: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno del servidor"
+        )
+
 @router.post("/login")
 async def login(request: LoginRequest):
     """
-    Endpoint para autenticación de usuarios mediante DNI y contraseña
+    Endpoint para autenticación de usuarios mediante DNI y contraseña.
+    Compatible con los clientes anteriores a /api/auth/login; la respuesta
+    ya incluye el token de acceso
     """
     try:
-        user = authenticate_user(request.dni, request.password)
-        
-        if not user:
+        sesion = await login_user(request.dni, request.password)
+
+        if not sesion:
             logger.warning(f"Intento de login fallido para DNI {request.dni}")
             raise HTTPException(
                 status_code=401,
                 detail="DNI o contraseña incorrectos"
             )
-        
+
+        user = sesion["user"]
         logger.info(f"Login exitoso para usuario: {user['nombre']} {user['apellido']} (DNI: {user['dni']})")
-        
+
         return {
             "message": "Login exitoso",
-            "user": user
+            **sesion
         }
-        
-    except HTTPException:
+
+    except (HTTPException, PoolTimeoutError):
         raise
     except Exception as e:
         logger.error(f"Error en login: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail="Error interno del servidor"
-        )
\ No newline at end of file
+        )
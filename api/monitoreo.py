@@ -0,0 +1,159 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from config.database_pool import get_pool_stats
+from config.database_operations import get_reserva_stats
+from config.metrics import REGISTRY, CONTENT_TYPE, family, render_metrics
+from config.database_instrumentation import query_stats
+from config.password_hashing import get_hasher_stats
+from api.auth import user_cache
+from api.reservas import calendario_cache
+from api.http_cache import get_conditional_stats
+from config.logging_config import get_logging_stats
+from config.page_cache import get_page_cache_stats
+from config.versiones import get_version_listener_stats
+
+router = APIRouter()
+metrics_router = APIRouter()
+
+# GET /api/monitoreo/pool - Estadísticas del pool de conexiones
+@router.get("/monitoreo/pool")
+async def pool_stats():
+    """
+    Conexiones en uso, ociosas y tiempos de espera del pool
+    """
+    stats = get_pool_stats()
+    if stats is None:
+        return {"inicializado": False}
+    return {"inicializado": True, **stats}
+
+# GET /api/monitoreo/hashing - Estadísticas del pool de hashing de contraseñas
+@router.get("/monitoreo/hashing")
+async def hasher_stats():
+    """
+    Utilización, cola y rechazos del pool de bcrypt
+    """
+    stats = get_hasher_stats()
+    if stats is None:
+        return {"inicializado": False}
+    return {"inicializado": True, **stats}
+
+# GET /api/monitoreo/cache - Estadísticas de los caches en memoria
+@router.get("/monitoreo/cache")
+async def cache_stats():
+    """
+    Aciertos, fallos y desalojos de cada cache, respuestas 304 por endpoint
+    el cache de páginas HTML y la copia en memoria de las versiones
+    """
+    return {
+        "caches": [user_cache.stats(), calendario_cache.stats()],
+        "http_condicional": get_conditional_stats(),
+        "paginas": get_page_cache_stats(),
+        "versiones": get_version_listener_stats()
+    }
+
+# GET /api/monitoreo/logging - Estado de la cola de logging
+@router.get("/monitoreo/logging")
+async def logging_stats():
+    """
+    Registros en cola, descartados por cola llena y omitidos por repetición
+    """
+    stats = get_logging_stats()
+    if stats is None:
+        return {"inicializado": False}
+    return {"inicializado": True, **stats}
+
+# Collectors de /metrics: convierten las estadísticas en memoria al momento de leerlas
+
+@REGISTRY.register_collector
+def pool_metrics():
+    stats = get_pool_stats()
+    if stats is None:
+        return []
+    return [
+        family('posada_db_pool_connections', 'gauge', 'Conexiones del pool por estado',
+               [({'state': 'in_use'}, stats['in_use']), ({'state': 'idle'}, stats['idle'])]),
+        family('posada_db_pool_max_connections', 'gauge', 'Máximo de conexiones del pool', [({}, stats['max'])]),
+        family('posada_db_pool_waiting', 'gauge', 'Peticiones esperando una conexión', [({}, stats['waiting'])]),
+        family('posada_db_pool_acquired_total', 'counter', 'Conexiones entregadas', [({}, stats['acquired_total'])]),
+        family('posada_db_pool_timeouts_total', 'counter', 'Esperas de conexión agotadas', [({}, stats['timeouts_total'])]),
+        family('posada_db_pool_recycled_total', 'counter', 'Conexiones recicladas', [({}, stats['recycled_total'])]),
+        family('posada_db_pool_wait_seconds_total', 'counter', 'Tiempo total esperando conexiones',
+               [({}, stats['wait_seconds_total'])])
+    ]
+
+@REGISTRY.register_collector
+def query_metrics():
+    totals = query_stats.totals()
+    return [
+        family('posada_db_queries_total', 'counter', 'Consultas ejecutadas', [({}, totals['cantidad'])]),
+        family('posada_db_query_errors_total', 'counter', 'Consultas con error', [({}, totals['errores'])]),
+        family('posada_db_slow_queries_total', 'counter', 'Consultas sobre el umbral SLOW_QUERY_MS', [({}, totals['lentas'])]),
+        family('posada_db_query_seconds_total', 'counter', 'Tiempo total en consultas', [({}, totals['total_s'])])
+    ]
+
+@REGISTRY.register_collector
+def hashing_metrics():
+    stats = get_hasher_stats()
+    if stats is None:
+        return []
+    return [
+        family('posada_bcrypt_workers', 'gauge', 'Hilos de bcrypt', [({}, stats['workers'])]),
+        family('posada_bcrypt_active', 'gauge', 'Operaciones de bcrypt en curso', [({}, stats['active'])]),
+        family('posada_bcrypt_queued', 'gauge', 'Operaciones de bcrypt en cola', [({}, stats['queued'])]),
+        family('posada_bcrypt_completed_total', 'counter', 'Operaciones de bcrypt completadas', [({}, stats['completed_total'])]),
+        family('posada_bcrypt_rejected_total', 'counter', 'Operaciones rechazadas por cola llena', [({}, stats['rejected_total'])])
+    ]
+
+@REGISTRY.register_collector
+def cache_metrics():
+    caches = [user_cache.stats(), calendario_cache.stats()]
+    families = [
+        family(f'posada_cache_{campo}_total', 'counter', descripcion,
+               [({'cache': stats['name']}, stats[campo]) for stats in caches])
+        for campo, descripcion in (
+            ('hits', 'Aciertos del cache'),
+            ('misses', 'Fallos del cache'),
+            ('evictions', 'Entradas desalojadas por tamaño'),
+            ('expirations', 'Entradas vencidas'),
+            ('invalidations', 'Entradas invalidadas'),
+            ('stale_sets', 'Valores descartados por una invalidación durante su lectura')
+        )
+    ]
+    families.append(family('posada_cache_size', 'gauge', 'Entradas en el cache',
+                           [({'cache': stats['name']}, stats['size']) for stats in caches]))
+    families.append(family('posada_cache_hit_ratio', 'gauge', 'Aciertos sobre consultas al cache',
+                           [({'cache': stats['name']}, stats['hit_ratio']) for stats in caches]))
+
+    condicionales = get_conditional_stats()
+    families.append(family('posada_http_conditional_requests_total', 'counter', 'Peticiones con If-None-Match o If-Modified-Since',
+                           [({'endpoint': stats['endpoint']}, stats['condicionales']) for stats in condicionales]))
+    families.append(family('posada_http_not_modified_total', 'counter', 'Respuestas 304',
+                           [({'endpoint': stats['endpoint']}, stats['not_modified']) for stats in condicionales]))
+    return families
+
+@REGISTRY.register_collector
+def reserva_metrics():
+    return [
+        family('posada_reservas_eventos_total', 'counter',
+               'Reservas creadas, rechazadas por capacidad, conflictos de concurrencia y reintentos',
+               [({'evento': evento}, total) for evento, total in get_reserva_stats().items()])
+    ]
+
+@REGISTRY.register_collector
+def logging_metrics():
+    stats = get_logging_stats()
+    if stats is None:
+        return []
+    return [
+        family('posada_log_queue_size', 'gauge', 'Registros de log en cola', [({}, stats['en_cola'])]),
+        family('posada_log_dropped_total', 'counter', 'Registros descartados por cola llena', [({}, stats['descartados'])]),
+        family('posada_log_suppressed_total', 'counter', 'Registros omitidos por repetición', [({}, stats['suprimidos'])])
+    ]
+
+# GET /metrics - Métricas en formato de texto de Prometheus
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas del proceso para Prometheus. No consulta la base de datos
+    """
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
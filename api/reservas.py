@@ -1,32 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
 from datetime import datetime, timedelta, date
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from config.logging_config import logger
+from typing import Literal
+import base64
+from config.logging_config import get_logger
 from models.booking import BookingCreate, BookingResponse
-from config.database_operations import execute_query, insert_reserva, delete_reserva
-from config.database_config import get_database_config, validate_database_config
+from config.database_operations import (
+    get_reservas_by_usuario, get_reservas_pendientes as fetch_reservas_pendientes,
+    get_disponibilidad_por_noche, get_habitaciones_libres,
+    create_reserva as insert_reserva_usuario, delete_reserva_usuario
+)
+from config.database_async import run_db
+from config.database_pool import PoolTimeoutError
+from config.cache import TTLCache
+from config.ocupacion import MAX_HABITACIONES
 from api.auth import get_current_active_user
+from api.http_cache import make_etag, cache_headers, check_not_modified, not_modified, resource_versions
+from api.fast_json import RowsResponse
 from dotenv import load_dotenv
 import os
+
+logger = get_logger(__name__)
 # from twilio.rest import Client  # Descomentar si usas Twilio
 
 load_dotenv()
 
 router = APIRouter()
 
-DB_CONFIG = get_database_config()
-
-logger.debug(f"DB_CONFIG loaded: host={DB_CONFIG['host']}, database={DB_CONFIG['database']}, user={DB_CONFIG['user']}, port={DB_CONFIG['port']}")
-logger.debug(f"DB_PASSWORD from env: {'SET' if DB_CONFIG['password'] else 'NOT SET'}")
-if not DB_CONFIG['password']:
-    logger.warning("DB_PASSWORD no seteada")
+CALENDARIO_MAX_NOCHES = 366
 
-is_valid, validation_msg = validate_database_config(DB_CONFIG)
-if not is_valid:
-    logger.error(f"Falló en la configuración de la base de datos: {validation_msg}")
-else:
-    logger.info("Configuración de la base de datos válida")
+# Habitaciones libres por noche, por versión de reservas (la copia en memoria
+# de config.versiones, al día en todos los workers): una escritura en
+# cualquiera de ellos cambia la versión y deja las entradas anteriores sin uso
+# hasta que expiran. Un acierto no consulta la base
+calendario_cache = TTLCache(
+    maxsize=int(os.getenv('CALENDARIO_CACHE_MAX', '256')),
+    ttl=float(os.getenv('CALENDARIO_CACHE_TTL', '30')),
+    name='calendario_disponibilidad'
+)
 
 # Twilio
 # TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID", "tu_twilio_account_sid")
@@ -36,24 +47,22 @@ else:
 # twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
 
 @router.get("/reservas", response_model=list[BookingResponse])
-async def get_reservas(current_user = Depends(get_current_active_user)):
+async def get_reservas(request: Request, current_user = Depends(get_current_active_user)):
+    user_id = current_user.id
+
     try:
-        user_id = current_user.id
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
-        query = """
-            SELECT r.id, r.usuario_id, r.fecha_check_in, r.fecha_check_out,
-                    r.cantidad_habitaciones, u.email AS contacto,
-                    INITCAP(r.estado) as estado, r.precio_total, r.fecha_creacion
-            FROM reservas r
-            JOIN usuarios u ON r.usuario_id = u.id
-            WHERE r.usuario_id = %s
-        """
-        reservas = execute_query(cursor, query, (user_id,))
-        cursor.close()
-        connection.close()
-        logger.info(f"Usuario {user_id} consultó sus reservas")
-        return reservas
+        # Las reservas del usuario incluyen su email como contacto
+        versions, last_modified = await resource_versions(('reservas', user_id), ('usuario', user_id))
+        headers = cache_headers(make_etag('reservas', user_id, *versions), last_modified, 'private, no-cache')
+        headers['Vary'] = 'Authorization'
+        if check_not_modified(request, 'GET /api/reservas', headers['ETag'], last_modified):
+            return not_modified(headers)
+
+        reservas = await run_db(get_reservas_by_usuario, user_id)
+        logger.debug("Usuario %s consultó sus reservas", user_id)
+        return RowsResponse(reservas, BookingResponse, headers=headers)
+    except PoolTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error en GET /api/reservas para usuario {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al obtener reservas")
@@ -75,65 +84,19 @@ async def create_reserva(reserva: BookingCreate, current_user = Depends(get_curr
         raise HTTPException(status_code=400, detail=str(e))
 
     try:
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
-
-        query = """
-            SELECT SUM(cantidad_habitaciones) as total_habitaciones
-            FROM reservas
-            WHERE (fecha_check_in <= %s AND fecha_check_out >= %s)
-            AND estado NOT IN ('Cancelada', 'Finalizada')
-        """
-        cursor.execute(query, (reserva.fecha_check_out, reserva.fecha_check_in))
-        result = cursor.fetchone()
-        total_habitaciones = result['total_habitaciones'] or 0
-        max_habitaciones = 4
-        if total_habitaciones + reserva.cantidad_habitaciones > max_habitaciones:
-            cursor.close()
-            connection.close()
-            raise HTTPException(status_code=400, detail="No hay suficientes habitaciones disponibles en esas fechas")
-
-        logger.info(f"🔍 DEBUG - DB_CONFIG in create_reserva: {DB_CONFIG}")
-        logger.info(f"🔍 DEBUG - user_id from token: {user_id}")
-        logger.debug(f"Attempting to fetch user with ID: {user_id}")
-        cursor.execute("SELECT email FROM usuarios WHERE id = %s", (user_id,))
-        user = cursor.fetchone()
-        logger.debug(f"User fetch result for ID {user_id}: {user}")
-        logger.info(f"🔍 DEBUG - User query result: {user}")
-        if not user:
-            logger.error(f"User with ID {user_id} not found in database")
-            cursor.close()
-            connection.close()
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        user_email = user['email']
-
-        dias = (reserva.fecha_check_out - reserva.fecha_check_in).days
-        precio_total = dias * reserva.cantidad_habitaciones * 100.0
-
-        observaciones = f"Contacto: {user_email}"
-        reserva_id = insert_reserva(
-            cursor, connection, user_id, reserva.fecha_check_in,
-            reserva.fecha_check_out, reserva.cantidad_habitaciones, precio_total, observaciones
+        nueva_reserva = await run_db(
+            insert_reserva_usuario, user_id, reserva.fecha_check_in,
+            reserva.fecha_check_out, reserva.cantidad_habitaciones
         )
-        if not reserva_id:
-            cursor.close()
-            connection.close()
-            raise HTTPException(status_code=500, detail="Error al crear reserva")
-
-        cursor.execute(
-            """
-            SELECT r.id, r.usuario_id, r.fecha_check_in, r.fecha_check_out,
-                    r.cantidad_habitaciones, u.email AS contacto,
-                    INITCAP(r.estado) as estado, r.precio_total, r.fecha_creacion
-            FROM reservas r
-            JOIN usuarios u ON r.usuario_id = u.id
-            WHERE r.id = %s
-            """,
-            (reserva_id,)
-        )
-        nueva_reserva = cursor.fetchone()
-        cursor.close()
-        connection.close()
+
+        if isinstance(nueva_reserva, dict) and "error" in nueva_reserva:
+            error_type = nueva_reserva["type"]
+            if error_type == "sin_disponibilidad":
+                raise HTTPException(status_code=400, detail=nueva_reserva["error"])
+            elif error_type == "usuario_no_encontrado":
+                raise HTTPException(status_code=404, detail=nueva_reserva["error"])
+            else:
+                raise HTTPException(status_code=500, detail=nueva_reserva["error"])
 
         # Log para notificación manual vía WhatsApp
         # logger.info(f"Nueva reserva pendiente: ID {reserva_id}, Contacto: {user_email}, Fechas: {reserva.fecha_check_in} a {reserva.fecha_check_out}, Habitaciones: {reserva.cantidad_habitaciones}. Contactar vía WhatsApp para pago.")
@@ -151,6 +114,8 @@ async def create_reserva(reserva: BookingCreate, current_user = Depends(get_curr
         #     # No fallamos la request si falla el mensaje
         
         return nueva_reserva
+    except (HTTPException, PoolTimeoutError):
+        raise
     except Exception as e:
         logger.error(f"Error en POST /api/reservas para usuario {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al crear reserva")
@@ -159,61 +124,103 @@ async def create_reserva(reserva: BookingCreate, current_user = Depends(get_curr
 @router.get("/reservas/pendientes", response_model=list[BookingResponse])
 async def get_reservas_pendientes():
     try:
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
-        query = """
-            SELECT r.id, r.usuario_id, r.fecha_check_in, r.fecha_check_out,
-                    r.cantidad_habitaciones, u.email AS contacto,
-                    INITCAP(r.estado) as estado, r.precio_total, r.fecha_creacion
-            FROM reservas r
-            JOIN usuarios u ON r.usuario_id = u.id
-            WHERE r.estado = 'Pendiente'
-        """
-        reservas = execute_query(cursor, query)
-        cursor.close()
-        connection.close()
-        return reservas
+        return RowsResponse(await run_db(fetch_reservas_pendientes), BookingResponse)
+    except PoolTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error en GET /api/reservas/pendientes: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al obtener reservas pendientes")
 
-# GET /api/disponibilidad - Obtener reservas para calendario interactivo -> Pendiente
+# GET /api/disponibilidad - Habitaciones ocupadas y libres por noche para el calendario
 @router.get("/disponibilidad")
 async def get_disponibilidad(start_date: date, end_date: date):
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="La fecha final debe ser posterior a la inicial")
+    # Una noche por fila: el mismo tope que el calendario
+    if (end_date - start_date).days + 1 > CALENDARIO_MAX_NOCHES:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {CALENDARIO_MAX_NOCHES} noches")
     try:
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
-        query = """
-            SELECT fecha_check_in, fecha_check_out, cantidad_habitaciones
-            FROM reservas
-            WHERE fecha_check_in <= %s AND fecha_check_out >= %s
-            AND estado NOT IN ('Cancelada', 'Finalizada')
-        """
-        reservas = execute_query(cursor, query, (end_date, start_date))
-        cursor.close()
-        connection.close()
-        return reservas
+        return await run_db(get_disponibilidad_por_noche, start_date, end_date)
+    except PoolTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error en GET /api/disponibilidad: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al obtener disponibilidad")
 
+def encode_rle(libres):
+    """
+    Agrupa noches consecutivas con la misma cantidad libre: [[noches, libres], ...]
+    """
+    runs = []
+    for libre in libres:
+        if runs and runs[-1][1] == libre:
+            runs[-1][0] += 1
+        else:
+            runs.append([1, libre])
+    return runs
+
+# GET /api/disponibilidad/calendario - Habitaciones libres por noche, codificadas
+@router.get("/disponibilidad/calendario")
+async def get_calendario(
+    request: Request,
+    desde: date | None = None,
+    hasta: date | None = None,
+    formato: Literal['base64', 'rle'] = 'base64'
+):
+    """
+    Habitaciones libres por noche entre desde y hasta (inclusive, hasta un año).
+    'base64' codifica un byte por noche; 'rle' agrupa noches consecutivas.
+    Responde 304 si la versión de reservas no cambió desde la última consulta
+    """
+    desde = desde or datetime.today().date()
+    hasta = hasta or desde + timedelta(days=CALENDARIO_MAX_NOCHES - 1)
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="La fecha final debe ser posterior a la inicial")
+    noches = (hasta - desde).days + 1
+    if noches > CALENDARIO_MAX_NOCHES:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {CALENDARIO_MAX_NOCHES} noches")
+
+    try:
+        (version,), last_modified = await resource_versions('reservas')
+        headers = cache_headers(
+            make_etag('calendario', version, desde, hasta, formato),
+            last_modified,
+            'public, no-cache'
+        )
+        if check_not_modified(request, 'GET /api/disponibilidad/calendario', headers['ETag'], last_modified):
+            return not_modified(headers)
+
+        key = (version, desde, hasta)
+        libres = calendario_cache.get(key)
+        if libres is None:
+            libres = await run_db(get_habitaciones_libres, desde, hasta)
+            calendario_cache.set(key, libres)
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Error en GET /api/disponibilidad/calendario: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al obtener el calendario")
+
+    return JSONResponse({
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'noches': noches,
+        'capacidad': MAX_HABITACIONES,
+        'formato': formato,
+        'libres': base64.b64encode(libres).decode('ascii') if formato == 'base64' else encode_rle(libres)
+    }, headers=headers)
+
 # DELETE /api/reservas/{reserva_id} - Eliminar una reserva
 @router.delete("/reservas/{reserva_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_reserva_endpoint(reserva_id: int, current_user = Depends(get_current_active_user)):
     user_id = current_user.id
     try:
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        
-        success = delete_reserva(cursor, connection, reserva_id, user_id)
-        
-        cursor.close()
-        connection.close()
+        success = await run_db(delete_reserva_usuario, reserva_id, user_id)
         
         if not success:
             raise HTTPException(status_code=404, detail="Reserva no encontrada o no pertenece al usuario")
             
-    except HTTPException:
+    except (HTTPException, PoolTimeoutError):
         raise
     except Exception as e:
         logger.error(f"Error en DELETE /api/reservas/{reserva_id} para usuario {user_id}: {str(e)}")
@@ -0,0 +1,89 @@
+import json
+import re
+import uuid
+from datetime import datetime, timezone
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from api.fast_json import dumps
+from config.logging_config import get_logger
+from config.metrics import observe_request
+from config.timing import start_request, end_request, span
+
+access_logger = get_logger('peticiones')
+
+# Ids aceptados desde el cliente (X-Request-ID); otro valor se reemplaza
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+class TimedJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa con orjson y suma el tiempo a la fase serialize
+    """
+
+    def render(self, content):
+        with span('serialize'):
+            return dumps(content)
+
+def route_label(scope):
+    """
+    Plantilla de la ruta atendida (/api/reservas/{reserva_id}), el punto de
+    montaje para archivos estáticos, o 'sin_ruta' si no hubo coincidencia
+    """
+    route = scope.get('route')
+    if route is not None:
+        return route.path
+    if 'endpoint' in scope and scope.get('root_path'):
+        return scope['root_path']
+    return 'sin_ruta'
+
+def _request_id(scope):
+    for name, value in scope['headers']:
+        if name == b'x-request-id':
+            value = value.decode('latin-1')
+            if REQUEST_ID_PATTERN.match(value):
+                return value
+            break
+    return uuid.uuid4().hex
+
+class ServerTimingMiddleware:
+    """
+    Mide cada petición HTTP por fases. Agrega los headers X-Request-ID y
+    Server-Timing a la respuesta, escribe una línea JSON por petición en el
+    log de peticiones y actualiza las métricas de peticiones por ruta
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope)
+        timing, token = start_request(request_id)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                headers = MutableHeaders(scope=message)
+                headers.append('X-Request-ID', request_id)
+                headers.append('Server-Timing', timing.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
+            duracion = timing.elapsed()
+            observe_request(scope['method'], route_label(scope), status_code, duracion)
+            access_logger.info(json.dumps({
+                'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                'request_id': request_id,
+                'metodo': scope['method'],
+                'ruta': scope['path'],
+                'status': status_code,
+                'duracion_ms': round(duracion * 1000, 2),
+                'fases': timing.as_dict()
+            }, ensure_ascii=False))
@@ -0,0 +1,165 @@
+"""
+Archivos estáticos y páginas con variantes precomprimidas
+
+Si existe el build de config.static_build, /static busca primero en él y
+después en public/ (para lo que no pasó por el build). Los assets con hash
+en el nombre se sirven con Cache-Control immutable por un año y un ETag
+derivado del hash; el resto, y las páginas, con no-cache para que el
+navegador revalide con ETag. Si el cliente acepta br o gzip y el build tiene
+esa variante, se envía el archivo ya comprimido. FileResponse atiende Range
+e If-Range sobre la representación elegida.
+
+Las páginas se sirven desde el cache en memoria de config.page_cache, sin
+leer el disco, con el mismo criterio de variantes y un ETag del contenido.
+"""
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from fastapi import HTTPException, Request, Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+from api.http_cache import cache_headers, check_not_modified, not_modified
+from config.page_cache import get_page_cache, page_directories
+from config.static_build import get_static_config, load_manifest
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Extensión de archivo de cada variante, en orden de preferencia
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+_HASH = re.compile(r'\.([0-9a-f]{10})\.[^.]+$')
+
+# Las derivadas de config.image_build; no todas las versiones de Python las conocen
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('image/webp', '.webp')
+
+def parse_accept_encoding(header):
+    """
+    Calidad por codificación de un header Accept-Encoding ('*' incluido)
+    """
+    calidades = {}
+    for parte in header.split(','):
+        coding, _, parametros = parte.strip().partition(';')
+        if not coding:
+            continue
+        calidad = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith('q='):
+            try:
+                calidad = float(parametro[2:])
+            except ValueError:
+                calidad = 0.0
+        calidades[coding.strip().lower()] = calidad
+    return calidades
+
+def negotiate(header, disponibles):
+    """
+    Codificación a enviar entre las variantes disponibles, o None para el original
+    """
+    if not disponibles or not header:
+        return None
+    calidades = parse_accept_encoding(header)
+    mejor, mejor_calidad = None, 0.0
+    for encoding in ENCODINGS:
+        if encoding not in disponibles:
+            continue
+        calidad = calidades.get(encoding, calidades.get('*', 0.0))
+        if calidad > mejor_calidad:
+            mejor, mejor_calidad = encoding, calidad
+    return mejor
+
+def scan_variants(directory):
+    """
+    Variantes precomprimidas por ruta real del original: {ruta: {encoding: (ruta, stat)}}
+    """
+    variantes = {}
+    if not directory.is_dir():
+        return variantes
+    for raiz, _, archivos in os.walk(directory):
+        for nombre in archivos:
+            for encoding, sufijo in ENCODINGS.items():
+                if nombre.endswith(sufijo):
+                    path = os.path.join(raiz, nombre)
+                    original = os.path.realpath(path[:-len(sufijo)])
+                    variantes.setdefault(original, {})[encoding] = (path, os.stat(path))
+    return variantes
+
+def pages_directory(*partes):
+    """
+    Directorio de páginas HTML: el del build si existe, si no public/pages
+    """
+    return str(Path(page_directories()[0], *partes))
+
+def cached_page_response(request: Request, page):
+    """
+    Respuesta de una página del cache en la codificación que acepte el cliente,
+    o 304 si el cliente ya la tiene
+    """
+    encoding = negotiate(request.headers.get('accept-encoding'), page.encoded)
+    etag = f'"{page.digest}-{encoding}"' if encoding else f'"{page.digest}"'
+    headers = cache_headers(etag, page.last_modified, REVALIDATE)
+    if page.encoded:
+        headers['Vary'] = 'Accept-Encoding'
+    if check_not_modified(request, f'GET {request.url.path}', etag, page.last_modified):
+        return not_modified(headers)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(page.encoded[encoding] if encoding else page.body, media_type='text/html', headers=headers)
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles sobre el build y public/, con negociación de variantes
+    precomprimidas y cache de larga duración para los assets con hash
+    """
+
+    def __init__(self, config=None, **kwargs):
+        config = config or get_static_config()
+        super().__init__(directory=config['source_dir'], **kwargs)
+        build_dir = Path(os.path.realpath(config['build_dir']))
+        manifest = load_manifest(build_dir)
+        if manifest:
+            self.all_directories = [str(build_dir), *self.all_directories]
+        # Hash del contenido por ruta real de cada asset con hash
+        self.hashed = {
+            str(build_dir / hashed): _HASH.search(hashed).group(1) for hashed in manifest.values()
+        }
+        self.variants = scan_variants(build_dir) if manifest else {}
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        full_path = str(full_path)
+        request_headers = Headers(scope=scope)
+        variantes = self.variants.get(full_path)
+        digest = self.hashed.get(full_path)
+
+        headers = {'Cache-Control': IMMUTABLE if digest else REVALIDATE}
+        if variantes:
+            headers['Vary'] = 'Accept-Encoding'
+        media_type = mimetypes.guess_type(full_path)[0] or 'text/plain'
+
+        encoding = negotiate(request_headers.get('accept-encoding'), variantes)
+        if encoding:
+            full_path, stat_result = variantes[encoding]
+            headers['Content-Encoding'] = encoding
+        if digest:
+            headers['ETag'] = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+        response = FileResponse(
+            full_path, status_code=status_code, headers=headers, media_type=media_type, stat_result=stat_result
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    async def page_response(self, request: Request, relative):
+        """
+        Página HTML (ruta relativa a pages/) desde el cache en memoria
+        """
+        page = get_page_cache().get(relative)
+        if page is None:
+            raise HTTPException(status_code=404)
+        return cached_page_response(request, page)
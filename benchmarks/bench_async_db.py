@@ -0,0 +1,81 @@
+"""
+Benchmark: throughput de peticiones concurrentes por worker con acceso
+bloqueante a la base de datos vs. acceso a través de run_db
+
+Cada petición ejecuta una consulta que tarda QUERY_MS en PostgreSQL. Con la
+llamada bloqueante en el handler async, el event loop procesa una consulta
+por vez; con run_db las consultas se solapan hasta el tamaño del pool.
+
+Uso (requiere PostgreSQL configurado en .env):
+    python -m benchmarks.bench_async_db --requests 200 --concurrency 50 --query-ms 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from config.database_async import run_db, reset_db_limiter
+from config.database_pool import init_pool, close_pool, get_db_connection
+
+def slow_query(seconds):
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_sleep(%s)", (seconds,))
+            cursor.fetchone()
+
+def build_app(seconds):
+    app = FastAPI()
+
+    @app.get("/bloqueante")
+    async def bloqueante():
+        slow_query(seconds)
+        return {"ok": True}
+
+    @app.get("/async")
+    async def no_bloqueante():
+        await run_db(slow_query, seconds)
+        return {"ok": True}
+
+    return app
+
+async def run_load(app, path, total, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return {"path": path, "requests": total, "seconds": round(elapsed, 3), "rps": round(total / elapsed, 1)}
+
+async def main(args):
+    app = build_app(args.query_ms / 1000)
+    reset_db_limiter()
+    results = [
+        await run_load(app, "/bloqueante", args.requests, args.concurrency),
+        await run_load(app, "/async", args.requests, args.concurrency)
+    ]
+    results.append({"speedup": round(results[1]["rps"] / results[0]["rps"], 2)})
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--query-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    init_pool()
+    try:
+        asyncio.run(main(args))
+    finally:
+        close_pool()
@@ -0,0 +1,178 @@
+"""
+Benchmark: memoria de la exportación en streaming
+
+Exporta un millón de filas sintéticas (generate_series, sin tocar tablas
+reales) con ExportacionStream y falla si el pico de memoria residente del
+proceso crece más que --max-mb. Con --comparar, mide después lo mismo
+cargando todo con fetchall() como referencia.
+
+Antes verifica que la descarga de /api/admin/exportar devuelva su conexión
+al pool cuando se lee completa, cuando se cierra con aclose() y cuando se
+cancela (esperando un lote o entre lotes, como al desconectarse el
+cliente). Falla si alguna queda en uso.
+
+Uso (requiere PostgreSQL configurado en .env):
+    python -m benchmarks.bench_exportacion --filas 1000000 --formato csv --max-mb 64
+    python -m benchmarks.bench_exportacion --solo-liberacion
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import time
+
+import anyio
+
+from config.database_pool import init_pool, close_pool, get_db_connection, get_pool_stats
+from config.exportacion import ExportacionStream, ENCODERS
+
+COLUMNAS = ('id', 'usuario_id', 'fecha_check_in', 'precio_total', 'observaciones', 'fecha_creacion')
+
+QUERY = """
+    SELECT g AS id, g %% 5000 AS usuario_id, DATE '2020-01-01' + (g %% 3650) AS fecha_check_in,
+           (g %% 900 + 100)::numeric(10,2) AS precio_total, 'Contacto: usuario' || g || '@example.com' AS observaciones,
+           TIMESTAMP '2020-01-01' + g * INTERVAL '1 minute' AS fecha_creacion
+    FROM generate_series(1, %s) AS g
+"""
+
+def peak_rss_mb():
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_streaming(filas, formato):
+    start_rss = peak_rss_mb()
+    start = time.perf_counter()
+    exportacion = ExportacionStream(QUERY, (filas,), COLUMNAS, formato)
+    total_bytes = sum(len(chunk) for chunk in exportacion)
+    elapsed = time.perf_counter() - start
+    return {
+        'modo': 'streaming',
+        'filas': exportacion.filas,
+        'mb_generados': round(total_bytes / 1024 / 1024, 1),
+        'segundos': round(elapsed, 2),
+        'filas_por_segundo': round(exportacion.filas / elapsed),
+        'crecimiento_pico_rss_mb': round(peak_rss_mb() - start_rss, 1)
+    }
+
+def run_fetchall(filas, formato):
+    start_rss = peak_rss_mb()
+    start = time.perf_counter()
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(QUERY, (filas,))
+            rows = cursor.fetchall()
+    body = ENCODERS[formato](COLUMNAS, rows, True)
+    elapsed = time.perf_counter() - start
+    return {
+        'modo': 'fetchall',
+        'filas': len(rows),
+        'mb_generados': round(len(body) / 1024 / 1024, 1),
+        'segundos': round(elapsed, 2),
+        'filas_por_segundo': round(len(rows) / elapsed),
+        'crecimiento_pico_rss_mb': round(peak_rss_mb() - start_rss, 1)
+    }
+
+async def _conexiones_en_uso(espera=1.0):
+    # La conexión vuelve al pool desde el hilo de run_db: se espera un poco
+    limite = time.monotonic() + espera
+    while get_pool_stats()['in_use'] and time.monotonic() < limite:
+        await asyncio.sleep(0.01)
+    return get_pool_stats()['in_use']
+
+async def _escenarios_liberacion():
+    from api.admin import admin_exportar
+
+    async def abrir():
+        response = await admin_exportar('usuarios', 'csv', None, None)
+        return response.body_iterator
+
+    async def completa():
+        async for _ in await abrir():
+            pass
+
+    async def aclose():
+        contenido = await abrir()
+        await contenido.__anext__()
+        await contenido.aclose()
+
+    async def cancelada(entre_lotes):
+        contenido = await abrir()
+
+        async def consumir():
+            async for _ in contenido:
+                if entre_lotes:
+                    await anyio.sleep(1)
+
+        # Como StreamingResponse al desconectarse el cliente: se cancela el
+        # grupo de tareas, y su alcance sigue cancelado durante los finally.
+        # El generador queda esperando un lote (dentro de run_db) o suspendido
+        # en un yield mientras se "envía" el anterior
+        async with anyio.create_task_group() as grupo:
+            grupo.start_soon(consumir)
+            await anyio.sleep(0.2 if entre_lotes else 0)
+            grupo.cancel_scope.cancel()
+        if entre_lotes:
+            # Starlette abandona el iterador: lo cierra el recolector del event loop
+            del contenido
+            gc.collect()
+
+    resultados = []
+    for nombre, escenario in (
+        ('completa', completa),
+        ('aclose', aclose),
+        ('cancelada_esperando_lote', lambda: cancelada(False)),
+        ('cancelada_entre_lotes', lambda: cancelada(True))
+    ):
+        await escenario()
+        resultados.append({'escenario': nombre, 'conexiones_en_uso': await _conexiones_en_uso()})
+    return resultados
+
+def run_liberacion():
+    """
+    Corre los escenarios de liberación de la conexión de una exportación
+    """
+    # Un lote por fila, para que la descarga quede a mitad de camino
+    os.environ['EXPORT_BATCH_SIZE'] = '1'
+    try:
+        return asyncio.run(_escenarios_liberacion())
+    finally:
+        del os.environ['EXPORT_BATCH_SIZE']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--formato', choices=sorted(ENCODERS), default='csv')
+    parser.add_argument('--max-mb', type=float, default=64.0)
+    parser.add_argument('--comparar', action='store_true', help='Medir también fetchall() (usa mucha memoria)')
+    parser.add_argument('--solo-liberacion', action='store_true', help='Verificar solo que las conexiones vuelvan al pool')
+    args = parser.parse_args()
+
+    init_pool()
+    try:
+        liberacion = run_liberacion()
+        print(json.dumps(liberacion, indent=2))
+        retenidas = [resultado['escenario'] for resultado in liberacion if resultado['conexiones_en_uso']]
+        if retenidas:
+            print(f"FALLA: la exportación no devolvió su conexión al pool ({', '.join(retenidas)})")
+            return 1
+        if args.solo_liberacion:
+            return 0
+
+        results = [run_streaming(args.filas, args.formato)]
+        # El pico de RSS no baja: fetchall() se mide después del streaming
+        if args.comparar:
+            results.append(run_fetchall(args.filas, args.formato))
+    finally:
+        close_pool()
+
+    print(json.dumps(results, indent=2))
+    growth = results[0]['crecimiento_pico_rss_mb']
+    if growth > args.max_mb:
+        print(f"FALLA: el pico de RSS creció {growth} MB (límite {args.max_mb} MB)")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+"""
+Benchmark: importación masiva con COPY frente a INSERT fila por fila
+
+Genera en memoria N usuarios sin contraseña y una reserva finalizada por
+usuario, los importa con importar(..., simular=True) (todo se revierte) y
+reporta filas por segundo. Con --comparar inserta las mismas filas con un
+INSERT por fila dentro de una transacción que también se revierte.
+
+Uso (requiere PostgreSQL configurado en .env):
+    python -m benchmarks.bench_importacion --filas 100000 --comparar
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import date, timedelta
+
+from config.database_pool import init_pool, close_pool, get_db_connection
+from config.importacion import USUARIO_COLUMNAS, RESERVA_COLUMNAS, PASSWORD_INUTILIZABLE, importar
+
+# DNIs fuera del rango de los usuarios reales
+DNI_BASE = 90_000_000
+
+def generar_filas(filas):
+    usuarios = []
+    reservas = []
+    for i in range(filas):
+        dni = str(DNI_BASE + i)
+        usuarios.append((f"Nombre{i}", f"Bench{i}", dni, f"20{dni}9", f"bench{i}@example.com", f"11{dni}"))
+        check_in = date(2000, 1, 1) + timedelta(days=i % 7000)
+        reservas.append((dni, check_in.isoformat(), (check_in + timedelta(days=2)).isoformat(), 1 + i % 4, 'finalizada'))
+    return usuarios, reservas
+
+def to_csv(columnas, filas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+    writer.writerows(filas)
+    buffer.seek(0)
+    return buffer
+
+def run_copy(usuarios, reservas):
+    start = time.perf_counter()
+    informe = importar(
+        to_csv(USUARIO_COLUMNAS, usuarios),
+        to_csv(RESERVA_COLUMNAS + ('estado',), reservas),
+        simular=True
+    )
+    elapsed = time.perf_counter() - start
+    total = len(usuarios) + len(reservas)
+    return {
+        'modo': 'copy',
+        'filas': total,
+        'importadas': sum(r['importadas'] for r in informe['resultados']),
+        'segundos': round(elapsed, 2),
+        'filas_por_segundo': round(total / elapsed)
+    }
+
+def run_insert(usuarios, reservas):
+    start = time.perf_counter()
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            try:
+                for usuario in usuarios:
+                    cursor.execute("""
+                        INSERT INTO usuarios (nombre, apellido, dni, cuil_cuit, email, telefono, password)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """, (*usuario, PASSWORD_INUTILIZABLE))
+                for dni, check_in, check_out, cantidad, estado in reservas:
+                    cursor.execute("""
+                        INSERT INTO reservas (usuario_id, fecha_check_in, fecha_check_out,
+                                              cantidad_habitaciones, precio_total, estado)
+                        SELECT id, %s, %s, %s, %s, %s FROM usuarios WHERE dni = %s
+                    """, (check_in, check_out, cantidad, 2 * cantidad * 100.0, estado, dni))
+            finally:
+                connection.rollback()
+    elapsed = time.perf_counter() - start
+    total = len(usuarios) + len(reservas)
+    return {
+        'modo': 'insert',
+        'filas': total,
+        'segundos': round(elapsed, 2),
+        'filas_por_segundo': round(total / elapsed)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=100_000, help='Usuarios a generar (y una reserva por usuario)')
+    parser.add_argument('--comparar', action='store_true', help='Medir también INSERT fila por fila')
+    args = parser.parse_args()
+
+    usuarios, reservas = generar_filas(args.filas)
+
+    init_pool()
+    try:
+        results = [run_copy(usuarios, reservas)]
+        if args.comparar:
+            results.append(run_insert(usuarios, reservas))
+    finally:
+        close_pool()
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
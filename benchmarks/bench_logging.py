@@ -0,0 +1,134 @@
+"""
+Benchmark: latencia de peticiones con logging desactivado, con handlers de
+archivo síncronos (configuración anterior) y con la cola de logging
+
+Cada petición escribe --lineas mensajes INFO, como hacía el login con los
+mensajes de diagnóstico. Los archivos de log se escriben en un directorio
+temporal. Con --pausa-disco-ms, cada 100 registros la escritura se demora
+ese tiempo, simulando un disco lento o una rotación. No usa la base de datos.
+
+Uso:
+    python -m benchmarks.bench_logging --requests 5000 --concurrency 50 --lineas 15 --pausa-disco-ms 20
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import logging.handlers
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+from config import logging_config
+
+PAYLOAD = 'x' * 200
+
+def build_app(lineas):
+    app = FastAPI()
+    logger = logging_config.get_logger('benchmarks.bench_logging')
+
+    @app.get("/login")
+    async def login():
+        for numero in range(lineas):
+            logger.info(f"🔍 Mensaje {numero} de la petición: {PAYLOAD}")
+        logger.debug(f"Detalle desactivado: {PAYLOAD}")
+        return {"ok": True}
+
+    return app
+
+def slow_down(handlers, pausa):
+    contador = itertools.count(1)
+    for handler in handlers:
+        emit = handler.emit
+
+        def slow_emit(record, emit=emit):
+            if next(contador) % 100 == 0:
+                time.sleep(pausa)
+            emit(record)
+
+        handler.emit = slow_emit
+
+def configure(modo, directorio, pausa):
+    """
+    Deja el logger 'Posada' con la configuración del modo indicado
+    """
+    logging_config.stop_logging()
+    logger = logging.getLogger('Posada')
+    logger.handlers.clear()
+
+    if modo == 'off':
+        logger.setLevel(logging.WARNING)
+    elif modo == 'sync':
+        logger.setLevel(logging.DEBUG)
+        formatter = logging.Formatter(logging_config.LOG_FORMAT)
+        file_handler = logging.handlers.RotatingFileHandler(
+            directorio / 'app.log', maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8'
+        )
+        file_handler.setFormatter(formatter)
+        error_handler = logging.FileHandler(directorio / 'errors.log', encoding='utf-8')
+        error_handler.setLevel(logging.ERROR)
+        error_handler.setFormatter(formatter)
+        logger.addHandler(file_handler)
+        logger.addHandler(error_handler)
+        slow_down(logger.handlers, pausa)
+    else:
+        logging_config.logs_dir = directorio
+        # Sin límite por línea: se mide el costo de escribir todo
+        logging_config.setup_logger({**logging_config.get_log_config(), 'level': 'INFO', 'levels': {}, 'rate_limit': 0})
+        slow_down(logging_config._listener.handlers, pausa)
+
+async def run(app, requests, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/login")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests_por_segundo': round(requests / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--lineas', type=int, default=15, help='Mensajes INFO por petición')
+    parser.add_argument('--pausa-disco-ms', type=float, default=0.0, help='Demora de escritura cada 100 registros')
+    args = parser.parse_args()
+
+    app = build_app(args.lineas)
+    results = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for modo in ('off', 'sync', 'queue'):
+            configure(modo, Path(directorio), args.pausa_disco_ms / 1000)
+            result = asyncio.run(run(app, args.requests, args.concurrency))
+            # Incluye el tiempo del hilo de escritura en vaciar la cola
+            logging_config.stop_logging()
+            if modo == 'queue':
+                stats = logging_config.get_logging_stats()
+                result.update(descartados=stats['descartados'])
+            results.append({'modo': modo, **result})
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+"""
+Benchmark: creación concurrente de reservas
+
+Lanza cientos de reservas en paralelo contra PostgreSQL y comprueba que
+ninguna noche supere MAX_HABITACIONES y que ocupacion_diaria coincida con
+reservas. Mide dos escenarios:
+
+- contencion: todas las reservas compiten por las mismas noches
+- sin_contencion: cada reserva usa noches distintas
+
+Las reservas se crean en fechas lejanas con un usuario de prueba y se
+eliminan al terminar.
+
+Uso (requiere PostgreSQL configurado en .env):
+    python -m benchmarks.bench_reservas_concurrentes --reservas 300 --hilos 16
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from config.database_connection import bootstrap_database
+from config.database_operations import create_reserva, get_reserva_stats
+from config.database_pool import init_pool, close_pool, get_db_connection
+from config.ocupacion import MAX_HABITACIONES, verificar_ocupacion, reconstruir_ocupacion
+
+BENCH_DNI = '99999999'
+BASE_DATE = date(2090, 1, 1)
+
+def get_bench_user():
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO usuarios (nombre, apellido, dni, cuil_cuit, email, telefono, password)
+                VALUES ('Bench', 'Reservas', %s, '20999999999', 'bench.reservas@example.com', '1199999999', '!')
+                ON CONFLICT (dni) DO UPDATE SET activo = true
+                RETURNING id
+            """, (BENCH_DNI,))
+            user_id = cursor.fetchone()[0]
+        connection.commit()
+    return user_id
+
+def cleanup(user_id):
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM reservas WHERE usuario_id = %s", (user_id,))
+            connection.commit()
+            reconstruir_ocupacion(cursor, connection)
+
+def run_scenario(name, user_id, stays, threads):
+    before = get_reserva_stats()
+
+    def book(stay):
+        check_in, nights, rooms = stay
+        return create_reserva(user_id, check_in, check_in + timedelta(days=nights), rooms)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(book, stays))
+    elapsed = time.perf_counter() - start
+
+    after = get_reserva_stats()
+    delta = {key: after[key] - before[key] for key in after}
+    committed = sum(1 for result in results if result and 'error' not in result)
+
+    return {
+        'escenario': name,
+        'reservas_intentadas': len(stays),
+        'confirmadas': committed,
+        'rechazadas_sin_disponibilidad': delta['rechazadas_sin_disponibilidad'],
+        'conflictos': delta['conflictos'],
+        'reintentos': delta['reintentos'],
+        'tasa_reintentos': round(delta['reintentos'] / len(stays), 4),
+        'segundos': round(elapsed, 3),
+        'commits_por_segundo': round(committed / elapsed, 1),
+        'intentos_por_segundo': round(len(stays) / elapsed, 1)
+    }
+
+def check_invariants(user_id):
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT COALESCE(MAX(ocupadas), 0) FROM (
+                    SELECT SUM(r.cantidad_habitaciones) AS ocupadas
+                    FROM reservas r
+                    CROSS JOIN LATERAL generate_series(r.fecha_check_in, r.fecha_check_out - 1, INTERVAL '1 day') AS noche
+                    WHERE r.usuario_id = %s
+                    GROUP BY noche
+                ) t
+            """, (user_id,))
+            max_ocupadas = cursor.fetchone()[0]
+            diferencias = verificar_ocupacion(cursor)
+    return {
+        'max_habitaciones_por_noche': max_ocupadas,
+        'sobreventa': max_ocupadas > MAX_HABITACIONES,
+        'noches_con_diferencias_en_ledger': len(diferencias)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reservas', type=int, default=300)
+    parser.add_argument('--hilos', type=int, default=16)
+    args = parser.parse_args()
+
+    bootstrap_database()
+    init_pool()
+    user_id = get_bench_user()
+    try:
+        cleanup(user_id)
+        contention = [(BASE_DATE + timedelta(days=i % 3), 2 + i % 2, 1 + i % 2) for i in range(args.reservas)]
+        no_contention = [(BASE_DATE + timedelta(days=100 + 4 * i), 2, 1) for i in range(args.reservas)]
+
+        results = [
+            run_scenario('contencion', user_id, contention, args.hilos),
+            run_scenario('sin_contencion', user_id, no_contention, args.hilos),
+            check_invariants(user_id)
+        ]
+        print(json.dumps(results, indent=2))
+        return 1 if results[-1]['sobreventa'] or results[-1]['noches_con_diferencias_en_ledger'] else 0
+    finally:
+        cleanup(user_id)
+        close_pool()
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,448 @@
+"""
+Prueba de carga HTTP de los endpoints críticos
+
+Crea una base de datos descartable en el servidor PostgreSQL configurado en
+.env (--base, por defecto posada_carga), le aplica las migraciones y la
+siembra con usuarios y reservas sintéticas. Después lanza peticiones con
+httpx contra la aplicación, en el mismo proceso (--modo asgi) o contra
+uvicorn levantado en un subproceso (--modo uvicorn, con --workers), para
+cada escenario y cada nivel de concurrencia de --concurrencia:
+
+    login            POST /api/auth/login (una verificación bcrypt)
+    login_dos_pasos  POST /api/login + POST /autenticar_creacion_usuario/login,
+                     el flujo anterior del frontend (dos verificaciones)
+    crear_usuario    POST /usuarios/crear
+    reservas_listar  GET  /api/reservas
+    reservas_crear   POST /api/reservas
+    disponibilidad   GET  /api/disponibilidad
+    admin_usuarios   GET  /api/admin/usuarios
+
+Reporta peticiones por segundo, p50/p95/p99 y los códigos de estado, y
+guarda el resultado en JSON junto con el commit actual, para comparar
+corridas con --comparar. Al terminar borra la base (salvo --conservar).
+
+Uso:
+    python -m benchmarks.carga --concurrencia 1,10,50 --requests 500
+    python -m benchmarks.carga --modo uvicorn --workers 4 --escenarios login,reservas_listar
+    python -m benchmarks.carga --comparar benchmarks/resultados/carga_abc1234_20260101-120000.json
+"""
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+PASSWORD = 'CargaPosada1'
+# DNIs de los usuarios sembrados y de los creados durante la prueba
+DNI_SEMBRADOS = 80_000_000
+DNI_NUEVOS = 85_000_000
+RESULTADOS_DIR = Path(__file__).parent / 'resultados'
+
+ESCENARIOS = ('login', 'login_dos_pasos', 'crear_usuario', 'reservas_listar', 'reservas_crear', 'disponibilidad', 'admin_usuarios')
+
+def _log(mensaje):
+    print(mensaje, file=sys.stderr, flush=True)
+
+def _percentile(ordenadas, fraccion):
+    return ordenadas[min(len(ordenadas) - 1, int(fraccion * len(ordenadas)))]
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocido'
+
+# Base de datos descartable
+
+def _admin_connection():
+    from config.database_config import get_database_config
+
+    config = get_database_config()
+    connection = psycopg2.connect(**{**config, 'database': 'postgres'})
+    connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    return connection
+
+def crear_base(nombre):
+    """
+    Apunta DB_NAME a la base descartable, la crea y aplica las migraciones.
+    Se niega a usar una base que ya existe
+    """
+    from config.database_connection import bootstrap_database
+
+    connection = _admin_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (nombre,))
+            if cursor.fetchone():
+                raise SystemExit(f"La base {nombre} ya existe: elegí otra con --base o borrala")
+    finally:
+        connection.close()
+
+    os.environ['DB_NAME'] = nombre
+    if not bootstrap_database():
+        raise SystemExit(f"No se pudo inicializar la base {nombre}")
+
+def borrar_base(nombre):
+    connection = _admin_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{nombre}" WITH (FORCE)')
+    finally:
+        connection.close()
+
+def _csv(columnas, filas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+    writer.writerows(filas)
+    buffer.seek(0)
+    return buffer
+
+def sembrar(usuarios, reservas_por_usuario):
+    """
+    Importa los usuarios y sus reservas (finalizadas, en el pasado, así no
+    ocupan capacidad) y les asigna a todos la misma contraseña. El primero
+    (carga0, el del primer token) es administrador
+    """
+    from config.database_pool import get_db_connection
+    from config.importacion import USUARIO_COLUMNAS, RESERVA_COLUMNAS, PASSWORD_INUTILIZABLE, importar
+    from config.password_hashing import get_password_hasher
+
+    filas_usuarios = []
+    filas_reservas = []
+    for i in range(usuarios):
+        dni = str(DNI_SEMBRADOS + i)
+        filas_usuarios.append((f"Carga{i}", f"Sembrado{i}", dni, f"20{dni}9", f"carga{i}@example.com", f"11{dni}"))
+        for k in range(reservas_por_usuario):
+            check_in = date(2000, 1, 1) + timedelta(days=(i * 7 + k * 3) % 7000)
+            filas_reservas.append((dni, check_in.isoformat(), (check_in + timedelta(days=2)).isoformat(), 1, 'finalizada'))
+
+    informe = importar(
+        _csv(USUARIO_COLUMNAS, filas_usuarios),
+        _csv(RESERVA_COLUMNAS + ('estado',), filas_reservas)
+    )
+    for resultado in informe['resultados']:
+        if resultado['rechazadas_total']:
+            raise SystemExit(f"La siembra de {resultado['recurso']} rechazó filas: {resultado['rechazos'][:3]}")
+
+    hashed = get_password_hasher().hash_sync(PASSWORD)
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE usuarios SET password = %s WHERE password = %s", (hashed, PASSWORD_INUTILIZABLE))
+            cursor.execute("UPDATE usuarios SET es_admin = true WHERE dni = %s", (str(DNI_SEMBRADOS),))
+            cursor.execute("ANALYZE")
+        connection.commit()
+
+# Aplicación bajo prueba
+
+class ServidorASGI:
+    """
+    La aplicación en este proceso, con su lifespan
+    """
+
+    def __init__(self):
+        from main import app
+        self.app = app
+        self._lifespan = None
+
+    async def __aenter__(self):
+        self._lifespan = self.app.router.lifespan_context(self.app)
+        await self._lifespan.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._lifespan.__aexit__(*exc)
+
+    def client(self, concurrencia):
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.app), base_url='http://carga', timeout=60
+        )
+
+class ServidorUvicorn:
+    """
+    uvicorn en un subproceso, con la base descartable en DB_NAME
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.process = None
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.base_url = f'http://127.0.0.1:{self.port}'
+
+    async def __aenter__(self):
+        env = {**os.environ, 'DB_BOOTSTRAP_ON_STARTUP': 'false'}
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(self.port),
+             '--workers', str(self.workers), '--log-level', 'warning', '--no-access-log'],
+            env=env, cwd=Path(__file__).resolve().parent.parent
+        )
+        async with httpx.AsyncClient(base_url=self.base_url) as client:
+            limite = time.monotonic() + 60
+            while time.monotonic() < limite:
+                if self.process.poll() is not None:
+                    raise SystemExit(f"uvicorn terminó con código {self.process.returncode}")
+                try:
+                    if (await client.get('/api/monitoreo/pool')).status_code == 200:
+                        return self
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.2)
+        raise SystemExit("uvicorn no respondió en 60 segundos")
+
+    async def __aexit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def client(self, concurrencia):
+        limits = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+        return httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=60)
+
+# Escenarios: cada uno arma la petición número n
+
+def construir_escenarios(usuarios, tokens):
+    hoy = date.today()
+    nuevos = itertools.count()
+    ventanas = itertools.count()
+
+    def auth(n):
+        return {'Authorization': f'Bearer {tokens[n % len(tokens)]}'}
+
+    def login(client, n):
+        return client.post('/api/auth/login', json={'usuario': f'carga{n % usuarios}@example.com', 'password': PASSWORD})
+
+    async def login_dos_pasos(client, n):
+        # Se mide el flujo completo: la latencia incluye las dos peticiones
+        response = await client.post('/api/login', json={'dni': str(DNI_SEMBRADOS + n % usuarios), 'password': PASSWORD})
+        if response.status_code != 200:
+            return response
+        return await client.post('/autenticar_creacion_usuario/login', data={
+            'username': response.json()['user']['email'], 'password': PASSWORD
+        })
+
+    def crear_usuario(client, n):
+        i = next(nuevos)
+        dni = str(DNI_NUEVOS + i)
+        return client.post('/usuarios/crear', json={
+            'nombre': f'Carga{i}', 'apellido': f'Nuevo{i}', 'dni': dni, 'cuil_cuit': f'20{dni}9',
+            'email': f'nuevo{i}@example.com', 'telefono': f'11{dni}', 'password': PASSWORD
+        })
+
+    def reservas_listar(client, n):
+        return client.get('/api/reservas', headers=auth(n))
+
+    def reservas_crear(client, n):
+        # Una habitación por reserva: cuatro reservas comparten cada par de noches
+        check_in = hoy + timedelta(days=7 + 2 * (next(ventanas) // 4))
+        return client.post('/api/reservas', headers=auth(n), json={
+            'fecha_check_in': check_in.isoformat(),
+            'fecha_check_out': (check_in + timedelta(days=2)).isoformat(),
+            'cantidad_habitaciones': 1
+        })
+
+    def disponibilidad(client, n):
+        inicio = hoy + timedelta(days=n % 180)
+        return client.get('/api/disponibilidad', params={
+            'start_date': inicio.isoformat(), 'end_date': (inicio + timedelta(days=30)).isoformat()
+        })
+
+    def admin_usuarios(client, n):
+        return client.get('/api/admin/usuarios', params={'limite': 50}, headers={'Authorization': f'Bearer {tokens[0]}'})
+
+    return {
+        'login': login,
+        'login_dos_pasos': login_dos_pasos,
+        'crear_usuario': crear_usuario,
+        'reservas_listar': reservas_listar,
+        'reservas_crear': reservas_crear,
+        'disponibilidad': disponibilidad,
+        'admin_usuarios': admin_usuarios
+    }
+
+async def obtener_tokens(servidor, cantidad, usuarios):
+    tokens = []
+    async with servidor.client(1) as client:
+        for i in range(min(cantidad, usuarios)):
+            response = await client.post('/api/auth/login', json={
+                'usuario': f'carga{i}@example.com', 'password': PASSWORD
+            })
+            response.raise_for_status()
+            tokens.append(response.json()['access_token'])
+    return tokens
+
+async def medir(client, peticion, requests, concurrencia):
+    """
+    `concurrencia` clientes que envían peticiones una tras otra hasta
+    completar `requests`. Retorna latencias, códigos y segundos totales
+    """
+    contador = itertools.count()
+    latencias = []
+    estados = {}
+
+    async def cliente():
+        while (n := next(contador)) < requests:
+            start = time.perf_counter()
+            try:
+                status = (await peticion(client, n)).status_code
+            except httpx.HTTPError as error:
+                status = type(error).__name__
+            latencias.append(time.perf_counter() - start)
+            estados[status] = estados.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concurrencia)))
+    return latencias, estados, time.perf_counter() - start
+
+def resumir(escenario, concurrencia, latencias, estados, segundos):
+    latencias.sort()
+    return {
+        'escenario': escenario,
+        'concurrencia': concurrencia,
+        'requests': len(latencias),
+        'errores': sum(cantidad for status, cantidad in estados.items() if status != 200),
+        'status': {str(status): cantidad for status, cantidad in sorted(estados.items(), key=str)},
+        'segundos': round(segundos, 3),
+        'requests_por_segundo': round(len(latencias) / segundos, 1),
+        'p50_ms': round(_percentile(latencias, 0.50) * 1000, 2),
+        'p95_ms': round(_percentile(latencias, 0.95) * 1000, 2),
+        'p99_ms': round(_percentile(latencias, 0.99) * 1000, 2),
+        'max_ms': round(latencias[-1] * 1000, 2)
+    }
+
+async def correr(servidor, args):
+    async with servidor:
+        tokens = await obtener_tokens(servidor, args.tokens, args.usuarios)
+        escenarios = construir_escenarios(args.usuarios, tokens)
+        resultados = []
+        for concurrencia in args.concurrencia:
+            async with servidor.client(concurrencia) as client:
+                for escenario in args.escenarios:
+                    peticion = escenarios[escenario]
+                    if args.calentamiento:
+                        await medir(client, peticion, args.calentamiento, concurrencia)
+                    resultado = resumir(escenario, concurrencia, *await medir(client, peticion, args.requests, concurrencia))
+                    _log(f"{escenario:16} c={concurrencia:<4} {resultado['requests_por_segundo']:>8} req/s  "
+                         f"p50 {resultado['p50_ms']:>8} ms  p95 {resultado['p95_ms']:>8} ms  "
+                         f"p99 {resultado['p99_ms']:>8} ms  errores {resultado['errores']}")
+                    resultados.append(resultado)
+        return resultados
+
+def comparar(resultados, anterior):
+    """
+    Diferencia porcentual de throughput y p95 contra una corrida anterior,
+    para los pares (escenario, concurrencia) presentes en ambas
+    """
+    previos = {(r['escenario'], r['concurrencia']): r for r in anterior['resultados']}
+    comparacion = []
+    for resultado in resultados:
+        previo = previos.get((resultado['escenario'], resultado['concurrencia']))
+        if previo is None:
+            continue
+        comparacion.append({
+            'escenario': resultado['escenario'],
+            'concurrencia': resultado['concurrencia'],
+            'requests_por_segundo_pct': round(
+                (resultado['requests_por_segundo'] / previo['requests_por_segundo'] - 1) * 100, 1
+            ),
+            'p95_pct': round((resultado['p95_ms'] / previo['p95_ms'] - 1) * 100, 1)
+        })
+    return comparacion
+
+def _lista(tipo):
+    return lambda valor: [tipo(parte) for parte in valor.split(',') if parte]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modo', choices=('asgi', 'uvicorn'), default='asgi')
+    parser.add_argument('--workers', type=int, default=1, help='Workers de uvicorn (--modo uvicorn)')
+    parser.add_argument('--concurrencia', type=_lista(int), default=[1, 10, 50], help='Niveles, separados por coma')
+    parser.add_argument('--requests', type=int, default=500, help='Peticiones medidas por escenario y nivel')
+    parser.add_argument('--calentamiento', type=int, default=20, help='Peticiones previas sin medir')
+    parser.add_argument('--escenarios', type=_lista(str), default=list(ESCENARIOS))
+    parser.add_argument('--usuarios', type=int, default=1000, help='Usuarios sembrados')
+    parser.add_argument('--reservas-por-usuario', type=int, default=3)
+    parser.add_argument('--tokens', type=int, default=50, help='Usuarios con sesión para los endpoints autenticados')
+    parser.add_argument('--base', default='posada_carga', help='Base descartable (no debe existir)')
+    parser.add_argument('--conservar', action='store_true', help='No borrar la base al terminar')
+    parser.add_argument('--salida', type=Path, help='Archivo JSON (por defecto en benchmarks/resultados/)')
+    parser.add_argument('--comparar', type=Path, help='Resultado anterior contra el cual comparar')
+    args = parser.parse_args()
+
+    desconocidos = set(args.escenarios) - set(ESCENARIOS)
+    if desconocidos:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+
+    from config.database_pool import init_pool, close_pool
+    from config.password_hashing import close_password_hasher
+
+    crear_base(args.base)
+    try:
+        _log(f"Sembrando {args.usuarios} usuarios y {args.usuarios * args.reservas_por_usuario} reservas en {args.base}")
+        init_pool()
+        try:
+            sembrar(args.usuarios, args.reservas_por_usuario)
+        finally:
+            close_pool()
+
+        if args.modo == 'asgi':
+            os.environ['DB_BOOTSTRAP_ON_STARTUP'] = 'false'
+            servidor = ServidorASGI()
+        else:
+            close_password_hasher()
+            servidor = ServidorUvicorn(args.workers)
+        resultados = asyncio.run(correr(servidor, args))
+    finally:
+        if not args.conservar:
+            borrar_base(args.base)
+
+    commit = _commit()
+    salida = {
+        'commit': commit,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': {
+            'modo': args.modo,
+            'workers': args.workers if args.modo == 'uvicorn' else None,
+            'requests': args.requests,
+            'calentamiento': args.calentamiento,
+            'usuarios': args.usuarios,
+            'reservas_por_usuario': args.reservas_por_usuario,
+            'tokens': args.tokens
+        },
+        'resultados': resultados
+    }
+    if args.comparar:
+        anterior = json.loads(args.comparar.read_text(encoding='utf-8'))
+        salida['comparacion'] = {'contra': anterior.get('commit'), 'diferencias': comparar(resultados, anterior)}
+
+    archivo = args.salida or RESULTADOS_DIR / f"carga_{commit}_{datetime.now():%Y%m%d-%H%M%S}.json"
+    archivo.parent.mkdir(parents=True, exist_ok=True)
+    archivo.write_text(json.dumps(salida, indent=2, ensure_ascii=False), encoding='utf-8')
+    _log(f"Resultados guardados en {archivo}")
+
+    print(json.dumps(salida, indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,279 @@
+"""
+Micro-benchmarks de funciones del camino caliente, sin base de datos
+
+Mide con timeit la validación de UserCreate y BookingCreate, la
+serialización de listas de reservas (10, 1.000 y 100.000 filas), validando
+contra BookingResponse y con RowsResponse como /api/reservas, la creación y
+verificación de tokens JWT (create_access_token y get_current_user con el
+usuario en cache), bcrypt con el costo configurado (get_password_hash y
+verify_password) y el cálculo de disponibilidad por noche.
+
+Cada benchmark elige la cantidad de iteraciones para que una repetición dure
+al menos --tiempo-min segundos y se repite --repeticiones veces; se informa
+el mejor tiempo y la mediana por operación.
+
+Uso:
+    python -m benchmarks.micro correr --guardar benchmarks/resultados/micro_base.json
+    python -m benchmarks.micro correr --filtro jwt
+    python -m benchmarks.micro comparar benchmarks/resultados/micro_base.json --umbral 10
+    python -m benchmarks.micro comparar base.json nuevo.json
+
+`comparar` con un solo archivo corre la suite y la compara contra él; con
+dos, compara los archivos. Termina con código 1 si la mediana de algún
+benchmark empeoró más que --umbral por ciento.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+# get_current_user solo necesita un secreto cualquiera para firmar y verificar
+os.environ.setdefault('JWT_SECRET', 'micro-benchmark')
+
+BENCHMARKS = {}
+
+def benchmark(nombre):
+    """
+    Registra una función que prepara los datos y retorna la operación a medir
+    """
+    def registrar(preparar):
+        BENCHMARKS[nombre] = preparar
+        return preparar
+    return registrar
+
+def _sync(coro):
+    """
+    Ejecuta una corrutina que termina sin suspenderse (sin E/S)
+    """
+    try:
+        coro.send(None)
+    except StopIteration as fin:
+        return fin.value
+    coro.close()
+    raise RuntimeError("La corrutina se suspendió: el benchmark requiere E/S")
+
+# Validación de modelos
+
+USUARIO = {
+    'nombre': 'Juana', 'apellido': 'Pérez', 'dni': '30123456', 'cuil_cuit': '27-30123456-4',
+    'email': 'juana.perez@example.com', 'telefono': '11 4567-8901', 'password': 'Secreta123'
+}
+
+@benchmark('validacion.UserCreate')
+def _user_create():
+    from models.user import UserCreate
+    return lambda: UserCreate(**USUARIO)
+
+@benchmark('validacion.BookingCreate')
+def _booking_create():
+    from models.booking import BookingCreate
+    datos = {'fecha_check_in': '2026-03-10', 'fecha_check_out': '2026-03-14', 'cantidad_habitaciones': 2}
+    return lambda: BookingCreate(**datos)
+
+# Serialización de la respuesta de /api/reservas
+
+def _filas_reservas(cantidad):
+    creada = datetime(2026, 1, 5, 12, 30, tzinfo=timezone.utc)
+    filas = []
+    for i in range(cantidad):
+        check_in = date(2026, 1, 1) + timedelta(days=i % 365)
+        filas.append({
+            'id': i + 1, 'usuario_id': 7, 'fecha_check_in': check_in,
+            'fecha_check_out': check_in + timedelta(days=3), 'cantidad_habitaciones': 1 + i % 4,
+            'precio_total': Decimal('300.00'), 'estado': 'Pendiente', 'fecha_creacion': creada
+        })
+    return filas
+
+def _serializacion(cantidad):
+    from pydantic import TypeAdapter
+    from api.server_timing import TimedJSONResponse
+    from models.booking import BookingResponse
+
+    adapter = TypeAdapter(list[BookingResponse])
+    filas = _filas_reservas(cantidad)
+
+    # Como FastAPI con response_model: validar, pasar a tipos JSON y renderizar
+    def serializar():
+        reservas = adapter.validate_python(filas)
+        return TimedJSONResponse(adapter.dump_python(reservas, mode='json')).body
+    return serializar
+
+def _serializacion_filas(cantidad):
+    from api.fast_json import RowsResponse
+    from models.booking import BookingResponse
+
+    filas = _filas_reservas(cantidad)
+    columnas = list(filas[0])
+    tuplas = [tuple(fila.values()) for fila in filas]
+
+    # Camino de /api/reservas: tuplas de la BD serializadas sin validar
+    return lambda: RowsResponse((columnas, tuplas), BookingResponse).body
+
+for _cantidad in (10, 1_000, 100_000):
+    benchmark(f'serializacion.BookingResponse[{_cantidad}]')(lambda cantidad=_cantidad: _serializacion(cantidad))
+    benchmark(f'serializacion.RowsResponse[{_cantidad}]')(lambda cantidad=_cantidad: _serializacion_filas(cantidad))
+
+# JWT
+
+@benchmark('jwt.create_access_token')
+def _create_token():
+    from api.auth import create_access_token
+    return lambda: create_access_token({'sub': '7'}, timedelta(minutes=30))
+
+@benchmark('jwt.get_current_user')
+def _current_user():
+    from api.auth import User, create_access_token, get_current_user, user_cache
+
+    # Usuario en cache: se mide jwt.decode y la validación del payload
+    user_cache.set(7, User(id=7, nombre='Juana', apellido='Pérez', email='juana.perez@example.com', activo=True))
+    token = create_access_token({'sub': '7'}, timedelta(minutes=30))
+    return lambda: _sync(get_current_user(token))
+
+# bcrypt con el costo configurado (BCRYPT_ROUNDS)
+
+@benchmark('bcrypt.get_password_hash')
+def _password_hash():
+    from api.auth import get_password_hash
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(get_password_hash(USUARIO['password']))
+
+@benchmark('bcrypt.verify_password')
+def _verify_password():
+    from api.auth import verify_password
+    from config.password_hashing import get_password_hasher
+    hashed = get_password_hasher().hash_sync(USUARIO['password'])
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(verify_password(USUARIO['password'], hashed))
+
+# Disponibilidad por noche (un año de calendario)
+
+def _noches():
+    inicio = date(2026, 1, 1)
+    return [(inicio + timedelta(days=i), (i * 7) % 5) for i in range(366)]
+
+@benchmark('disponibilidad.por_noche[366]')
+def _disponibilidad():
+    from config.ocupacion import disponibilidad_por_noche
+    noches = _noches()
+    return lambda: disponibilidad_por_noche(noches)
+
+@benchmark('disponibilidad.calendario_rle[366]')
+def _calendario():
+    from api.reservas import encode_rle
+    from config.ocupacion import habitaciones_libres
+    noches = _noches()
+    return lambda: encode_rle(habitaciones_libres(noches))
+
+def medir(operacion, repeticiones, tiempo_min):
+    timer = timeit.Timer(operacion)
+    iteraciones = 1
+    while True:
+        if timer.timeit(iteraciones) >= tiempo_min:
+            break
+        iteraciones *= 2 if iteraciones < 8 else 10
+    tiempos = [total / iteraciones for total in timer.repeat(repeticiones, iteraciones)]
+    return {
+        'iteraciones': iteraciones,
+        'mejor_us': round(min(tiempos) * 1e6, 3),
+        'mediana_us': round(statistics.median(tiempos) * 1e6, 3)
+    }
+
+def correr(filtro=None, repeticiones=5, tiempo_min=0.2):
+    resultados = {}
+    for nombre, preparar in BENCHMARKS.items():
+        if filtro and filtro not in nombre:
+            continue
+        resultados[nombre] = medir(preparar(), repeticiones, tiempo_min)
+        print(f"{nombre:45} {resultados[nombre]['mediana_us']:>14.3f} µs  (x{resultados[nombre]['iteraciones']})",
+              file=sys.stderr, flush=True)
+    return resultados
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocido'
+
+def informe(resultados):
+    from config.password_hashing import get_hasher_config
+    return {
+        'commit': _commit(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'bcrypt_rounds': get_hasher_config()['rounds'],
+        'benchmarks': resultados
+    }
+
+def comparar(base, nuevo, umbral):
+    """
+    Cambio porcentual de la mediana por benchmark presente en ambos.
+    Retorna (filas, regresiones)
+    """
+    filas, regresiones = [], []
+    for nombre, actual in nuevo['benchmarks'].items():
+        anterior = base['benchmarks'].get(nombre)
+        if anterior is None:
+            continue
+        cambio = round((actual['mediana_us'] / anterior['mediana_us'] - 1) * 100, 1)
+        fila = {'nombre': nombre, 'base_us': anterior['mediana_us'], 'actual_us': actual['mediana_us'], 'cambio_pct': cambio}
+        filas.append(fila)
+        if cambio > umbral:
+            regresiones.append(fila)
+    return filas, regresiones
+
+def _leer(path):
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    for nombre in ('correr', 'comparar'):
+        sub = subparsers.add_parser(nombre)
+        if nombre == 'comparar':
+            sub.add_argument('base', help='Resultado de referencia')
+            sub.add_argument('nuevo', nargs='?', help='Resultado a comparar (por defecto corre la suite)')
+            sub.add_argument('--umbral', type=float, default=10.0, help='Regresión máxima tolerada, en porcentaje')
+        sub.add_argument('--filtro', help='Solo los benchmarks cuyo nombre contiene este texto')
+        sub.add_argument('--repeticiones', type=int, default=5)
+        sub.add_argument('--tiempo-min', type=float, default=0.2, help='Segundos mínimos por repetición')
+        sub.add_argument('--guardar', type=Path, help='Archivo JSON donde guardar el resultado')
+    args = parser.parse_args()
+
+    if args.comando == 'comparar' and args.nuevo:
+        resultado = _leer(args.nuevo)
+    else:
+        resultado = informe(correr(args.filtro, args.repeticiones, args.tiempo_min))
+        if args.guardar:
+            args.guardar.parent.mkdir(parents=True, exist_ok=True)
+            args.guardar.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding='utf-8')
+            print(f"Resultado guardado en {args.guardar}", file=sys.stderr)
+
+    if args.comando == 'correr':
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return 0
+
+    base = _leer(args.base)
+    filas, regresiones = comparar(base, resultado, args.umbral)
+    for fila in filas:
+        marca = '  <-- regresión' if fila in regresiones else ''
+        print(f"{fila['nombre']:45} {fila['base_us']:>14.3f} -> {fila['actual_us']:>14.3f} µs  {fila['cambio_pct']:>+7.1f}%{marca}")
+    if regresiones:
+        print(f"{len(regresiones)} benchmark(s) empeoraron más de {args.umbral}% respecto de {base.get('commit')}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
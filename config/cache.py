@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Cache en memoria con tamaño máximo (LRU) y expiración por tiempo (TTL).
+    Seguro para usar desde varios hilos.
+
+    Para llenar una entrada desde la base sin pisar una invalidación
+    concurrente: tomar generation() antes de leer y pasarla a set(), que
+    descarta el valor si hubo una invalidación en el medio.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=1024, ttl=60.0, name='cache'):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+        self._generation = 0
+
+    def generation(self):
+        """Contador de invalidaciones, para set(..., generation=)"""
+        with self._lock:
+            return self._generation
+
+    def get(self, key, default=None):
+        """Retorna el valor vigente para la clave, o default"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None, generation=None):
+        """
+        Guarda un valor, desalojando el menos usado si se supera maxsize.
+        Con generation, no guarda nada si hubo una invalidación desde que se tomó
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                self.stale_sets += 1
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Elimina una clave del cache"""
+        with self._lock:
+            # Aunque la clave no esté: puede estar llenándose con un valor viejo
+            self._generation += 1
+            if self._data.pop(key, self._MISSING) is not self._MISSING:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        """Contadores de aciertos, fallos y desalojos"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'stale_sets': self.stale_sets
+            }
@@ -0,0 +1,31 @@
+from functools import partial
+
+import anyio
+from anyio import to_thread
+from .database_pool import get_pool_config
+
+_limiter = None
+
+def get_db_limiter():
+    """
+    Limitador de hilos para operaciones de base de datos, del tamaño del pool.
+    Las peticiones que exceden el límite esperan en el event loop sin ocupar un hilo
+    """
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(get_pool_config()['maxconn'])
+    return _limiter
+
+def reset_db_limiter():
+    """
+    Descarta el limitador actual (se recrea en el próximo event loop)
+    """
+    global _limiter
+    _limiter = None
+
+async def run_db(func, *args, **kwargs):
+    """
+    Ejecuta una operación bloqueante de psycopg2 en un hilo de trabajo
+    para no detener el event loop mientras espera a PostgreSQL
+    """
+    return await to_thread.run_sync(partial(func, *args, **kwargs), limiter=get_db_limiter())
@@ -0,0 +1,11 @@
+"""
+Bootstrap de la base de datos desde línea de comandos
+
+Uso:
+    python -m config.database_bootstrap
+"""
+import sys
+from .database_connection import bootstrap_database
+
+if __name__ == '__main__':
+    sys.exit(0 if bootstrap_database() else 1)
@@ -1,7 +1,9 @@
 import os
 import sys
 from dotenv import load_dotenv
-from .logging_config import logger
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
 
 logger.info(f"Loading .env from current directory (CWD: {os.getcwd()})")
 load_dotenv()
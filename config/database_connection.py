@@ -1,8 +1,12 @@
 import psycopg2
 from psycopg2 import Error
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from .logging_config import logger, log_database_connection
+from .logging_config import get_logger, log_database_connection
 from .database_config import get_database_config, validate_database_config
+from .database_pool import get_pool_stats
+from .metrics import get_business_snapshot
+
+logger = get_logger(__name__)
 
 def verify_and_create_database(host, user, password, port, database_name):
     """
@@ -57,13 +61,9 @@ def verify_and_create_database(host, user, password, port, database_name):
 def connect_postgresql():
     """
     Establece conexión con base de datos PostgreSQL
-    Verifica y crea la base de datos si no existe
+    No verifica ni crea la base de datos: eso lo hace bootstrap_database() al iniciar
     """
-    config = get_database_config()
-
     try:
-        logger.info("🔗 Iniciando proceso de conexión a PostgreSQL")
-
         config = get_database_config()
         is_valid, validation_message = validate_database_config(config)
 
@@ -71,34 +71,9 @@ def connect_postgresql():
             logger.error(f"❌ Configuración inválida: {validation_message}")
             return None, None
 
-        logger.info(f"📋 Configuración cargada:")
-        logger.info(f"   - Host: {config['host']}")
-        logger.info(f"   - Database: {config['database']}")
-        logger.info(f"   - User: {config['user']}")
-        logger.info(f"   - Port: {config['port']}")
-        logger.info(f"   - Password: {'*' * len(config['password']) if config['password'] else 'NOT SET'}")
-
-        logger.info('Verificando existencia de la base de datos...')
-        if not verify_and_create_database(
-            config['host'],
-            config['user'],
-            config['password'],
-            config['port'],
-            config['database']
-        ):
-            logger.error('No se pudo verificar/crear la base de datos')
-            log_database_connection(False, '- Database verification failed')
-            return None, None
-
-        logger.info(f'Conectando a la base de datos "{config["database"]}"...')
-        connection = psycopg2.connect(**config) 
+        connection = psycopg2.connect(**config)
         cursor = connection.cursor()
 
-        cursor.execute('SELECT version();')
-        version = cursor.fetchone()
-        logger.info("✅ Conexión exitosa a PostgreSQL")
-        logger.info(f"Versión del servidor: {version[0]}")
-
         log_database_connection(True, f'- Connected to "{config["database"]}"')
 
         return connection, cursor
@@ -116,56 +91,6 @@ def connect_postgresql():
 
         return None, None
 
-def verify_active_connection(connection):
-    """
-    Verifica si la conexión a la base de datos está activa
-    """
-    if connection is None:
-        logger.warning('Conexión es None, considerada inactiva')
-        return False
-
-    try:
-        temp_cursor = connection.cursor()
-        temp_cursor.execute('SELECT 1')
-        temp_cursor.close()
-        logger.debug('Verificación de conexión exitosa')
-        return True
-
-    except (Exception, Error) as error:
-        logger.warning(f'Conexión inactiva detectada: {error}')
-        return False
-
-def reconnect_if_needed(connection, cursor):
-    """
-    Reconecta si la conexión se ha perdido
-    """
-    if not verify_active_connection(connection):
-        logger.warning("🔄 Conexión perdida. Intentando reconectar...")
-
-        if cursor:
-            try:
-                cursor.close()
-                logger.debug('Cursor anterior cerrado')
-            except:
-                pass
-        if connection:
-            try:
-                connection.close()
-                logger.debug('Conexión anterior cerrada')
-            except:
-                pass
-
-        new_connection, new_cursor = connect_postgresql()
-        if new_connection and new_cursor:
-            logger.info('✅ Reconexión exitosa')
-            return new_connection, new_cursor
-        else:
-            logger.error("❌ No se pudo reconectar a la base de datos")
-            return None, None
-
-    logger.debug('Conexión activa, no es necesario reconectar')
-    return connection, cursor
-
 def close_connection(connection, cursor):
     """
     Cierra la conexión a la base de datos de forma segura
@@ -187,41 +112,68 @@ def close_connection(connection, cursor):
 
 def get_connection_stats():
     """
-    Función utilitaria para obtener estadísticas de la base de datos
+    Función utilitaria para obtener estadísticas de la base de datos. Usa la
+    última actualización de las métricas de negocio, sin consultar la base
     """
-    conn, cur = connect_postgresql()
-
-    if not conn or not cur:
-        logger.error("No se pudo obtener estadísticas - conexión fallida")
+    stats = get_business_snapshot()
+    if stats is None:
+        logger.warning("⚠️ Las métricas de negocio todavía no fueron calculadas")
         return None
+    stats['pool'] = get_pool_stats()
+    return stats
 
-    try:
-        stats = {}
+def bootstrap_database():
+    """
+    Prepara la base de datos una sola vez por proceso:
+    - Crea la base de datos si no existe
+    - Registra la versión del servidor
+    - Inicializa tablas, habitaciones y precio por defecto
+    """
+    from .database_initialization import initialize_posada_system
 
-        cur.execute("SELECT version()")
-        stats['version'] = cur.fetchone()[0]
+    logger.info("🔗 Iniciando bootstrap de la base de datos")
 
-        cur.execute("SELECT count(*) FROM pg_stat_activity")
-        stats['active_connections'] = cur.fetchone()[0]
+    config = get_database_config()
+    is_valid, validation_message = validate_database_config(config)
+    if not is_valid:
+        logger.error(f"❌ Configuración inválida: {validation_message}")
+        return False
 
-        cur.execute("SELECT pg_size_pretty(pg_database_size(current_database()))")
-        stats['database_size'] = cur.fetchone()[0]
+    logger.info(f"📋 Configuración cargada:")
+    logger.info(f"   - Host: {config['host']}")
+    logger.info(f"   - Database: {config['database']}")
+    logger.info(f"   - User: {config['user']}")
+    logger.info(f"   - Port: {config['port']}")
+
+    if not verify_and_create_database(
+        config['host'],
+        config['user'],
+        config['password'],
+        config['port'],
+        config['database']
+    ):
+        logger.error('No se pudo verificar/crear la base de datos')
+        log_database_connection(False, '- Database verification failed')
+        return False
 
-        cur.execute("SELECT COUNT(*) FROM usuarios WHERE activo = TRUE")
-        stats['usuarios_activos'] = cur.fetchone()[0]
+    connection, cursor = connect_postgresql()
+    if not connection or not cursor:
+        return False
 
-        cur.execute("SELECT COUNT(*) FROM reservas")
-        stats['total_reservas'] = cur.fetchone()[0]
+    try:
+        cursor.execute('SELECT version();')
+        version = cursor.fetchone()
+        logger.info(f"Versión del servidor: {version[0]}")
 
-        cur.execute("SELECT COUNT(*) FROM habitaciones WHERE disponible = TRUE")
-        stats['habitaciones_disponibles'] = cur.fetchone()[0]
+        if not initialize_posada_system(cursor, connection):
+            return False
 
-        logger.info(f"📊 Estadísticas de base de datos obtenidas: {stats}")
-        return stats
+        logger.info("✅ Bootstrap de la base de datos completado")
+        return True
 
-    except Error as error:
-        logger.error(f"❌ Error obteniendo estadísticas: {error}")
-        return None
+    except (Exception, Error) as error:
+        logger.error(f"❌ Error en bootstrap de la base de datos: {error}", exc_info=True)
+        return False
 
     finally:
-        close_connection(conn, cur)
\ No newline at end of file
+        close_connection(connection, cursor)
@@ -0,0 +1,315 @@
+"""
+Conexiones psycopg2 que miden cada consulta
+
+El pool crea sus conexiones con InstrumentedConnection. Cualquier cursor
+que se pida (el de siempre, RealDictCursor o un cursor con nombre) se
+envuelve en una subclase que mide execute, executemany y copy_expert (y
+los fetch de los cursores con nombre, que leen del servidor). Cada medición:
+
+- se suma a la fase db_query de la petición actual (Server-Timing)
+- se agrega a las estadísticas de su huella: la consulta normalizada, sin
+  valores literales ni parámetros
+- si supera SLOW_QUERY_MS, se escribe en el log de consultas lentas, con
+  el plan de EXPLAIN (ANALYZE, BUFFERS) si SLOW_QUERY_EXPLAIN está activo y
+  ENVIRONMENT no es production
+"""
+import functools
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from psycopg2.extensions import connection as _connection, cursor as _cursor
+from .logging_config import get_logger
+from .timing import record_span
+
+slow_logger = get_logger('consultas_lentas')
+
+_FASE = 'db_query'
+
+# Huella que agrupa las consultas nuevas una vez alcanzado QUERY_STATS_MAX
+OTRAS = 'otras'
+
+def get_query_stats_config():
+    return {
+        'slow_ms': float(os.getenv('SLOW_QUERY_MS', '200')),
+        'explain': (os.getenv('SLOW_QUERY_EXPLAIN', 'false').lower() == 'true'
+                    and os.getenv('ENVIRONMENT', 'development').lower() != 'production'),
+        'explain_interval': float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', '60')),
+        'samples': int(os.getenv('QUERY_STATS_SAMPLES', '500')),
+        'max_fingerprints': int(os.getenv('QUERY_STATS_MAX', '500'))
+    }
+
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PARAMS = re.compile(r'%\(\w+\)s|%s')
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+@functools.lru_cache(maxsize=2048)
+def normalize_query(query):
+    """
+    Consulta sin comentarios, con literales y parámetros reemplazados por ?
+    y los espacios colapsados
+    """
+    query = _COMMENTS.sub(' ', query)
+    query = _STRINGS.sub('?', query)
+    query = _PARAMS.sub('?', query)
+    query = _NUMBERS.sub('?', query)
+    query = _LISTS.sub('(...)', query)
+    return _SPACES.sub(' ', query).strip().rstrip(';').strip()
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+def _percentile(ordenadas, fraccion):
+    return ordenadas[min(len(ordenadas) - 1, int(fraccion * len(ordenadas)))]
+
+class QueryStats:
+    """
+    Cantidad, tiempos y filas por huella de consulta. p50 y p95 se calculan
+    sobre las últimas `samples` ejecuciones de cada huella
+    """
+
+    def __init__(self, samples=500, max_fingerprints=500):
+        self.samples = samples
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.since = time.time()
+
+    def record(self, normalized, seconds, rows, error=False, slow=False):
+        huella = fingerprint(normalized)
+        with self._lock:
+            entry = self._entries.get(huella)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    huella, normalized = OTRAS, OTRAS
+                    entry = self._entries.get(OTRAS)
+                if entry is None:
+                    entry = self._entries[huella] = {
+                        'consulta': normalized,
+                        'cantidad': 0,
+                        'errores': 0,
+                        'lentas': 0,
+                        'total_s': 0.0,
+                        'max_s': 0.0,
+                        'filas': 0,
+                        'muestras': deque(maxlen=self.samples),
+                        'plan': None
+                    }
+            entry['cantidad'] += 1
+            entry['errores'] += error
+            entry['lentas'] += slow
+            entry['total_s'] += seconds
+            entry['max_s'] = max(entry['max_s'], seconds)
+            if rows is not None and rows > 0:
+                entry['filas'] += rows
+            entry['muestras'].append(seconds)
+        return huella
+
+    def set_plan(self, huella, plan):
+        with self._lock:
+            if huella in self._entries:
+                self._entries[huella]['plan'] = plan
+
+    def snapshot(self):
+        """
+        Estadísticas por huella, con tiempos en milisegundos
+        """
+        with self._lock:
+            entries = [(huella, dict(entry, muestras=sorted(entry['muestras']))) for huella, entry in self._entries.items()]
+
+        resultado = []
+        for huella, entry in entries:
+            muestras = entry['muestras']
+            resultado.append({
+                'huella': huella,
+                'consulta': entry['consulta'],
+                'cantidad': entry['cantidad'],
+                'errores': entry['errores'],
+                'lentas': entry['lentas'],
+                'total_ms': round(entry['total_s'] * 1000, 3),
+                'promedio_ms': round(entry['total_s'] * 1000 / entry['cantidad'], 3),
+                'p50_ms': round(_percentile(muestras, 0.50) * 1000, 3),
+                'p95_ms': round(_percentile(muestras, 0.95) * 1000, 3),
+                'max_ms': round(entry['max_s'] * 1000, 3),
+                'filas': entry['filas'],
+                'plan': entry['plan']
+            })
+        return resultado
+
+    def totals(self):
+        """
+        Consultas, errores, lentas y segundos sumados de todas las huellas
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            'cantidad': sum(entry['cantidad'] for entry in entries),
+            'errores': sum(entry['errores'] for entry in entries),
+            'lentas': sum(entry['lentas'] for entry in entries),
+            'total_s': sum(entry['total_s'] for entry in entries)
+        }
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self.since = time.time()
+
+_config = get_query_stats_config()
+query_stats = QueryStats(_config['samples'], _config['max_fingerprints'])
+
+def configure_query_stats(config=None):
+    """
+    Vuelve a leer la configuración (umbral, EXPLAIN) desde el entorno
+    """
+    global _config
+    _config = config or get_query_stats_config()
+    query_stats.samples = _config['samples']
+    query_stats.max_fingerprints = _config['max_fingerprints']
+
+def get_query_stats():
+    return {
+        'desde': query_stats.since,
+        'umbral_lenta_ms': _config['slow_ms'],
+        'explain': _config['explain'],
+        'consultas': query_stats.snapshot()
+    }
+
+_explain_lock = threading.Lock()
+_explained_at = {}
+
+def _should_explain(cursor, normalized, huella):
+    if not _config['explain'] or cursor.name is not None:
+        return False
+    # Solo lecturas: EXPLAIN ANALYZE ejecuta la sentencia otra vez
+    if not normalized[:6].upper() == 'SELECT':
+        return False
+    now = time.monotonic()
+    with _explain_lock:
+        if now - _explained_at.get(huella, -_config['explain_interval']) < _config['explain_interval']:
+            return False
+        _explained_at[huella] = now
+    return True
+
+def _explain(cursor, query, vars):
+    """
+    Plan de la consulta en la misma conexión y transacción. Un savepoint
+    evita que un error del EXPLAIN aborte la transacción en curso
+    """
+    connection = cursor.connection
+    savepoint = not connection.autocommit
+    try:
+        # Cursor sin instrumentar: el EXPLAIN no cuenta como consulta de la aplicación
+        with _connection.cursor(connection, cursor_factory=_cursor) as explain_cursor:
+            if savepoint:
+                explain_cursor.execute('SAVEPOINT posada_explain')
+            try:
+                explain_cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + query, vars)
+                plan = '\n'.join(row[0] for row in explain_cursor.fetchall())
+            except Exception as error:
+                if savepoint:
+                    explain_cursor.execute('ROLLBACK TO SAVEPOINT posada_explain')
+                return f"No se pudo obtener el plan: {error}"
+            if savepoint:
+                explain_cursor.execute('RELEASE SAVEPOINT posada_explain')
+            return plan
+    except Exception as error:
+        return f"No se pudo obtener el plan: {error}"
+
+def _query_text(cursor, query):
+    if isinstance(query, bytes):
+        return query.decode('utf-8', 'replace')
+    if not isinstance(query, str):
+        # psycopg2.sql.Composed y similares
+        return query.as_string(cursor)
+    return query
+
+def _observe(cursor, query, vars, seconds, rows, error=False, prefijo=''):
+    record_span(_FASE, seconds)
+    normalized = prefijo + normalize_query(_query_text(cursor, query))
+    slow = not error and seconds * 1000 >= _config['slow_ms']
+    huella = query_stats.record(normalized, seconds, rows, error, slow)
+    if not slow:
+        return
+
+    plan = None
+    if _should_explain(cursor, normalized, huella):
+        plan = _explain(cursor, _query_text(cursor, query), vars)
+        query_stats.set_plan(huella, plan)
+    slow_logger.warning(
+        "🐢 Consulta lenta %.1f ms, %s filas [%s]: %s%s",
+        seconds * 1000, rows if rows is not None and rows >= 0 else '?', huella, normalized,
+        f"\n{plan}" if plan else ''
+    )
+
+class InstrumentedCursorMixin:
+
+    def _measure(self, query, vars, call, prefijo=''):
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception:
+            _observe(self, query, vars, time.perf_counter() - start, None, error=True, prefijo=prefijo)
+            raise
+        _observe(self, query, vars, time.perf_counter() - start, self.rowcount, prefijo=prefijo)
+        return result
+
+    def execute(self, query, vars=None):
+        self._instrumented_query = query
+        return self._measure(query, vars, lambda: super(InstrumentedCursorMixin, self).execute(query, vars))
+
+    def executemany(self, query, vars_list):
+        return self._measure(query, None, lambda: super(InstrumentedCursorMixin, self).executemany(query, vars_list))
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._measure(sql, None, lambda: super(InstrumentedCursorMixin, self).copy_expert(sql, file, size))
+
+    def _measure_fetch(self, call):
+        # Solo los cursores con nombre leen del servidor al hacer fetch
+        if self.name is None:
+            return call()
+        start = time.perf_counter()
+        rows = call()
+        _observe(self, self._instrumented_query, None, time.perf_counter() - start,
+                 len(rows) if isinstance(rows, list) else int(rows is not None), prefijo='FETCH ')
+        return rows
+
+    def fetchone(self):
+        return self._measure_fetch(lambda: super(InstrumentedCursorMixin, self).fetchone())
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._measure_fetch(lambda: super(InstrumentedCursorMixin, self).fetchmany())
+        return self._measure_fetch(lambda: super(InstrumentedCursorMixin, self).fetchmany(size))
+
+    def fetchall(self):
+        return self._measure_fetch(lambda: super(InstrumentedCursorMixin, self).fetchall())
+
+_instrumented = {}
+
+def instrumented_cursor_class(cursor_class):
+    """
+    Subclase instrumentada de una clase de cursor (creada una vez por clase)
+    """
+    instrumented = _instrumented.get(cursor_class)
+    if instrumented is None:
+        if issubclass(cursor_class, InstrumentedCursorMixin):
+            return cursor_class
+        instrumented = type(f'Instrumented{cursor_class.__name__}', (InstrumentedCursorMixin, cursor_class), {})
+        _instrumented[cursor_class] = instrumented
+    return instrumented
+
+class InstrumentedConnection(_connection):
+    """
+    Conexión cuyos cursores miden las consultas
+    """
+
+    def cursor(self, *args, **kwargs):
+        cursor_factory = kwargs.get('cursor_factory') or self.cursor_factory or _cursor
+        kwargs['cursor_factory'] = instrumented_cursor_class(cursor_factory)
+        return super().cursor(*args, **kwargs)
@@ -1,41 +1,47 @@
-from psycopg2 import Error
-from .logging_config import logger
-
-def execute_query(cursor, query, params=None):
+import random
+import threading
+import time
+from psycopg2 import Error, errors
+from psycopg2.extras import RealDictCursor
+from .logging_config import get_logger
+from .database_pool import get_db_connection, PoolTimeoutError
+from .schema_metadata import build_insert
+from .versiones import bump_version, bump_versions
+from .ocupacion import (
+    ESTADOS_ACTIVOS, MAX_HABITACIONES, SinDisponibilidadError,
+    aplicar_ocupacion, get_ocupacion_maxima, get_ocupacion_por_noche,
+    disponibilidad_por_noche, habitaciones_libres
+)
+
+logger = get_logger(__name__)
+
+def fetch_rows(query, params=None):
     """
-    Ejecuta una consulta SELECT y retorna los resultados
+    Ejecuta una consulta con un cursor de tuplas y retorna (columnas, filas),
+    para listados que se serializan sin construir diccionarios por fila
     """
-    try:
-        logger.debug(f'Ejecutando consulta: {query}')
-        if params:
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
             cursor.execute(query, params)
-            logger.debug(f'Parámetros de consulta: {params}')
-        else:
-            cursor.execute(query)
+            return [columna.name for columna in cursor.description], cursor.fetchall()
 
-        results = cursor.fetchall()
-        logger.info(f"✅ Consulta ejecutada exitosamente. Resultados: {len(results)} filas")
-        return results
+USUARIO_INSERT_COLUMNS = ('nombre', 'apellido', 'dni', 'email', 'telefono')
 
-    except Error as error:
-        logger.error(f"❌ Error ejecutando consulta: {error}", exc_info=True)
-        logger.error(f"Consulta fallida: {query}")
-        return None
+RESERVA_INSERT_COLUMNS = (
+    'usuario_id', 'fecha_check_in', 'fecha_check_out',
+    'cantidad_habitaciones', 'precio_total', 'observaciones'
+)
 
 def insert_data(cursor, connection, table, data, columns=None):
     """
     Inserta datos en una tabla y retorna el ID del registro creado
     """
     try:
-        if columns:
-            placeholders = ', '.join(['%s'] * len(data))
-            columns_str = ', '.join(columns)
-            query = f'INSERT INTO {table} ({columns_str}) VALUES ({placeholders}) RETURNING id'
-        else:
-            query = f'INSERT INTO {table} (nombre, apellido, dni, email, telefono) VALUES (%s, %s, %s, %s, %s) RETURNING id'
+        columns = columns or USUARIO_INSERT_COLUMNS
+        query, positions = build_insert(table, columns)
 
-        logger.debug(f'Ejecutando inserción en tabla "{table}": {query}')
-        cursor.execute(query, data)
+        logger.debug('Ejecutando inserción en tabla "%s": %s', table, query)
+        cursor.execute(query, [data[index] for index in positions])
         
         result = cursor.fetchone()
         if isinstance(result, dict):
@@ -59,16 +65,15 @@ def insert_data(cursor, connection, table, data, columns=None):
 def insert_usuario(user_data):
     """Inserta un nuevo usuario usando el objeto UserCreate"""
     try:
-        from .database_connection import connect_postgresql, close_connection
-
-        logger.info(f"🔍 DIAGNOSTIC - insert_usuario called with user_data type: {type(user_data)}")
-        connection, cursor = connect_postgresql()
-        logger.info(f"🔍 DIAGNOSTIC - Database connection result: connection={connection is not None}, cursor={cursor is not None}")
-        
-        if not connection or not cursor:
-            logger.error("🔍 DIAGNOSTIC - Database connection FAILED - returning error dict")
-            return {"error": "Database connection failed", "type": "connection_error"}
-
+        with get_db_connection() as connection:
+            return _insert_usuario(connection, user_data)
+    except PoolTimeoutError:
+        logger.error("❌ Sin conexión disponible para crear el usuario")
+        return {"error": "Database connection failed", "type": "connection_error"}
+
+def _insert_usuario(connection, user_data):
+    cursor = connection.cursor()
+    try:
         cursor.execute("""
             INSERT INTO usuarios (nombre, apellido, dni, cuil_cuit, email, telefono, password, activo)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
@@ -88,20 +93,17 @@ def insert_usuario(user_data):
         if result is None:
             raise ValueError("No se pudo obtener el ID del usuario insertado")
         user_id = result[0]
+        bump_version(cursor, 'usuarios')
         connection.commit()
         logger.info(f"Usuario creado con ID: {user_id}")
-        logger.info(f"🔍 DIAGNOSTIC - User successfully inserted with ID: {user_id}")
         return user_id
 
     except Exception as error:
-        logger.error(f"🔍 DIAGNOSTIC - Exception caught in insert_usuario: type={type(error).__name__}, message={str(error)}")
         logger.error(f"Error insertando usuario: {error}")
-        if 'connection' in locals() and connection:
-            connection.rollback()
+        connection.rollback()
 
         error_str = str(error)
         if 'UniqueViolation' in str(type(error)) or ('psycopg2' in str(type(error)) and 'IntegrityError' in error_str):
-            logger.error("DEBUG: Unique constraint violation detected")
             if 'email' in error_str.lower():
                 return {"error": "El email ya está registrado", "type": "duplicate_email"}
             elif 'dni' in error_str.lower():
@@ -117,8 +119,7 @@ def insert_usuario(user_data):
         else:
             return {"error": "Error interno del servidor", "type": "internal_error", "details": error_str}
     finally:
-        if 'connection' in locals() and 'cursor' in locals():
-            close_connection(connection, cursor)
+        cursor.close()
 
 def insert_reserva(cursor, connection, usuario_id, fecha_check_in, fecha_check_out,
                   cantidad_habitaciones, precio_total, observaciones=""):
@@ -126,47 +127,29 @@ def insert_reserva(cursor, connection, usuario_id, fecha_check_in, fecha_check_o
     Inserta una nueva reserva - VERSIÓN CORREGIDA
     """
     try:
-        cursor.execute("SELECT COUNT(*) FROM information_schema.columns WHERE table_name = 'reservas' AND column_name = 'observaciones'")
-        result = cursor.fetchone()
-        
-        # Handle both RealDictCursor (dict) and standard cursor (tuple)
-        if isinstance(result, dict):
-            observaciones_exists = result['count'] > 0
-        else:
-            observaciones_exists = result[0] > 0
-
-        logger.debug(f"📋 Verificación de columna 'observaciones' en tabla 'reservas': {'EXISTS' if observaciones_exists else 'NOT EXISTS'}")
-
-        if observaciones_exists:
-            cursor.execute("""
-                INSERT INTO reservas (usuario_id, fecha_check_in, fecha_check_out,
-                                    cantidad_habitaciones, precio_total, observaciones)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones,
-                  precio_total, observaciones))
-            logger.debug("✅ INSERT con columna 'observaciones' ejecutado")
-        else:
-            cursor.execute("""
-                INSERT INTO reservas (usuario_id, fecha_check_in, fecha_check_out,
-                                    cantidad_habitaciones, precio_total)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING id
-            """, (usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones,
-                  precio_total))
-            logger.warning("⚠️ INSERT sin columna 'observaciones' - columna no existe en tabla")
+        # Columnas según los metadatos cargados al iniciar, sin consultar el catálogo
+        query, positions = build_insert('reservas', RESERVA_INSERT_COLUMNS)
+        values = (usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones,
+                  precio_total, observaciones)
+        cursor.execute(query, [values[index] for index in positions])
 
         reserva_id_row = cursor.fetchone()
         if isinstance(reserva_id_row, dict):
             reserva_id = reserva_id_row['id']
         else:
             reserva_id = reserva_id_row[0]
-            
+
+        # Las reservas nuevas quedan 'pendiente', que ocupa habitaciones
+        aplicar_ocupacion(cursor, fecha_check_in, fecha_check_out, cantidad_habitaciones)
+        bump_versions(cursor, 'reservas', ('reservas', usuario_id))
         connection.commit()
 
         logger.info(f"✅ Reserva creada con ID: {reserva_id}")
         return reserva_id
 
+    except (SinDisponibilidadError, errors.DeadlockDetected, errors.SerializationFailure):
+        connection.rollback()
+        raise
     except Exception as error:
         connection.rollback()
         logger.error(f"❌ Error insertando reserva: {error}")
@@ -174,15 +157,26 @@ def insert_reserva(cursor, connection, usuario_id, fecha_check_in, fecha_check_o
 
 def delete_reserva(cursor, connection, reserva_id, usuario_id):
     """
-    Elimina una reserva de la base de datos
+    Elimina una reserva de la base de datos y libera sus noches
     """
     try:
-        # Verificar que la reserva pertenezca al usuario
-        cursor.execute("SELECT id FROM reservas WHERE id = %s AND usuario_id = %s", (reserva_id, usuario_id))
-        if not cursor.fetchone():
+        # Verificar que la reserva pertenezca al usuario (y bloquearla hasta el commit)
+        cursor.execute("""
+            SELECT fecha_check_in, fecha_check_out, cantidad_habitaciones, estado
+            FROM reservas WHERE id = %s AND usuario_id = %s
+            FOR UPDATE
+        """, (reserva_id, usuario_id))
+        reserva = cursor.fetchone()
+        if not reserva:
             return False
+        fecha_check_in, fecha_check_out, cantidad_habitaciones, estado = (
+            reserva.values() if isinstance(reserva, dict) else reserva
+        )
 
         cursor.execute("DELETE FROM reservas WHERE id = %s", (reserva_id,))
+        if estado in ESTADOS_ACTIVOS:
+            aplicar_ocupacion(cursor, fecha_check_in, fecha_check_out, -cantidad_habitaciones)
+        bump_versions(cursor, 'reservas', ('reservas', usuario_id))
         connection.commit()
         logger.info(f"✅ Reserva {reserva_id} eliminada por usuario {usuario_id}")
         return True
@@ -191,6 +185,231 @@ def delete_reserva(cursor, connection, reserva_id, usuario_id):
         logger.error(f"❌ Error eliminando reserva {reserva_id}: {error}")
         return False
 
+def update_estado_reserva(cursor, connection, reserva_id, nuevo_estado):
+    """
+    Cambia el estado de una reserva ajustando la ocupación diaria.
+    Todo cambio de estado debe pasar por aquí para mantener ocupacion_diaria
+    """
+    try:
+        cursor.execute("""
+            SELECT usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones, estado
+            FROM reservas WHERE id = %s
+            FOR UPDATE
+        """, (reserva_id,))
+        reserva = cursor.fetchone()
+        if not reserva:
+            return False
+        usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones, estado = (
+            reserva.values() if isinstance(reserva, dict) else reserva
+        )
+
+        cursor.execute("UPDATE reservas SET estado = %s WHERE id = %s", (nuevo_estado, reserva_id))
+
+        ocupaba = estado in ESTADOS_ACTIVOS
+        ocupa = nuevo_estado in ESTADOS_ACTIVOS
+        if ocupaba != ocupa:
+            delta = cantidad_habitaciones if ocupa else -cantidad_habitaciones
+            aplicar_ocupacion(cursor, fecha_check_in, fecha_check_out, delta)
+
+        bump_versions(cursor, 'reservas', ('reservas', usuario_id))
+        connection.commit()
+        logger.info(f"✅ Reserva {reserva_id}: estado {estado} -> {nuevo_estado}")
+        return True
+    except Exception as error:
+        connection.rollback()
+        logger.error(f"❌ Error cambiando estado de reserva {reserva_id}: {error}")
+        return False
+
+RESERVA_SELECT = """
+    SELECT r.id, r.usuario_id, r.fecha_check_in, r.fecha_check_out,
+            r.cantidad_habitaciones, u.email AS contacto,
+            INITCAP(r.estado) as estado, r.precio_total, r.fecha_creacion
+    FROM reservas r
+    JOIN usuarios u ON r.usuario_id = u.id
+"""
+
+RESERVA_MAX_REINTENTOS = 3
+
+_reserva_stats_lock = threading.Lock()
+_reserva_stats = {
+    'creadas': 0,
+    'rechazadas_sin_disponibilidad': 0,
+    'conflictos': 0,
+    'reintentos': 0
+}
+
+def _count_reserva(evento):
+    with _reserva_stats_lock:
+        _reserva_stats[evento] += 1
+
+def get_reserva_stats():
+    """
+    Contadores de reservas creadas, rechazadas por capacidad y conflictos de concurrencia
+    """
+    with _reserva_stats_lock:
+        return dict(_reserva_stats)
+
+def get_reservas_by_usuario(usuario_id):
+    """
+    Obtiene las reservas de un usuario como (columnas, filas)
+    """
+    return fetch_rows(RESERVA_SELECT + " WHERE r.usuario_id = %s", (usuario_id,))
+
+def get_reservas_pendientes():
+    """
+    Obtiene todas las reservas pendientes como (columnas, filas)
+    """
+    return fetch_rows(RESERVA_SELECT + " WHERE r.estado = 'pendiente'")
+
+def buscar_reservas(desde=None, hasta=None, estado=None, usuario_id=None, despues=None, limite=50):
+    """
+    Página de reservas ordenadas por (fecha_check_in, id), filtradas por
+    check-in dentro de [desde, hasta], estado y usuario. `despues` es la clave
+    (fecha_check_in, id) de la última fila de la página anterior: cada página
+    es un recorrido de rango sobre los índices (…, fecha_check_in, id)
+    """
+    condiciones = []
+    params = []
+    if desde is not None:
+        condiciones.append("r.fecha_check_in >= %s")
+        params.append(desde)
+    if hasta is not None:
+        condiciones.append("r.fecha_check_in <= %s")
+        params.append(hasta)
+    if estado is not None:
+        condiciones.append("r.estado = %s")
+        params.append(estado)
+    if usuario_id is not None:
+        condiciones.append("r.usuario_id = %s")
+        params.append(usuario_id)
+    if despues is not None:
+        condiciones.append("(r.fecha_check_in, r.id) > (%s, %s)")
+        params.extend(despues)
+
+    query = RESERVA_SELECT
+    if condiciones:
+        query += " WHERE " + " AND ".join(condiciones)
+    query += " ORDER BY r.fecha_check_in, r.id LIMIT %s"
+    params.append(limite)
+
+    with get_db_connection() as connection:
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+def buscar_usuarios(activo=None, despues=None, limite=50):
+    """
+    Página de usuarios ordenados por id, opcionalmente filtrados por estado.
+    `despues` es el id de la última fila de la página anterior
+    """
+    condiciones = []
+    params = []
+    if activo is not None:
+        condiciones.append("activo = %s")
+        params.append(activo)
+    if despues is not None:
+        condiciones.append("id > %s")
+        params.append(despues)
+
+    query = "SELECT id, nombre, apellido, email, activo, fecha_registro FROM usuarios"
+    if condiciones:
+        query += " WHERE " + " AND ".join(condiciones)
+    query += " ORDER BY id LIMIT %s"
+    params.append(limite)
+
+    with get_db_connection() as connection:
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+def get_disponibilidad_por_noche(start_date, end_date):
+    """
+    Habitaciones ocupadas y libres por noche entre start_date y end_date (inclusive)
+    """
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            noches = get_ocupacion_por_noche(cursor, start_date, end_date)
+    return disponibilidad_por_noche(noches)
+
+def get_habitaciones_libres(start_date, end_date):
+    """
+    Habitaciones libres por noche entre start_date y end_date (inclusive),
+    un byte por noche
+    """
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            noches = get_ocupacion_por_noche(cursor, start_date, end_date)
+    return habitaciones_libres(noches)
+
+def calcular_precio_total(fecha_check_in, fecha_check_out, cantidad_habitaciones):
+    dias = (fecha_check_out - fecha_check_in).days
+    return dias * cantidad_habitaciones * 100.0
+
+def create_reserva(usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones):
+    """
+    Verifica disponibilidad, inserta la reserva y la retorna completa.
+    Retorna un dict con 'error' y 'type' si no se pudo crear.
+
+    La verificación final de capacidad la hace la restricción de ocupacion_diaria
+    dentro de la transacción del INSERT, así que reservas concurrentes sobre las
+    mismas noches nunca superan MAX_HABITACIONES. Los deadlocks se reintentan
+    hasta RESERVA_MAX_REINTENTOS veces
+    """
+    for intento in range(1, RESERVA_MAX_REINTENTOS + 1):
+        try:
+            return _create_reserva(usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones)
+        except SinDisponibilidadError as error:
+            _count_reserva('rechazadas_sin_disponibilidad')
+            return {"error": str(error), "type": "sin_disponibilidad"}
+        except (errors.DeadlockDetected, errors.SerializationFailure) as error:
+            _count_reserva('conflictos')
+            if intento == RESERVA_MAX_REINTENTOS:
+                logger.error(f"❌ Conflicto de concurrencia creando reserva tras {intento} intentos: {error}")
+                return {"error": "Error al crear reserva", "type": "internal_error"}
+            _count_reserva('reintentos')
+            logger.warning(f"🔁 Conflicto de concurrencia creando reserva, reintento {intento}")
+            time.sleep(random.uniform(0.005, 0.02) * intento)
+
+def _create_reserva(usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones):
+    with get_db_connection() as connection:
+        cursor = connection.cursor(cursor_factory=RealDictCursor)
+        try:
+            # Rechazo rápido sin bloquear; la restricción de capacidad es la que garantiza
+            ocupadas = get_ocupacion_maxima(cursor, fecha_check_in, fecha_check_out)
+            if ocupadas + cantidad_habitaciones > MAX_HABITACIONES:
+                raise SinDisponibilidadError("No hay suficientes habitaciones disponibles en esas fechas")
+
+            cursor.execute("SELECT email FROM usuarios WHERE id = %s", (usuario_id,))
+            user = cursor.fetchone()
+            logger.debug("Usuario %s encontrado: %s", usuario_id, user)
+            if not user:
+                logger.error(f"User with ID {usuario_id} not found in database")
+                return {"error": "Usuario no encontrado", "type": "usuario_no_encontrado"}
+
+            precio_total = calcular_precio_total(fecha_check_in, fecha_check_out, cantidad_habitaciones)
+            observaciones = f"Contacto: {user['email']}"
+
+            reserva_id = insert_reserva(
+                cursor, connection, usuario_id, fecha_check_in,
+                fecha_check_out, cantidad_habitaciones, precio_total, observaciones
+            )
+            if not reserva_id:
+                return {"error": "Error al crear reserva", "type": "internal_error"}
+            _count_reserva('creadas')
+
+            cursor.execute(RESERVA_SELECT + " WHERE r.id = %s", (reserva_id,))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+def delete_reserva_usuario(reserva_id, usuario_id):
+    """
+    Elimina una reserva del usuario usando una conexión del pool
+    """
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            return delete_reserva(cursor, connection, reserva_id, usuario_id)
+
 def insert_pago(cursor, connection, reserva_id, tipo_pago, monto, metodo_pago, comprobante=""):
     """
     Inserta un nuevo pago para una reserva
@@ -207,93 +426,130 @@ def insert_pago(cursor, connection, reserva_id, tipo_pago, monto, metodo_pago, c
 def get_user_by_id(user_id):
     """Obtiene un usuario por ID"""
     try:
-        from .database_connection import connect_postgresql, close_connection
-        
-        connection, cursor = connect_postgresql()
-        if not connection or not cursor:
-            logger.error("No se pudo conectar a la base de datos")
-            return None
-        
-        cursor.execute("""
-            SELECT id, nombre, apellido, email, activo
-            FROM usuarios
-            WHERE id = %s AND activo = true
-        """, (user_id,))
-        
-        user = cursor.fetchone()
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, nombre, apellido, email, activo, es_admin
+                    FROM usuarios
+                    WHERE id = %s AND activo = true
+                """, (user_id,))
+
+                user = cursor.fetchone()
         if not user:
             return None
         
-        user_id, nombre, apellido, email, activo = user
+        user_id, nombre, apellido, email, activo, es_admin = user
         user_data = {
             'id': user_id,
             'nombre': nombre,
             'apellido': apellido,
             'email': email,
-            'activo': activo
+            'activo': activo,
+            'es_admin': es_admin
         }
         return user_data
             
+    except PoolTimeoutError:
+        raise
     except Exception as error:
         logger.error(f"Error obteniendo usuario por ID: {error}")
         return None
-    finally:
-        if 'connection' in locals() and 'cursor' in locals():
-            close_connection(connection, cursor)
     
-def authenticate_user(identifier, password):
-    """Autentica un usuario por email o DNI y contraseña"""
-    try:
-        from .database_connection import connect_postgresql, close_connection
-        import bcrypt
-        
-        connection, cursor = connect_postgresql()
-        if not connection or not cursor:
-            logger.error("No se pudo conectar a la base de datos")
-            return None
-        
-        # Buscar por email o DNI
-        cursor.execute("""
-            SELECT id, nombre, apellido, dni, email, activo, password
-            FROM usuarios
-            WHERE (LOWER(email) = LOWER(%s) OR dni = %s) AND activo = true
-        """, (identifier, identifier))
+def get_usuarios_activos():
+    """
+    Lista los usuarios activos ordenados por ID, como (columnas, filas)
+    """
+    return fetch_rows("""
+        SELECT id, nombre, apellido, email
+        FROM usuarios
+        WHERE activo = true
+        ORDER BY id
+    """)
+
+def desactivar_usuario(user_id):
+    """
+    Desactiva un usuario sin reservas activas.
+    Retorna el usuario desactivado, o un dict con 'error' y 'type' si no se pudo
+    """
+    with get_db_connection() as connection:
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("SELECT id, nombre, apellido FROM usuarios WHERE id = %s AND activo = true", (user_id,))
+            user = cursor.fetchone()
+            if not user:
+                return {"error": "Usuario no encontrado", "type": "not_found"}
 
-        user = cursor.fetchone()
+            cursor.execute("""
+                SELECT COUNT(*) FROM reservas
+                WHERE usuario_id = %s AND estado IN %s
+            """, (user_id, ESTADOS_ACTIVOS))
+            result = cursor.fetchone()
+            active_reservations = result['count'] if result else 0
+            logger.debug("Reservas activas del usuario %s: %s", user_id, active_reservations)
+            if active_reservations > 0:
+                return {"error": "No se puede eliminar un usuario con reservas activas", "type": "reservas_activas"}
+
+            cursor.execute("UPDATE usuarios SET activo = false WHERE id = %s", (user_id,))
+            bump_versions(cursor, 'usuarios', ('usuario', user_id))
+            connection.commit()
+            return dict(user)
+
+def update_usuario(user_id, nombre, apellido, email):
+    """
+    Actualiza nombre, apellido y email de un usuario activo.
+    Retorna True, o un dict con 'error' y 'type' si no se pudo
+    """
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM usuarios WHERE id = %s AND activo = true", (user_id,))
+            if not cursor.fetchone():
+                return {"error": "Usuario no encontrado", "type": "not_found"}
+
+            cursor.execute("SELECT id FROM usuarios WHERE email = %s AND activo = true AND id != %s", (email, user_id))
+            if cursor.fetchone():
+                return {"error": "El email ya está en uso por otro usuario", "type": "duplicate_email"}
+
+            cursor.execute("""
+                UPDATE usuarios
+                SET nombre = %s, apellido = %s, email = %s
+                WHERE id = %s
+            """, (nombre, apellido, email, user_id))
+            # El email del usuario aparece como contacto en sus reservas
+            bump_versions(cursor, 'usuarios', ('usuario', user_id))
+            connection.commit()
+            return True
+
+def get_user_credentials(identifier):
+    """
+    Busca un usuario activo por email o DNI e incluye el hash de su contraseña.
+    La verificación de la contraseña la hace api.auth.authenticate_user
+    """
+    try:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                # Buscar por email o DNI
+                cursor.execute("""
+                    SELECT id, nombre, apellido, dni, email, activo, password
+                    FROM usuarios
+                    WHERE (LOWER(email) = LOWER(%s) OR dni = %s) AND activo = true
+                """, (identifier, identifier))
+
+                user = cursor.fetchone()
         if not user:
-            logger.warning(f"Intento de login fallido: Usuario {identifier} no encontrado")
             return None
 
         user_id, nombre, apellido, dni, email_db, activo, hashed_password = user
-
-        try:
-            password_bytes = password.encode('utf-8')
-            hashed_password_bytes = hashed_password.encode('utf-8')
-
-            password_match = bcrypt.checkpw(password_bytes, hashed_password_bytes)
-
-            if not password_match:
-                logger.warning(f"Intento de login fallido: contraseña incorrecta para {identifier}")
-                return None
-
-        except Exception as e:
-            logger.error(f"Error verificando contraseña: {e}")
-            return None
-        
-        user_data = {
+        return {
             'id': user_id,
             'nombre': nombre,
             'apellido': apellido,
             'dni': dni,
             'email': email_db,
-            'activo': activo
+            'activo': activo,
+            'password': hashed_password
         }
-        logger.info(f"Usuario autenticado exitosamente: {identifier}")
-        return user_data
-            
+
+    except PoolTimeoutError:
+        raise
     except Exception as error:
-        logger.error(f"Error autenticando usuario: {error}")
-        return None
-    finally:
-        if 'connection' in locals() and 'cursor' in locals():
-            close_connection(connection, cursor)
\ No newline at end of file
+        logger.error(f"Error obteniendo credenciales de usuario: {error}")
+        return None
\ No newline at end of file
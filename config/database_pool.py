@@ -0,0 +1,262 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import Error, pool as pg_pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from .logging_config import get_logger
+from .database_config import get_database_config, validate_database_config
+from .database_instrumentation import InstrumentedConnection
+from .timing import record_span
+
+logger = get_logger(__name__)
+
+class PoolTimeoutError(Exception):
+    """No se obtuvo una conexión del pool dentro del tiempo de espera"""
+
+def get_pool_config():
+    """
+    Configuración del pool de conexiones usando variables de entorno
+    """
+    return {
+        'minconn': int(os.getenv('DB_POOL_MIN', '1')),
+        'maxconn': int(os.getenv('DB_POOL_MAX', '10')),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '5')),
+        'recycle': float(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'ping_after': float(os.getenv('DB_POOL_PING_AFTER', '30'))
+    }
+
+class DatabasePool:
+    """
+    Pool de conexiones PostgreSQL compartido por todo el proceso.
+
+    Envuelve ThreadedConnectionPool agregando espera acotada al pedir
+    conexiones, verificación (pre-ping) de conexiones ociosas, reciclado
+    de conexiones viejas y estadísticas de uso.
+    """
+
+    def __init__(self, db_config, minconn=1, maxconn=10, timeout=5.0, recycle=1800.0, ping_after=30.0):
+        if minconn > maxconn:
+            raise ValueError("DB_POOL_MIN no puede ser mayor que DB_POOL_MAX")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+
+        self._pool = pg_pool.ThreadedConnectionPool(
+            minconn, maxconn, connection_factory=InstrumentedConnection, **db_config
+        )
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._created_at = {}
+        self._released_at = {}
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._acquired_total = 0
+        self._timeouts_total = 0
+        self._recycled_total = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+        logger.info(f"🏊 Pool de conexiones creado (min={minconn}, max={maxconn}, timeout={timeout}s)")
+
+    def _is_stale(self, connection, now):
+        """Determina si una conexión debe descartarse antes de entregarla"""
+        if connection.closed:
+            return True
+
+        created_at = self._created_at.setdefault(id(connection), now)
+        if self.recycle and now - created_at > self.recycle:
+            return True
+
+        released_at = self._released_at.get(id(connection))
+        if released_at is not None and now - released_at > self.ping_after:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                connection.rollback()
+            except (Exception, Error) as error:
+                logger.warning(f'Conexión inactiva detectada en el pool: {error}')
+                return True
+
+        return False
+
+    def _discard(self, connection):
+        self._created_at.pop(id(connection), None)
+        self._released_at.pop(id(connection), None)
+        self._pool.putconn(connection, close=True)
+
+    def acquire(self):
+        """
+        Obtiene una conexión del pool esperando como máximo `timeout` segundos
+        """
+        if self._closed:
+            raise PoolTimeoutError("El pool de conexiones está cerrado")
+
+        start = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        waited = time.monotonic() - start
+        if not acquired:
+            record_span('db_connect', waited)
+            with self._lock:
+                self._timeouts_total += 1
+            logger.error(f"⏱️ Tiempo de espera agotado obteniendo conexión del pool ({self.timeout}s)")
+            raise PoolTimeoutError("No hay conexiones disponibles en el pool")
+
+        try:
+            connection = self._pool.getconn()
+            while self._is_stale(connection, time.monotonic()):
+                logger.info("🔄 Reciclando conexión del pool")
+                self._discard(connection)
+                with self._lock:
+                    self._recycled_total += 1
+                connection = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        finally:
+            # Espera por un lugar más pre-ping y reconexiones
+            record_span('db_connect', time.monotonic() - start)
+
+        self._released_at.pop(id(connection), None)
+        with self._lock:
+            self._in_use += 1
+            self._acquired_total += 1
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+        return connection
+
+    def release(self, connection, discard=False):
+        """
+        Devuelve una conexión al pool, revirtiendo cualquier transacción abierta
+        """
+        try:
+            if not discard and not connection.closed:
+                if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+        except (Exception, Error) as error:
+            logger.warning(f"⚠️ Error limpiando conexión antes de devolverla al pool: {error}")
+            discard = True
+
+        try:
+            if self._closed:
+                connection.close()
+            elif discard or connection.closed:
+                self._discard(connection)
+            else:
+                self._released_at[id(connection)] = time.monotonic()
+                self._pool.putconn(connection)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager que presta una conexión y la devuelve al salir
+        """
+        connection = self.acquire()
+        discard = False
+        try:
+            yield connection
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.release(connection, discard=discard)
+
+    def stats(self):
+        """
+        Estadísticas del pool: conexiones en uso, ociosas y tiempos de espera
+        """
+        with self._lock:
+            acquired = self._acquired_total
+            return {
+                'min': self.minconn,
+                'max': self.maxconn,
+                'in_use': self._in_use,
+                'idle': len(self._pool._pool),
+                'waiting': self._waiting,
+                'acquired_total': acquired,
+                'timeouts_total': self._timeouts_total,
+                'recycled_total': self._recycled_total,
+                'wait_seconds_total': round(self._wait_seconds_total, 6),
+                'wait_seconds_avg': round(self._wait_seconds_total / acquired, 6) if acquired else 0.0,
+                'wait_seconds_max': round(self._wait_seconds_max, 6)
+            }
+
+    def close(self):
+        """
+        Cierra todas las conexiones del pool
+        """
+        self._closed = True
+        self._pool.closeall()
+        self._created_at.clear()
+        self._released_at.clear()
+        logger.info("🔌 Pool de conexiones cerrado")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def init_pool():
+    """
+    Crea el pool del proceso si todavía no existe
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            db_config = get_database_config()
+            is_valid, validation_message = validate_database_config(db_config)
+            if not is_valid:
+                raise RuntimeError(validation_message)
+            _pool = DatabasePool(db_config, **get_pool_config())
+        return _pool
+
+def get_pool():
+    """
+    Retorna el pool del proceso, creándolo bajo demanda
+    """
+    if _pool is None:
+        return init_pool()
+    return _pool
+
+def close_pool():
+    """
+    Drena y cierra el pool del proceso
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def get_pool_stats():
+    """
+    Estadísticas del pool actual, o None si no fue inicializado
+    """
+    if _pool is None:
+        return None
+    return _pool.stats()
+
+@contextmanager
+def get_db_connection():
+    """
+    Presta una conexión del pool del proceso
+    """
+    with get_pool().connection() as connection:
+        yield connection
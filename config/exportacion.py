@@ -0,0 +1,178 @@
+"""
+Exportación de tablas completas en CSV o NDJSON
+
+Las filas se leen con un cursor con nombre (del lado del servidor) en lotes
+de tamaño fijo y se codifican lote por lote, así que la memoria usada no
+depende del tamaño de la tabla. La conexión queda prestada del pool hasta
+que termina (o se corta) la descarga.
+"""
+import csv
+import io
+import itertools
+import json
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import psycopg2
+from .logging_config import get_logger
+from .database_pool import get_pool
+
+logger = get_logger(__name__)
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Columnas y columna de fecha para filtrar, por recurso. Las contraseñas nunca se exportan
+EXPORTACIONES = {
+    'reservas': {
+        'columnas': ('id', 'usuario_id', 'fecha_check_in', 'fecha_check_out', 'cantidad_habitaciones',
+                     'precio_total', 'estado', 'observaciones', 'fecha_creacion'),
+        'fecha': 'fecha_check_in'
+    },
+    'pagos': {
+        'columnas': ('id', 'reserva_id', 'tipo_pago', 'monto', 'metodo_pago', 'estado_pago',
+                     'fecha_pago', 'comprobante', 'observaciones'),
+        'fecha': 'fecha_pago'
+    },
+    'usuarios': {
+        'columnas': ('id', 'nombre', 'apellido', 'dni', 'cuil_cuit', 'email', 'telefono',
+                     'fecha_registro', 'activo'),
+        'fecha': 'fecha_registro'
+    }
+}
+
+def get_export_batch_size():
+    return int(os.getenv('EXPORT_BATCH_SIZE', '2000'))
+
+def build_export_query(recurso, desde=None, hasta=None):
+    """
+    SELECT del recurso ordenado por id, con desde/hasta inclusive sobre su
+    columna de fecha. Retorna (query, params, columnas)
+    """
+    definicion = EXPORTACIONES[recurso]
+    columnas = definicion['columnas']
+    condiciones = []
+    params = []
+    if desde is not None:
+        condiciones.append(f"{definicion['fecha']} >= %s")
+        params.append(desde)
+    if hasta is not None:
+        # Las columnas TIMESTAMP incluyen todo el último día
+        condiciones.append(f"{definicion['fecha']} < %s")
+        params.append(hasta + timedelta(days=1))
+
+    query = f"SELECT {', '.join(columnas)} FROM {recurso}"
+    if condiciones:
+        query += " WHERE " + " AND ".join(condiciones)
+    query += " ORDER BY id"
+    return query, params, columnas
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def encode_csv(columnas, filas, con_encabezado):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if con_encabezado:
+        writer.writerow(columnas)
+    writer.writerows(filas)
+    return buffer.getvalue().encode('utf-8')
+
+def encode_ndjson(columnas, filas, con_encabezado):
+    return ''.join(
+        json.dumps(dict(zip(columnas, fila)), default=_json_default, ensure_ascii=False) + '\n'
+        for fila in filas
+    ).encode('utf-8')
+
+ENCODERS = {
+    'csv': encode_csv,
+    'ndjson': encode_ndjson
+}
+
+class ExportacionStream:
+    """
+    Recorre una consulta con un cursor con nombre y entrega cada lote ya
+    codificado. Se usa como iterador; cerrar() devuelve la conexión al pool
+    y es seguro llamarlo más de una vez.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, query, params, columnas, formato='csv', batch_size=None):
+        self.columnas = columnas
+        self.batch_size = batch_size or get_export_batch_size()
+        self._encode = ENCODERS[formato]
+        self._primer_lote = True
+        self.filas = 0
+        self.bytes = 0
+
+        self._pool = get_pool()
+        self._connection = self._pool.acquire()
+        try:
+            self._cursor = self._connection.cursor(name=f"exportacion_{next(self._ids)}")
+            self._cursor.itersize = self.batch_size
+            self._cursor.execute(query, params)
+        except Exception:
+            self._pool.release(self._connection, discard=True)
+            self._connection = None
+            raise
+
+    def siguiente_lote(self):
+        """
+        Retorna el próximo lote codificado, o None al terminar
+        """
+        if self._connection is None:
+            return None
+
+        try:
+            filas = self._cursor.fetchmany(self.batch_size)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self.cerrar(discard=True)
+            raise
+
+        if not filas and not self._primer_lote:
+            self.cerrar()
+            return None
+
+        chunk = self._encode(self.columnas, filas, self._primer_lote)
+        self._primer_lote = False
+        self.filas += len(filas)
+        self.bytes += len(chunk)
+        if len(filas) < self.batch_size:
+            self.cerrar()
+        return chunk
+
+    def __iter__(self):
+        try:
+            while (chunk := self.siguiente_lote()) is not None:
+                yield chunk
+        finally:
+            self.cerrar()
+
+    def cerrar(self, discard=False):
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        try:
+            if not discard:
+                self._cursor.close()
+        except (Exception, psycopg2.Error) as error:
+            logger.warning(f"⚠️ Error cerrando cursor de exportación: {error}")
+            discard = True
+        finally:
+            self._pool.release(connection, discard=discard)
+        logger.info(f"📤 Exportación finalizada: {self.filas} filas, {self.bytes} bytes")
+
+def abrir_exportacion(recurso, formato='csv', desde=None, hasta=None):
+    """
+    Prepara la exportación de un recurso de EXPORTACIONES
+    """
+    query, params, columnas = build_export_query(recurso, desde, hasta)
+    return ExportacionStream(query, params, columnas, formato)
@@ -0,0 +1,247 @@
+"""
+Derivadas responsive de las imágenes
+
+Genera, para cada imagen de public/assets/images, versiones AVIF y WebP en
+los anchos de IMAGE_WIDTHS (sin agrandar: el ancho máximo es el del
+original) dentro de public/assets/images/responsive/. El índice IMAGE_INDEX
+guarda el hash del contenido de cada original y sus derivadas: en la
+siguiente corrida solo se regeneran las imágenes que cambiaron (o cuyos
+parámetros cambiaron) y se borran las derivadas de las que ya no existen.
+
+Las derivadas pasan por config.static_build como cualquier asset, que
+además convierte cada <img> de las páginas con atributo sizes en un
+<picture> con un <source> por formato y su srcset. Sin build las páginas
+siguen usando el original.
+
+Requiere Pillow con soporte AVIF (Pillow >= 11.3).
+
+Uso:
+    python -m config.image_build              # Genera las derivadas que falten o cambiaron
+    python -m config.image_build --forzar     # Regenera todas
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .logging_config import get_logger
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+logger = get_logger(__name__)
+
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+# Formatos de las derivadas, en orden de preferencia para el <picture>
+FORMATOS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 50, 'speed': 6}),
+    'webp': ('WEBP', 'image/webp', {'quality': 75, 'method': 6})
+}
+
+_IMG = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_ATRIBUTO = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+
+def get_image_config():
+    source_dir = Path(os.getenv('STATIC_SOURCE_DIR', 'public'))
+    return {
+        'source_dir': source_dir,
+        'images_dir': source_dir / 'assets' / 'images',
+        'output_dir': source_dir / 'assets' / 'images' / 'responsive',
+        'index': Path(os.getenv('IMAGE_INDEX', '.cache/imagenes.json')),
+        'anchos': sorted({int(ancho) for ancho in os.getenv('IMAGE_WIDTHS', '320,640,1024').split(',')})
+    }
+
+def load_index(path):
+    """
+    Índice de derivadas por ruta del original (relativa a public/), o {} si no hay
+    """
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+
+def _parametros(anchos):
+    # Si cambian los anchos o las opciones de codificación hay que regenerar todo
+    return {'anchos': anchos, 'formatos': {formato: opciones for formato, (_, _, opciones) in FORMATOS.items()}}
+
+def anchos_para(ancho, anchos):
+    """
+    Anchos a generar para un original de `ancho` px: los pedidos, sin pasarse del original
+    """
+    return sorted({min(candidato, ancho) for candidato in anchos})
+
+def generar(path, config):
+    """
+    Codifica las derivadas de una imagen y retorna su entrada del índice
+    """
+    data = path.read_bytes()
+    with Image.open(io.BytesIO(data)) as original:
+        imagen = ImageOps.exif_transpose(original)
+        if imagen.mode not in ('RGB', 'RGBA'):
+            imagen = imagen.convert('RGBA' if 'transparency' in imagen.info or imagen.mode in ('LA', 'PA') else 'RGB')
+        ancho, alto = imagen.size
+
+        destino = config['output_dir'] / path.parent.relative_to(config['images_dir'])
+        destino.mkdir(parents=True, exist_ok=True)
+        prefijo = config['output_dir'].relative_to(config['source_dir']).as_posix()
+
+        variantes = {formato: [] for formato in FORMATOS}
+        for derivada_ancho in anchos_para(ancho, config['anchos']):
+            derivada_alto = round(alto * derivada_ancho / ancho)
+            redimensionada = imagen if derivada_ancho == ancho else imagen.resize(
+                (derivada_ancho, derivada_alto), Image.Resampling.LANCZOS
+            )
+            for formato, (pil_format, _, opciones) in FORMATOS.items():
+                buffer = io.BytesIO()
+                redimensionada.save(buffer, pil_format, **opciones)
+                salida = destino / f'{path.stem}-{derivada_ancho}.{formato}'
+                salida.write_bytes(buffer.getvalue())
+                variantes[formato].append({
+                    'ancho': derivada_ancho,
+                    'archivo': f'{prefijo}/{salida.relative_to(config["output_dir"]).as_posix()}',
+                    'bytes': len(buffer.getvalue())
+                })
+
+    return {
+        'hash': hashlib.sha256(data).hexdigest(),
+        'ancho': ancho,
+        'alto': alto,
+        'bytes': len(data),
+        'variantes': variantes
+    }
+
+def _vigente(entrada, data, config):
+    if entrada is None or entrada['hash'] != hashlib.sha256(data).hexdigest():
+        return False
+    return all(
+        (config['source_dir'] / variante['archivo']).is_file()
+        for variantes in entrada['variantes'].values() for variante in variantes
+    )
+
+def derivative_files(entrada):
+    return {variante['archivo'] for variantes in entrada['variantes'].values() for variante in variantes}
+
+def build(config=None, forzar=False):
+    """
+    Genera las derivadas que faltan o cambiaron y actualiza el índice.
+    Retorna un resumen con el ahorro de bytes
+    """
+    config = config or get_image_config()
+    anterior = load_index(config['index'])
+    if anterior.get('parametros') != _parametros(config['anchos']):
+        forzar = True
+    previas = {} if forzar else anterior.get('imagenes', {})
+
+    fuentes = sorted(
+        path for path in config['images_dir'].rglob('*')
+        if path.suffix.lower() in SOURCE_EXTENSIONS and config['output_dir'] not in path.parents
+    )
+    imagenes, pendientes = {}, []
+    for path in fuentes:
+        relative = path.relative_to(config['source_dir']).as_posix()
+        if _vigente(previas.get(relative), path.read_bytes(), config):
+            imagenes[relative] = previas[relative]
+        else:
+            pendientes.append((path, relative))
+
+    # Pillow libera el GIL mientras codifica: los hilos aprovechan todos los núcleos
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        entradas = executor.map(lambda pendiente: generar(pendiente[0], config), pendientes)
+        for (_, relative), entrada in zip(pendientes, entradas):
+            imagenes[relative] = entrada
+
+    # Derivadas que ya no corresponden a ningún original o a su versión actual
+    vigentes = set().union(*(derivative_files(entrada) for entrada in imagenes.values()))
+    eliminadas = 0
+    for entrada in anterior.get('imagenes', {}).values():
+        for archivo in derivative_files(entrada) - vigentes:
+            try:
+                (config['source_dir'] / archivo).unlink()
+                eliminadas += 1
+            except FileNotFoundError:
+                pass
+
+    config['index'].parent.mkdir(parents=True, exist_ok=True)
+    config['index'].write_text(
+        json.dumps({'parametros': _parametros(config['anchos']), 'imagenes': imagenes}, indent=2, sort_keys=True),
+        encoding='utf-8'
+    )
+
+    logger.info(f"🖼️ Derivadas de {len(imagenes)} imágenes: {len(pendientes)} regeneradas, {eliminadas} archivos eliminados")
+    return {
+        'imagenes': len(imagenes),
+        'regeneradas': len(pendientes),
+        'eliminadas': eliminadas,
+        'ahorro': ahorro(imagenes, config['anchos'])
+    }
+
+def ahorro(imagenes, anchos):
+    """
+    Bytes que descarga una pantalla que pide cada ancho, por formato, contra los originales
+    """
+    original = sum(entrada['bytes'] for entrada in imagenes.values())
+    resumen = {'original_bytes': original}
+    for formato in FORMATOS:
+        resumen[formato] = {}
+        for ancho in anchos:
+            total = 0
+            for entrada in imagenes.values():
+                variantes = entrada['variantes'][formato]
+                # La más chica que cubre el ancho pedido, o la más grande que haya
+                elegida = next((variante for variante in variantes if variante['ancho'] >= ancho), variantes[-1])
+                total += elegida['bytes']
+            resumen[formato][f'{ancho}w'] = {
+                'bytes': total,
+                'ahorro_bytes': original - total,
+                'ahorro_pct': round((1 - total / original) * 100, 1) if original else 0.0
+            }
+    return resumen
+
+def expand_pictures(html, imagenes):
+    """
+    Convierte cada <img> con atributo sizes cuyo src tiene derivadas en un
+    <picture> con un <source> por formato. El <img> queda igual, como fallback
+    """
+    def picture(match):
+        img = match.group(0)
+        atributos = dict(_ATRIBUTO.findall(img))
+        src = atributos.get('src', '')
+        entrada = imagenes.get(src[len('/static/'):]) if src.startswith('/static/') else None
+        if entrada is None or 'sizes' not in atributos:
+            return img
+        sources = ''.join(
+            f'<source type="{mime}" srcset="'
+            + ', '.join(f'/static/{variante["archivo"]} {variante["ancho"]}w' for variante in entrada['variantes'][formato])
+            + f'" sizes="{atributos["sizes"]}">'
+            for formato, (_, mime, _) in FORMATOS.items()
+        )
+        return f'<picture style="display:block">{sources}{img}</picture>'
+
+    return _IMG.sub(picture, html)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--forzar', action='store_true', help='Regenerar todas las derivadas')
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        print("Falta Pillow: pip install -r requirements-build.txt", file=sys.stderr)
+        return 1
+    faltantes = [formato for formato in FORMATOS if not features.check(formato)]
+    if faltantes:
+        print(f"Pillow no tiene soporte para {', '.join(faltantes)}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(build(forzar=args.forzar), indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,444 @@
+"""
+Importación masiva de usuarios y reservas desde CSV
+
+Las filas se validan por lotes con los modelos de la API y se cargan con
+COPY FROM STDIN en tablas temporales. Los conflictos (datos ya registrados,
+repetidos en el archivo, usuarios inexistentes, noches sin capacidad) se
+marcan con consultas sobre todo el lote, y las filas válidas se insertan en
+una sola transacción junto con su ocupación diaria.
+
+Columnas de usuarios: nombre, apellido, dni, cuil_cuit, email, telefono y,
+opcionalmente, password. Sin password el usuario queda sin contraseña
+utilizable hasta que se le asigne una.
+
+Columnas de reservas: dni, fecha_check_in, fecha_check_out,
+cantidad_habitaciones y, opcionalmente, estado, precio_total y
+observaciones. Sin estado, las reservas ya terminadas quedan 'finalizada'
+y las demás 'confirmada'.
+
+Uso:
+    python -m config.importacion --usuarios usuarios.csv --reservas reservas.csv
+    python -m config.importacion --reservas reservas.csv --simular   # Valida todo y revierte
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from pydantic import ValidationError
+from models.user import UserBase, UserCreate
+from models.booking import BookingCreate
+from .logging_config import get_logger
+from .database_pool import get_db_connection
+from .database_operations import calcular_precio_total
+from .ocupacion import ESTADOS_ACTIVOS, MAX_HABITACIONES
+from .password_hashing import get_password_hasher
+from .versiones import bump_versions
+
+logger = get_logger(__name__)
+
+# Hash que bcrypt nunca acepta: el login falla hasta asignar una contraseña
+PASSWORD_INUTILIZABLE = '!'
+
+ESTADOS_RESERVA = ('pendiente', 'confirmada', 'cancelada', 'finalizada')
+
+USUARIO_COLUMNAS = ('nombre', 'apellido', 'dni', 'cuil_cuit', 'email', 'telefono')
+RESERVA_COLUMNAS = ('dni', 'fecha_check_in', 'fecha_check_out', 'cantidad_habitaciones')
+
+# Claves únicas de usuarios: descripción y expresiones ({t} es el alias de la tabla)
+USUARIO_CLAVES = [
+    ('El DNI', ['{t}.dni']),
+    ('El CUIL/CUIT', ['{t}.cuil_cuit']),
+    ('El email', ['LOWER({t}.email)']),
+    ('El teléfono', ['{t}.telefono']),
+    ('El nombre y apellido', ['{t}.nombre', '{t}.apellido'])
+]
+
+class ImportacionError(Exception):
+    """El archivo no se puede importar (por ejemplo, faltan columnas)"""
+
+def get_import_config():
+    """
+    Configuración de la importación usando variables de entorno
+    """
+    return {
+        'batch_size': int(os.getenv('IMPORT_BATCH_SIZE', '5000')),
+        'max_rechazos': int(os.getenv('IMPORT_MAX_RECHAZOS', '1000'))
+    }
+
+def _motivo(error):
+    return '; '.join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'fila'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+def _leer_lotes(archivo, requeridas, batch_size):
+    """
+    Lee el CSV y entrega lotes de (número de fila, dict) con los valores sin
+    espacios sobrantes. La fila 1 es el encabezado
+    """
+    reader = csv.DictReader(archivo)
+    faltantes = [columna for columna in requeridas if columna not in (reader.fieldnames or [])]
+    if faltantes:
+        raise ImportacionError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+
+    filas = (
+        (numero, {k: v.strip() if isinstance(v, str) else v for k, v in fila.items() if k is not None})
+        for numero, fila in enumerate(reader, start=2)
+    )
+    while lote := list(itertools.islice(filas, batch_size)):
+        yield lote
+
+def _copy(cursor, tabla, columnas, filas):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(filas)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def validar_usuarios(lote):
+    """
+    Valida un lote con UserCreate (o UserBase si la fila no trae password).
+    Retorna (filas válidas, rechazos)
+    """
+    validas, rechazos, passwords = [], [], []
+    for numero, fila in lote:
+        try:
+            if fila.get('password'):
+                usuario = UserCreate(**fila)
+                passwords.append(usuario.password)
+            else:
+                usuario = UserBase(**{columna: fila.get(columna) for columna in USUARIO_COLUMNAS})
+                passwords.append(None)
+        except ValidationError as error:
+            rechazos.append({'fila': numero, 'motivo': _motivo(error)})
+            continue
+        validas.append([numero, usuario.nombre, usuario.apellido, usuario.dni,
+                        usuario.cuil_cuit, usuario.email, usuario.telefono])
+
+    # bcrypt es el costo dominante: solo se paga por las filas que traen contraseña
+    con_password = [password for password in passwords if password]
+    hashes = iter(get_password_hasher().hash_batch_sync(con_password)) if con_password else iter(())
+    for fila, password in zip(validas, passwords):
+        fila.append(next(hashes) if password else PASSWORD_INUTILIZABLE)
+    return validas, rechazos
+
+def validar_reservas(lote):
+    """
+    Valida un lote con BookingCreate más estado, precio y cantidad máxima.
+    Retorna (filas válidas, rechazos)
+    """
+    hoy = date.today()
+    validas, rechazos = [], []
+    for numero, fila in lote:
+        try:
+            reserva = BookingCreate(**fila)
+        except ValidationError as error:
+            rechazos.append({'fila': numero, 'motivo': _motivo(error)})
+            continue
+
+        if not fila.get('dni'):
+            rechazos.append({'fila': numero, 'motivo': "dni: obligatorio"})
+            continue
+        if reserva.cantidad_habitaciones > MAX_HABITACIONES:
+            rechazos.append({'fila': numero, 'motivo': f"cantidad_habitaciones: máximo {MAX_HABITACIONES}"})
+            continue
+
+        estado = (fila.get('estado') or '').lower() or ('finalizada' if reserva.fecha_check_out <= hoy else 'confirmada')
+        if estado not in ESTADOS_RESERVA:
+            rechazos.append({'fila': numero, 'motivo': f"estado: debe ser uno de {', '.join(ESTADOS_RESERVA)}"})
+            continue
+
+        try:
+            precio_total = Decimal(fila['precio_total']) if fila.get('precio_total') else Decimal(str(
+                calcular_precio_total(reserva.fecha_check_in, reserva.fecha_check_out, reserva.cantidad_habitaciones)
+            ))
+        except InvalidOperation:
+            rechazos.append({'fila': numero, 'motivo': "precio_total: no es un número"})
+            continue
+        if precio_total < 0:
+            rechazos.append({'fila': numero, 'motivo': "precio_total: no puede ser negativo"})
+            continue
+
+        validas.append([numero, fila['dni'], reserva.fecha_check_in, reserva.fecha_check_out,
+                        reserva.cantidad_habitaciones, precio_total, estado, fila.get('observaciones') or None])
+    return validas, rechazos
+
+def _rechazos_sql(cursor, tabla, max_rechazos):
+    cursor.execute(f"SELECT COUNT(*) FROM {tabla} WHERE motivo IS NOT NULL")
+    total = cursor.fetchone()[0]
+    query = f"SELECT fila, motivo FROM {tabla} WHERE motivo IS NOT NULL ORDER BY fila"
+    if max_rechazos is not None:
+        query += f" LIMIT {int(max_rechazos)}"
+    cursor.execute(query)
+    return total, [{'fila': fila, 'motivo': motivo} for fila, motivo in cursor.fetchall()]
+
+def _resultado(recurso, recibidas, importadas, rechazos_validacion, rechazos_sql, total_sql, max_rechazos):
+    rechazos = sorted(rechazos_validacion + rechazos_sql, key=lambda rechazo: rechazo['fila'])
+    return {
+        'recurso': recurso,
+        'recibidas': recibidas,
+        'importadas': importadas,
+        'rechazadas_total': len(rechazos_validacion) + total_sql,
+        'rechazadas': rechazos if max_rechazos is None else rechazos[:max_rechazos]
+    }
+
+def _marcar_duplicados(cursor, tabla, descripcion, expresiones, existente_sql, registrado='registrado'):
+    """
+    Rechaza las filas pendientes cuya clave ya existe en la base o se repite
+    en el archivo, conservando la primera aparición
+    """
+    cursor.execute(f"""
+        UPDATE {tabla} s SET motivo = %s
+        WHERE s.motivo IS NULL AND EXISTS ({existente_sql})
+    """, (f"{descripcion} ya está {registrado}",))
+
+    particion = ', '.join(expresion.format(t=tabla) for expresion in expresiones)
+    cursor.execute(f"""
+        UPDATE {tabla} s SET motivo = %s || d.primera || ')'
+        FROM (
+            SELECT fila, MIN(fila) OVER (PARTITION BY {particion}) AS primera
+            FROM {tabla} WHERE motivo IS NULL
+        ) d
+        WHERE s.fila = d.fila AND d.fila <> d.primera
+    """, (f"{descripcion} se repite en el archivo (fila ",))
+
+def importar_usuarios(cursor, archivo, config):
+    cursor.execute("""
+        CREATE TEMP TABLE staging_usuarios (
+            fila INTEGER PRIMARY KEY, nombre TEXT, apellido TEXT, dni TEXT, cuil_cuit TEXT,
+            email TEXT, telefono TEXT, password TEXT, motivo TEXT
+        ) ON COMMIT DROP
+    """)
+
+    recibidas, rechazos_validacion = 0, []
+    for lote in _leer_lotes(archivo, USUARIO_COLUMNAS, config['batch_size']):
+        recibidas += len(lote)
+        validas, rechazos = validar_usuarios(lote)
+        rechazos_validacion += rechazos
+        _copy(cursor, 'staging_usuarios',
+              ('fila',) + USUARIO_COLUMNAS + ('password',), validas)
+
+    cursor.execute("ANALYZE staging_usuarios")
+    # Sin altas concurrentes mientras se resuelven los conflictos
+    cursor.execute("LOCK TABLE usuarios IN SHARE ROW EXCLUSIVE MODE")
+
+    for descripcion, expresiones in USUARIO_CLAVES:
+        igualdad = ' AND '.join(f"{e.format(t='u')} = {e.format(t='s')}" for e in expresiones)
+        _marcar_duplicados(cursor, 'staging_usuarios', descripcion, expresiones,
+                           f"SELECT 1 FROM usuarios u WHERE {igualdad}")
+
+    cursor.execute("""
+        INSERT INTO usuarios (nombre, apellido, dni, cuil_cuit, email, telefono, password, activo)
+        SELECT nombre, apellido, dni, cuil_cuit, email, telefono, password, true
+        FROM staging_usuarios
+        WHERE motivo IS NULL
+        ORDER BY fila
+    """)
+    importadas = cursor.rowcount
+
+    total_sql, rechazos_sql = _rechazos_sql(cursor, 'staging_usuarios', config['max_rechazos'])
+    return _resultado('usuarios', recibidas, importadas, rechazos_validacion,
+                      rechazos_sql, total_sql, config['max_rechazos'])
+
+def importar_reservas(cursor, archivo, config):
+    cursor.execute("""
+        CREATE TEMP TABLE staging_reservas (
+            fila INTEGER PRIMARY KEY, dni TEXT, fecha_check_in DATE, fecha_check_out DATE,
+            cantidad_habitaciones INTEGER, precio_total NUMERIC(10,2), estado TEXT,
+            observaciones TEXT, usuario_id INTEGER, motivo TEXT
+        ) ON COMMIT DROP
+    """)
+
+    recibidas, rechazos_validacion = 0, []
+    for lote in _leer_lotes(archivo, RESERVA_COLUMNAS, config['batch_size']):
+        recibidas += len(lote)
+        validas, rechazos = validar_reservas(lote)
+        rechazos_validacion += rechazos
+        _copy(cursor, 'staging_reservas',
+              ('fila', 'dni', 'fecha_check_in', 'fecha_check_out', 'cantidad_habitaciones',
+               'precio_total', 'estado', 'observaciones'), validas)
+
+    cursor.execute("ANALYZE staging_reservas")
+    # Mismo orden de bloqueo que una reserva (reservas, luego ocupacion_diaria):
+    # las reservas concurrentes esperan a que termine la importación
+    cursor.execute("LOCK TABLE reservas, ocupacion_diaria IN SHARE ROW EXCLUSIVE MODE")
+
+    cursor.execute("""
+        UPDATE staging_reservas s SET usuario_id = u.id
+        FROM usuarios u WHERE u.dni = s.dni
+    """)
+    cursor.execute("""
+        UPDATE staging_reservas SET motivo = 'No existe un usuario con ese DNI'
+        WHERE motivo IS NULL AND usuario_id IS NULL
+    """)
+
+    _marcar_duplicados(
+        cursor, 'staging_reservas', 'La reserva (mismo usuario y fechas)',
+        ['{t}.usuario_id', '{t}.fecha_check_in', '{t}.fecha_check_out'],
+        """SELECT 1 FROM reservas r
+           WHERE r.usuario_id = s.usuario_id
+             AND r.fecha_check_in = s.fecha_check_in
+             AND r.fecha_check_out = s.fecha_check_out""",
+        registrado='registrada'
+    )
+
+    # Reservas activas que, sumadas en orden de archivo a la ocupación actual,
+    # superan la capacidad de alguna noche. Se conservan las primeras que entran
+    cursor.execute("""
+        WITH noches AS (
+            SELECT s.fila, noche::date AS fecha, s.cantidad_habitaciones
+            FROM staging_reservas s
+            CROSS JOIN LATERAL generate_series(s.fecha_check_in, s.fecha_check_out - 1, INTERVAL '1 day') AS noche
+            WHERE s.motivo IS NULL AND s.estado IN %(activos)s
+        ),
+        acumulado AS (
+            SELECT n.fila, n.fecha,
+                   COALESCE(o.habitaciones_ocupadas, 0)
+                   + SUM(n.cantidad_habitaciones) OVER (PARTITION BY n.fecha ORDER BY n.fila) AS ocupadas
+            FROM noches n
+            LEFT JOIN ocupacion_diaria o ON o.fecha = n.fecha
+        )
+        UPDATE staging_reservas s
+        SET motivo = 'Supera la capacidad de la posada la noche ' || x.fecha
+        FROM (
+            SELECT fila, MIN(fecha) AS fecha
+            FROM acumulado
+            WHERE ocupadas > %(capacidad)s
+            GROUP BY fila
+        ) x
+        WHERE s.fila = x.fila
+    """, {'activos': ESTADOS_ACTIVOS, 'capacidad': MAX_HABITACIONES})
+
+    cursor.execute("""
+        INSERT INTO reservas (usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones,
+                              precio_total, estado, observaciones)
+        SELECT usuario_id, fecha_check_in, fecha_check_out, cantidad_habitaciones,
+               precio_total, estado, observaciones
+        FROM staging_reservas
+        WHERE motivo IS NULL
+        ORDER BY fila
+    """)
+    importadas = cursor.rowcount
+
+    cursor.execute("""
+        INSERT INTO ocupacion_diaria (fecha, habitaciones_ocupadas)
+        SELECT noche::date, SUM(s.cantidad_habitaciones)
+        FROM staging_reservas s
+        CROSS JOIN LATERAL generate_series(s.fecha_check_in, s.fecha_check_out - 1, INTERVAL '1 day') AS noche
+        WHERE s.motivo IS NULL AND s.estado IN %s
+        GROUP BY 1
+        ORDER BY 1
+        ON CONFLICT (fecha) DO UPDATE
+        SET habitaciones_ocupadas = ocupacion_diaria.habitaciones_ocupadas + EXCLUDED.habitaciones_ocupadas
+    """, (ESTADOS_ACTIVOS,))
+
+    cursor.execute("SELECT DISTINCT usuario_id FROM staging_reservas WHERE motivo IS NULL")
+    usuarios_afectados = [row[0] for row in cursor.fetchall()]
+
+    total_sql, rechazos_sql = _rechazos_sql(cursor, 'staging_reservas', config['max_rechazos'])
+    resultado = _resultado('reservas', recibidas, importadas, rechazos_validacion,
+                           rechazos_sql, total_sql, config['max_rechazos'])
+    return resultado, usuarios_afectados
+
+def importar(usuarios=None, reservas=None, simular=False, config=None):
+    """
+    Importa archivos CSV (objetos de texto) de usuarios y/o reservas en una
+    sola transacción; los usuarios primero, para que las reservas puedan
+    referirlos. Con simular=True se valida y resuelve todo pero se revierte.
+    Lanza ImportacionError si un archivo no tiene las columnas requeridas
+    """
+    config = config or get_import_config()
+
+    inicio = time.perf_counter()
+    resultados = []
+    usuarios_afectados = []
+
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            try:
+                if usuarios is not None:
+                    resultados.append(importar_usuarios(cursor, usuarios, config))
+                if reservas is not None:
+                    resultado, usuarios_afectados = importar_reservas(cursor, reservas, config)
+                    resultados.append(resultado)
+                if not simular:
+                    recursos = []
+                    if usuarios is not None:
+                        recursos.append('usuarios')
+                    if reservas is not None:
+                        recursos += ['reservas', *(('reservas', usuario_id) for usuario_id in usuarios_afectados)]
+                    bump_versions(cursor, *recursos)
+            except Exception:
+                connection.rollback()
+                raise
+
+            if simular:
+                connection.rollback()
+            else:
+                connection.commit()
+
+    segundos = round(time.perf_counter() - inicio, 3)
+    for resultado in resultados:
+        logger.info(
+            f"📥 Importación de {resultado['recurso']}{' (simulada)' if simular else ''}: "
+            f"{resultado['importadas']} importadas, {resultado['rechazadas_total']} rechazadas "
+            f"de {resultado['recibidas']} ({segundos}s)"
+        )
+    return {'simulacion': simular, 'segundos': segundos, 'resultados': resultados}
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--usuarios', help='CSV de usuarios')
+    parser.add_argument('--reservas', help='CSV de reservas')
+    parser.add_argument('--simular', action='store_true', help='Validar y revertir sin guardar')
+    parser.add_argument('--rechazos', help='Escribir todas las filas rechazadas en este CSV')
+    args = parser.parse_args(argv)
+    if not args.usuarios and not args.reservas:
+        parser.error('Indicar --usuarios y/o --reservas')
+
+    from .database_pool import init_pool, close_pool
+    from .password_hashing import close_password_hasher
+
+    init_pool()
+    archivos = []
+    try:
+        usuarios = reservas = None
+        if args.usuarios:
+            usuarios = open(args.usuarios, newline='', encoding='utf-8-sig')
+            archivos.append(usuarios)
+        if args.reservas:
+            reservas = open(args.reservas, newline='', encoding='utf-8-sig')
+            archivos.append(reservas)
+
+        try:
+            # Desde la línea de comandos se informan todos los rechazos
+            informe = importar(usuarios, reservas, args.simular, {**get_import_config(), 'max_rechazos': None})
+        except ImportacionError as error:
+            print(f"Error: {error}", file=sys.stderr)
+            return 1
+    finally:
+        for archivo in archivos:
+            archivo.close()
+        close_password_hasher()
+        close_pool()
+
+    if args.rechazos:
+        with open(args.rechazos, 'w', newline='', encoding='utf-8') as salida:
+            writer = csv.writer(salida)
+            writer.writerow(('recurso', 'fila', 'motivo'))
+            for resultado in informe['resultados']:
+                writer.writerows((resultado['recurso'], r['fila'], r['motivo']) for r in resultado['rechazadas'])
+
+    for resultado in informe['resultados']:
+        resultado['rechazadas'] = resultado['rechazadas'][:20]
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
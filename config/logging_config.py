@@ -1,34 +1,119 @@
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
+import threading
+import time
 from pathlib import Path
+from dotenv import load_dotenv
 
-script_dir = Path(__file__).parent.parent 
+script_dir = Path(__file__).parent.parent
 logs_dir = script_dir / 'logs'
 
 logs_dir.mkdir(exist_ok=True)
 
-def setup_logger():
-    """Configurar el sistema de logging"""
-    
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(levelname)s - %(name)s - %(funcName)s:%(lineno)d - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(funcName)s:%(lineno)d - %(message)s'
 
-    root_logger = logging.getLogger()
-    for handler in root_logger.handlers[:]:
-        if isinstance(handler, logging.StreamHandler):
-            root_logger.removeHandler(handler)
+# Una línea JSON por petición, escrita solo en logs/requests.log
+ACCESS_LOGGER = 'Posada.peticiones'
 
-    root_logger.setLevel(logging.WARNING)
-    
-    logger = logging.getLogger('Posada')
-    logger.setLevel(logging.DEBUG)
-    
-    logger.handlers.clear()
-    
+_listener = None
+_queue_handler = None
+_rate_filter = None
+
+def parse_log_levels(value):
+    """
+    Niveles por módulo desde un texto como "api=WARNING,config.database_pool=DEBUG".
+    Los nombres son los de los módulos (api.reservas, config.migrations...)
+    """
+    levels = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, level = item.partition('=')
+        level = level.strip().upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Nivel de logging inválido para '{name.strip()}': {level}")
+        levels[name.strip()] = level
+    return levels
+
+def get_log_config():
+    return {
+        'level': os.getenv('LOG_LEVEL', 'INFO').upper(),
+        'levels': parse_log_levels(os.getenv('LOG_LEVELS', '')),
+        'queue_size': int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+        'rate_limit': int(os.getenv('LOG_RATE_LIMIT', '50')),
+        'rate_window': float(os.getenv('LOG_RATE_WINDOW', '1'))
+    }
+
+class RateLimitFilter(logging.Filter):
+    """
+    Deja pasar como máximo `limit` mensajes por línea de código cada `window`
+    segundos. Los errores y el log de peticiones pasan siempre. El primer
+    mensaje que pasa después de un descarte indica cuántos se omitieron
+    """
+
+    def __init__(self, limit, window):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._sites = {}
+        self.suprimidos = 0
+
+    def filter(self, record):
+        if self.limit <= 0 or record.levelno >= logging.ERROR or record.name == ACCESS_LOGGER:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            start, count, dropped = self._sites.get(key, (now, 0, 0))
+            if now - start >= self.window:
+                start, count = now, 0
+            if count >= self.limit:
+                self._sites[key] = (start, count, dropped + 1)
+                self.suprimidos += 1
+                return False
+            self._sites[key] = (start, count + 1, 0)
+
+        if dropped:
+            record.msg = f"{record.msg} [{dropped} mensajes similares omitidos]"
+        return True
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que descarta (y cuenta) los registros si la cola está llena,
+    en lugar de bloquear o crecer sin límite
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.descartados = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """
+    Al detenerse espera lugar en la cola para la marca de fin, así se
+    escriben todos los registros pendientes aunque la cola esté llena
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+def _is_access(record):
+    return record.name == ACCESS_LOGGER
+
+def _is_not_access(record):
+    return record.name != ACCESS_LOGGER
+
+def _build_handlers():
     file_handler = logging.handlers.RotatingFileHandler(
         filename=logs_dir / 'app.log',
         maxBytes=10 * 1024 * 1024,  # 10MB máximo
@@ -36,42 +121,114 @@ def setup_logger():
         encoding='utf-8'
     )
     file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(
-        logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(name)s - %(funcName)s:%(lineno)d - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-    )
-    
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt='%Y-%m-%d %H:%M:%S'))
+    file_handler.addFilter(_is_not_access)
+
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.ERROR) 
+    console_handler.setLevel(logging.ERROR)
     console_handler.setFormatter(
         logging.Formatter(
             '%(asctime)s - %(levelname)s - %(message)s',
             datefmt='%H:%M:%S'
         )
     )
-    
-    error_handler = logging.FileHandler(
+
+    # Las trazas de excepciones llegan ya incluidas en el mensaje
+    error_handler = logging.handlers.RotatingFileHandler(
         filename=logs_dir / 'errors.log',
+        maxBytes=10 * 1024 * 1024,
+        backupCount=5,
         encoding='utf-8'
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(
-        logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(name)s - %(funcName)s:%(lineno)d - %(message)s\n'
-            'Exception: %(exc_info)s\n' + '-'*50,
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
+        logging.Formatter(LOG_FORMAT + '\n' + '-'*50, datefmt='%Y-%m-%d %H:%M:%S')
     )
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    logger.addHandler(error_handler)
-    
+
+    access_handler = logging.handlers.RotatingFileHandler(
+        filename=logs_dir / 'requests.log',
+        maxBytes=10 * 1024 * 1024,
+        backupCount=5,
+        encoding='utf-8'
+    )
+    access_handler.setFormatter(logging.Formatter('%(message)s'))
+    access_handler.addFilter(_is_access)
+    return file_handler, console_handler, error_handler, access_handler
+
+def setup_logger(config=None):
+    """
+    Configurar el sistema de logging. Los módulos encolan los registros y un
+    hilo en segundo plano (QueueListener) los escribe en los archivos, así
+    que el event loop nunca espera por disco
+    """
+    global _listener, _queue_handler, _rate_filter
+    config = config or get_log_config()
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        if isinstance(handler, logging.StreamHandler):
+            root_logger.removeHandler(handler)
+    root_logger.setLevel(logging.WARNING)
+
+    logger = logging.getLogger('Posada')
+    logger.setLevel(config['level'])
+    # El log de peticiones no hereda LOG_LEVEL: subirlo para silenciar la
+    # aplicación no debe apagarlo. Solo LOG_LEVELS=peticiones=... lo cambia
+    logging.getLogger(ACCESS_LOGGER).setLevel(logging.INFO)
+    for name, level in config['levels'].items():
+        logging.getLogger(f'Posada.{name}').setLevel(level)
+
+    stop_logging()
+    logger.handlers.clear()
+
+    log_queue = queue.Queue(maxsize=config['queue_size'])
+    _listener = DrainingQueueListener(log_queue, *_build_handlers(), respect_handler_level=True)
+    _listener.start()
+
+    _rate_filter = RateLimitFilter(config['rate_limit'], config['rate_window'])
+    _queue_handler = BoundedQueueHandler(log_queue)
+    _queue_handler.addFilter(_rate_filter)
+    logger.addHandler(_queue_handler)
+
     return logger
 
+def stop_logging():
+    """
+    Escribe los registros pendientes y detiene el hilo de escritura
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+def get_logger(name):
+    """
+    Logger de un módulo, hijo de 'Posada'. Su nivel se puede ajustar con
+    LOG_LEVELS usando el nombre del módulo
+    """
+    return logging.getLogger(f'Posada.{name}')
+
+def get_logging_stats():
+    """
+    Registros en cola, descartados por cola llena y omitidos por repetición
+    """
+    if _queue_handler is None:
+        return None
+    return {
+        'nivel': logging.getLevelName(logger.level),
+        'en_cola': _queue_handler.queue.qsize(),
+        'capacidad_cola': _queue_handler.queue.maxsize,
+        'descartados': _queue_handler.descartados,
+        'suprimidos': _rate_filter.suprimidos
+    }
+
+# Los niveles pueden venir del archivo .env
+load_dotenv()
 logger = setup_logger()
+atexit.register(stop_logging)
 
 # Funciones útiles adicionales
 
@@ -99,4 +256,4 @@ def log_api_request(method: str, endpoint: str, status_code: int = None):
     if status_code:
         logger.info(f"🌐 {method} {endpoint} - Status: {status_code}")
     else:
-        logger.info(f"🌐 {method} {endpoint}")
\ No newline at end of file
+        logger.info(f"🌐 {method} {endpoint}")
@@ -0,0 +1,310 @@
+"""
+Métricas del proceso en formato de texto de Prometheus
+
+Registro en memoria con contadores, gauges e histogramas con etiquetas, más
+"collectors": funciones que al momento de leer las métricas convierten las
+estadísticas que ya llevan otros módulos (pool, bcrypt, caches...) en
+familias de métricas. Leer /metrics nunca consulta la base de datos: las
+métricas de negocio (usuarios activos, reservas, habitaciones) las calcula
+un hilo en segundo plano cada METRICS_REFRESH_SECONDS y se sirven de la
+última actualización.
+"""
+import math
+import os
+import threading
+import time
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Límites (en segundos) de los buckets de latencia de peticiones
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def get_metrics_config():
+    return {
+        'refresh_seconds': float(os.getenv('METRICS_REFRESH_SECONDS', '60'))
+    }
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+class _Metric:
+    tipo = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, key))
+
+    def family(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.name, self.tipo, self.documentation, [
+            (self.name, self._labels(key), value) for key, value in items
+        ]
+
+class Counter(_Metric):
+    tipo = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    tipo = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def replace(self, values):
+        """
+        Reemplaza todas las series: values es una lista de (etiquetas, valor)
+        """
+        nuevos = {self._key(labels): value for labels, value in values}
+        with self._lock:
+            self._values = nuevos
+
+class Histogram(_Metric):
+    tipo = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for index, limit in enumerate(self.buckets):
+                if value <= limit:
+                    counts[index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def family(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+
+        samples = []
+        for key, (counts, total, count) in items:
+            labels = self._labels(key)
+            acumulado = 0
+            for limit, bucket_count in zip(self.buckets, counts):
+                acumulado += bucket_count
+                samples.append((f'{self.name}_bucket', {**labels, 'le': _format_value(limit)}, acumulado))
+            samples.append((f'{self.name}_sum', labels, total))
+            samples.append((f'{self.name}_count', labels, count))
+        return self.name, self.tipo, self.documentation, samples
+
+class Registry:
+    """
+    Métricas propias y collectors. render() arma el texto de exposición
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        collector() retorna una lista de familias (nombre, tipo, ayuda, muestras)
+        con muestras (nombre, etiquetas, valor)
+        """
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def collect(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        families = [metric.family() for metric in metrics]
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as error:
+                logger.warning(f"⚠️ Error en collector de métricas {collector.__name__}: {error}")
+        return families
+
+    def render(self):
+        lines = []
+        for name, tipo, documentation, samples in self.collect():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {tipo}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+def family(name, tipo, documentation, samples):
+    """
+    Familia para un collector a partir de una lista de (etiquetas, valor)
+    """
+    return name, tipo, documentation, [(name, labels, value) for labels, value in samples]
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+def render_metrics():
+    return REGISTRY.render()
+
+# Peticiones HTTP (las registra el middleware de tiempos)
+
+http_requests = counter(
+    'posada_http_requests_total', 'Peticiones HTTP atendidas', ('method', 'route', 'status')
+)
+http_request_duration = histogram(
+    'posada_http_request_duration_seconds', 'Duración de las peticiones HTTP', ('method', 'route', 'status')
+)
+
+def observe_request(method, route, status, seconds):
+    http_requests.inc(method=method, route=route, status=status)
+    http_request_duration.observe(seconds, method=method, route=route, status=status)
+
+# Métricas de negocio, actualizadas en segundo plano
+
+usuarios_activos = gauge('posada_usuarios_activos', 'Usuarios activos')
+reservas_por_estado = gauge('posada_reservas', 'Reservas por estado', ('estado',))
+habitaciones_disponibles = gauge('posada_habitaciones_disponibles', 'Habitaciones marcadas como disponibles')
+habitaciones_ocupadas_hoy = gauge('posada_habitaciones_ocupadas_hoy', 'Habitaciones ocupadas la noche de hoy')
+conexiones_servidor = gauge('posada_db_conexiones_servidor', 'Conexiones abiertas en el servidor a esta base de datos')
+tamano_base = gauge('posada_db_tamano_bytes', 'Tamaño de la base de datos en bytes')
+negocio_actualizacion = gauge(
+    'posada_metricas_negocio_actualizacion_timestamp_seconds', 'Momento de la última actualización de las métricas de negocio'
+)
+
+_snapshot = {}
+_snapshot_lock = threading.Lock()
+
+def refresh_business_metrics():
+    """
+    Calcula las métricas de negocio con una conexión del pool y actualiza
+    los gauges y la copia usada por get_business_snapshot
+    """
+    from .database_pool import get_db_connection
+
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT version(),
+                       (SELECT COUNT(*) FROM pg_stat_activity WHERE datname = current_database()),
+                       pg_database_size(current_database()),
+                       (SELECT COUNT(*) FROM usuarios WHERE activo = TRUE),
+                       (SELECT COUNT(*) FROM habitaciones WHERE disponible = TRUE),
+                       (SELECT COALESCE(MAX(habitaciones_ocupadas), 0) FROM ocupacion_diaria WHERE fecha = CURRENT_DATE)
+            """)
+            version, conexiones, tamano, usuarios, habitaciones, ocupadas = cursor.fetchone()
+            cursor.execute("SELECT estado, COUNT(*) FROM reservas GROUP BY estado")
+            por_estado = dict(cursor.fetchall())
+
+    actualizado = time.time()
+    usuarios_activos.set(usuarios)
+    reservas_por_estado.replace([({'estado': estado}, total) for estado, total in por_estado.items()])
+    habitaciones_disponibles.set(habitaciones)
+    habitaciones_ocupadas_hoy.set(ocupadas)
+    conexiones_servidor.set(conexiones)
+    tamano_base.set(tamano)
+    negocio_actualizacion.set(actualizado)
+
+    with _snapshot_lock:
+        _snapshot.clear()
+        _snapshot.update({
+            'version': version,
+            'active_connections': conexiones,
+            'database_size_bytes': tamano,
+            'usuarios_activos': usuarios,
+            'total_reservas': sum(por_estado.values()),
+            'reservas_por_estado': por_estado,
+            'habitaciones_disponibles': habitaciones,
+            'habitaciones_ocupadas_hoy': ocupadas,
+            'actualizado': actualizado
+        })
+
+def get_business_snapshot():
+    """
+    Última copia de las métricas de negocio, o None si todavía no se calcularon
+    """
+    with _snapshot_lock:
+        return dict(_snapshot) if _snapshot else None
+
+_refresher = None
+_refresher_stop = threading.Event()
+
+def _refresh_loop(interval):
+    while True:
+        try:
+            refresh_business_metrics()
+        except Exception as error:
+            logger.warning(f"⚠️ No se pudieron actualizar las métricas de negocio: {error}")
+        if _refresher_stop.wait(interval):
+            return
+
+def start_metrics_refresher(config=None):
+    """
+    Inicia el hilo que actualiza las métricas de negocio (una vez por proceso)
+    """
+    global _refresher
+    config = config or get_metrics_config()
+    if _refresher is not None or config['refresh_seconds'] <= 0:
+        return
+    _refresher_stop.clear()
+    _refresher = threading.Thread(
+        target=_refresh_loop, args=(config['refresh_seconds'],), name='metricas-negocio', daemon=True
+    )
+    _refresher.start()
+
+def stop_metrics_refresher():
+    global _refresher
+    if _refresher is None:
+        return
+    _refresher_stop.set()
+    _refresher.join(timeout=10)
+    _refresher = None
@@ -0,0 +1,336 @@
+"""
+Migraciones versionadas del esquema
+
+Cada migración es una tupla (versión, descripción, sql). Las aplicadas se
+registran en schema_version junto con el checksum de su SQL; al iniciar se
+lee esa tabla una sola vez y, si no hay migraciones pendientes, no se ejecuta
+ningún DDL. Una migración aplicada no debe editarse: los cambios van en una
+migración nueva al final de la lista.
+
+Uso:
+    python -m config.migrations --estado    # Lista migraciones aplicadas y pendientes
+    python -m config.migrations             # Aplica las pendientes
+"""
+import hashlib
+import sys
+import time
+from psycopg2 import Error, errors
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Clave de pg_advisory_xact_lock que serializa migraciones entre procesos
+MIGRATIONS_LOCK_ID = 5_120_801
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        descripcion VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        duracion_ms INTEGER
+    )
+"""
+
+MIGRATIONS = [
+    (1, 'Esquema base de la posada', """
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id SERIAL PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            apellido VARCHAR(100) NOT NULL,
+            dni VARCHAR(20) UNIQUE NOT NULL,
+            cuil_cuit VARCHAR(13) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            telefono VARCHAR(20) UNIQUE,
+            password VARCHAR(255) NOT NULL,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            activo BOOLEAN DEFAULT TRUE,
+            UNIQUE(nombre, apellido)
+        );
+
+        CREATE TABLE IF NOT EXISTS habitaciones (
+            id SERIAL PRIMARY KEY,
+            numero INTEGER UNIQUE NOT NULL CHECK (numero BETWEEN 1 AND 4),
+            descripcion VARCHAR(255) DEFAULT 'Habitación estándar de la posada',
+            disponible BOOLEAN DEFAULT TRUE,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS precios (
+            id SERIAL PRIMARY KEY,
+            precio_por_noche DECIMAL(10,2) NOT NULL CHECK (precio_por_noche > 0),
+            fecha_vigencia_desde DATE DEFAULT CURRENT_DATE,
+            descripcion VARCHAR(255) DEFAULT 'Precio estándar',
+            activo BOOLEAN DEFAULT TRUE,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS reservas (
+            id SERIAL PRIMARY KEY,
+            usuario_id INTEGER NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+            fecha_check_in DATE NOT NULL,
+            fecha_check_out DATE NOT NULL CHECK (fecha_check_out > fecha_check_in + INTERVAL '1 day'),
+            cantidad_habitaciones INTEGER NOT NULL DEFAULT 1 CHECK (cantidad_habitaciones BETWEEN 1 AND 4),
+            precio_total DECIMAL(10,2) NOT NULL CHECK (precio_total >= 0),
+            estado VARCHAR(20) NOT NULL DEFAULT 'pendiente'
+                CHECK (estado IN ('pendiente', 'confirmada', 'cancelada', 'finalizada')),
+            observaciones TEXT,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS reserva_habitaciones (
+            id SERIAL PRIMARY KEY,
+            reserva_id INTEGER NOT NULL REFERENCES reservas(id) ON DELETE CASCADE,
+            habitacion_id INTEGER NOT NULL REFERENCES habitaciones(id) ON DELETE RESTRICT,
+            fecha_asignacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(reserva_id, habitacion_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS pagos (
+            id SERIAL PRIMARY KEY,
+            reserva_id INTEGER NOT NULL REFERENCES reservas(id) ON DELETE CASCADE,
+            tipo_pago VARCHAR(20) NOT NULL
+                CHECK (tipo_pago IN ('seña', 'pago_completo')),
+            monto DECIMAL(10,2) NOT NULL CHECK (monto > 0),
+            metodo_pago VARCHAR(20) NOT NULL
+                CHECK (metodo_pago IN ('efectivo', 'transferencia', 'tarjeta_debito', 'tarjeta_credito')),
+            estado_pago VARCHAR(15) NOT NULL DEFAULT 'pendiente'
+                CHECK (estado_pago IN ('pendiente', 'pagado', 'reembolsado')),
+            fecha_pago TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            comprobante VARCHAR(255),
+            observaciones TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS ocupacion_diaria (
+            fecha DATE PRIMARY KEY,
+            habitaciones_ocupadas INTEGER NOT NULL DEFAULT 0 CHECK (habitaciones_ocupadas >= 0),
+            CONSTRAINT ocupacion_diaria_capacidad CHECK (habitaciones_ocupadas <= 4)
+        );
+
+        -- Bases creadas antes de estas columnas y restricciones
+        ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS password VARCHAR(255) NOT NULL DEFAULT 'temp_password';
+        ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS cuil_cuit VARCHAR(13);
+
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conname = 'usuarios_cuil_cuit_unique' AND conrelid = 'usuarios'::regclass
+            ) THEN
+                ALTER TABLE usuarios ADD CONSTRAINT usuarios_cuil_cuit_unique UNIQUE (cuil_cuit);
+            END IF;
+
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conname = 'usuarios_telefono_unique' AND conrelid = 'usuarios'::regclass
+            ) THEN
+                ALTER TABLE usuarios ADD CONSTRAINT usuarios_telefono_unique UNIQUE (telefono);
+            END IF;
+
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conname = 'ocupacion_diaria_capacidad' AND conrelid = 'ocupacion_diaria'::regclass
+            ) THEN
+                ALTER TABLE ocupacion_diaria ADD CONSTRAINT ocupacion_diaria_capacidad CHECK (habitaciones_ocupadas <= 4);
+            END IF;
+        END $$;
+    """),
+
+    (2, 'Habitaciones, precio inicial y ocupación diaria', """
+        INSERT INTO habitaciones (numero, descripcion)
+        SELECT numero, 'Habitación ' || numero
+        FROM generate_series(1, 4) AS numero
+        WHERE NOT EXISTS (SELECT 1 FROM habitaciones);
+
+        INSERT INTO precios (precio_por_noche, fecha_vigencia_desde, descripcion)
+        SELECT 50000.00, CURRENT_DATE, 'Precio inicial del sistema'
+        WHERE NOT EXISTS (SELECT 1 FROM precios WHERE activo = TRUE);
+
+        INSERT INTO ocupacion_diaria (fecha, habitaciones_ocupadas)
+        SELECT noche::date, SUM(r.cantidad_habitaciones)::int
+        FROM reservas r
+        CROSS JOIN LATERAL generate_series(r.fecha_check_in, r.fecha_check_out - 1, INTERVAL '1 day') AS noche
+        WHERE r.estado IN ('pendiente', 'confirmada')
+          AND NOT EXISTS (SELECT 1 FROM ocupacion_diaria)
+        GROUP BY 1;
+    """),
+
+    (3, 'Índices para consultas frecuentes', """
+        -- Reservas de un usuario (listado y baja de cuenta)
+        CREATE INDEX IF NOT EXISTS idx_reservas_usuario
+            ON reservas (usuario_id, fecha_check_in);
+
+        -- Reservas activas por rango de fechas (disponibilidad y reconstrucción de ocupación)
+        CREATE INDEX IF NOT EXISTS idx_reservas_activas_fechas
+            ON reservas (fecha_check_in, fecha_check_out)
+            WHERE estado IN ('pendiente', 'confirmada');
+
+        CREATE INDEX IF NOT EXISTS idx_reservas_pendientes
+            ON reservas (fecha_creacion)
+            WHERE estado = 'pendiente';
+
+        -- Login por email sin distinguir mayúsculas
+        CREATE INDEX IF NOT EXISTS idx_usuarios_email_lower_activos
+            ON usuarios (LOWER(email))
+            WHERE activo = true;
+
+        CREATE INDEX IF NOT EXISTS idx_usuarios_dni_activos
+            ON usuarios (dni)
+            WHERE activo = true;
+
+        CREATE INDEX IF NOT EXISTS idx_precios_activos
+            ON precios (fecha_vigencia_desde DESC)
+            WHERE activo = true;
+    """),
+
+    (4, 'Índices para paginación por clave de la búsqueda de administración', """
+        -- Orden (fecha_check_in, id) con y sin filtros de usuario o estado
+        CREATE INDEX IF NOT EXISTS idx_reservas_checkin_id
+            ON reservas (fecha_check_in, id);
+
+        CREATE INDEX IF NOT EXISTS idx_reservas_estado_checkin_id
+            ON reservas (estado, fecha_check_in, id);
+
+        CREATE INDEX IF NOT EXISTS idx_reservas_usuario_checkin_id
+            ON reservas (usuario_id, fecha_check_in, id);
+
+        -- Reemplazado por idx_reservas_usuario_checkin_id
+        DROP INDEX IF EXISTS idx_reservas_usuario;
+
+        CREATE INDEX IF NOT EXISTS idx_usuarios_activo_id
+            ON usuarios (activo, id);
+    """),
+
+    (5, 'Permiso de administrador por usuario', """
+        ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS es_admin BOOLEAN NOT NULL DEFAULT FALSE;
+    """),
+
+    (6, 'Versiones de recursos compartidas entre workers', """
+        CREATE TABLE IF NOT EXISTS versiones (
+            recurso VARCHAR(64) PRIMARY KEY,
+            version BIGINT NOT NULL,
+            modificado_en TIMESTAMPTZ NOT NULL
+        );
+    """)
+]
+
+def migration_checksum(sql):
+    """
+    SHA-256 del SQL con los espacios normalizados, para que reindentar no
+    cuente como cambio
+    """
+    return hashlib.sha256(' '.join(sql.split()).encode('utf-8')).hexdigest()
+
+def get_applied_migrations(cursor, connection):
+    """
+    Retorna {versión: checksum} de las migraciones aplicadas,
+    o None si schema_version todavía no existe
+    """
+    try:
+        cursor.execute("SELECT version, checksum FROM schema_version")
+        applied = {version: checksum for version, checksum in cursor.fetchall()}
+        return applied
+    except errors.UndefinedTable:
+        return None
+    finally:
+        # No dejar la conexión "idle in transaction" después de la lectura
+        connection.rollback()
+
+def verify_checksums(applied):
+    """
+    Compara los checksums registrados contra las migraciones del código.
+    Retorna False si alguna migración aplicada fue modificada
+    """
+    known = {version: migration_checksum(sql) for version, _, sql in MIGRATIONS}
+    valid = True
+
+    for version, checksum in sorted(applied.items()):
+        if version not in known:
+            logger.warning(f"⚠️ La base tiene la migración {version}, que este código no conoce")
+        elif known[version] != checksum:
+            logger.error(f"❌ La migración {version} fue modificada después de aplicarse (checksum distinto)")
+            valid = False
+
+    return valid
+
+def apply_migration(cursor, connection, version, descripcion, sql):
+    """
+    Aplica una migración y la registra en la misma transacción
+    """
+    started_at = time.perf_counter()
+    try:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATIONS_LOCK_ID,))
+        cursor.execute(SCHEMA_VERSION_DDL)
+
+        # Otro proceso pudo aplicarla mientras esperábamos el lock
+        cursor.execute("SELECT 1 FROM schema_version WHERE version = %s", (version,))
+        if cursor.fetchone():
+            connection.rollback()
+            logger.info(f"ℹ️ Migración {version} ya aplicada por otro proceso")
+            return True
+
+        cursor.execute(sql)
+        duracion_ms = int((time.perf_counter() - started_at) * 1000)
+        cursor.execute("""
+            INSERT INTO schema_version (version, descripcion, checksum, duracion_ms)
+            VALUES (%s, %s, %s, %s)
+        """, (version, descripcion, migration_checksum(sql), duracion_ms))
+        connection.commit()
+
+        logger.info(f"✅ Migración {version} aplicada: {descripcion} ({duracion_ms} ms)")
+        return True
+
+    except Error as error:
+        logger.error(f"❌ Error aplicando migración {version} ({descripcion}): {error}", exc_info=True)
+        connection.rollback()
+        return False
+
+def run_migrations(cursor, connection):
+    """
+    Aplica las migraciones pendientes en orden. Si el esquema está al día
+    solo ejecuta la lectura de schema_version
+    """
+    applied = get_applied_migrations(cursor, connection)
+
+    if applied is not None and not verify_checksums(applied):
+        return False
+
+    pending = [migration for migration in MIGRATIONS if not applied or migration[0] not in applied]
+    if not pending:
+        logger.info(f"✅ Esquema actualizado (versión {max(applied)})")
+        return True
+
+    logger.info(f"🏗️ Aplicando {len(pending)} migraciones pendientes...")
+    for version, descripcion, sql in pending:
+        if not apply_migration(cursor, connection, version, descripcion, sql):
+            return False
+
+    logger.info(f"✅ Esquema migrado a la versión {MIGRATIONS[-1][0]}")
+    return True
+
+def main(argv):
+    from .database_connection import connect_postgresql, close_connection
+
+    connection, cursor = connect_postgresql()
+    if not connection or not cursor:
+        return 1
+
+    try:
+        if '--estado' in argv:
+            applied = get_applied_migrations(cursor, connection) or {}
+            for version, descripcion, sql in MIGRATIONS:
+                if version not in applied:
+                    estado = 'pendiente'
+                elif applied[version] != migration_checksum(sql):
+                    estado = 'MODIFICADA'
+                else:
+                    estado = 'aplicada'
+                print(f"{version:>4}  {estado:<10}  {descripcion}")
+            return 0 if verify_checksums(applied) else 1
+
+        return 0 if run_migrations(cursor, connection) else 1
+    finally:
+        close_connection(connection, cursor)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
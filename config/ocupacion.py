@@ -0,0 +1,175 @@
+"""
+Registro de ocupación por noche (tabla ocupacion_diaria)
+
+Cada fila guarda cuántas habitaciones están reservadas la noche que empieza
+en `fecha`. Una reserva ocupa las noches desde fecha_check_in hasta el día
+anterior a fecha_check_out. La tabla se actualiza en la misma transacción
+que cada alta, baja o cambio de estado de una reserva.
+
+Uso:
+    python -m config.ocupacion --verificar    # Compara contra reservas sin modificar
+    python -m config.ocupacion                # Reconstruye desde cero
+"""
+import sys
+from psycopg2 import Error, errors
+from .logging_config import get_logger
+from .versiones import bump_version
+
+logger = get_logger(__name__)
+
+# Estados que ocupan habitaciones (valores tal como se guardan en la BD)
+ESTADOS_ACTIVOS = ('pendiente', 'confirmada')
+
+MAX_HABITACIONES = 4
+
+# Restricción que impide superar MAX_HABITACIONES en una noche
+CAPACIDAD_CONSTRAINT = 'ocupacion_diaria_capacidad'
+
+class SinDisponibilidadError(Exception):
+    """Alguna noche de la estadía superaría la capacidad de la posada"""
+
+def aplicar_ocupacion(cursor, fecha_check_in, fecha_check_out, habitaciones):
+    """
+    Suma (o resta, si es negativo) habitaciones a cada noche de la estadía.
+    No hace commit: debe ejecutarse dentro de la transacción de la reserva.
+
+    El upsert bloquea las filas de cada noche en orden de fecha hasta el commit,
+    así que dos reservas concurrentes sobre las mismas noches se serializan y la
+    restricción de capacidad rechaza a la que no entra. Reservas sobre noches
+    distintas no compiten entre sí
+    """
+    if habitaciones < 0:
+        # Las noches ya existen: el INSERT validaría el CHECK (>= 0) con el valor negativo
+        cursor.execute("""
+            UPDATE ocupacion_diaria
+            SET habitaciones_ocupadas = habitaciones_ocupadas + %s
+            WHERE fecha >= %s AND fecha < %s
+        """, (habitaciones, fecha_check_in, fecha_check_out))
+        return
+
+    try:
+        cursor.execute("""
+            INSERT INTO ocupacion_diaria (fecha, habitaciones_ocupadas)
+            SELECT noche::date, %s
+            FROM generate_series(%s::date, %s::date - 1, INTERVAL '1 day') AS noche
+            ORDER BY 1
+            ON CONFLICT (fecha) DO UPDATE
+            SET habitaciones_ocupadas = ocupacion_diaria.habitaciones_ocupadas + EXCLUDED.habitaciones_ocupadas
+        """, (habitaciones, fecha_check_in, fecha_check_out))
+    except errors.CheckViolation as error:
+        if error.diag.constraint_name == CAPACIDAD_CONSTRAINT:
+            raise SinDisponibilidadError("No hay suficientes habitaciones disponibles en esas fechas") from error
+        raise
+
+def get_ocupacion_maxima(cursor, fecha_check_in, fecha_check_out):
+    """
+    Máximo de habitaciones ocupadas en alguna noche de la estadía
+    """
+    cursor.execute("""
+        SELECT COALESCE(MAX(habitaciones_ocupadas), 0) AS ocupadas
+        FROM ocupacion_diaria
+        WHERE fecha >= %s AND fecha < %s
+    """, (fecha_check_in, fecha_check_out))
+    result = cursor.fetchone()
+    return result['ocupadas'] if isinstance(result, dict) else result[0]
+
+def get_ocupacion_por_noche(cursor, start_date, end_date):
+    """
+    Habitaciones ocupadas por noche entre start_date y end_date (inclusive),
+    incluyendo las noches sin reservas
+    """
+    cursor.execute("""
+        SELECT noche::date AS fecha, COALESCE(o.habitaciones_ocupadas, 0) AS habitaciones_ocupadas
+        FROM generate_series(%s::date, %s::date, INTERVAL '1 day') AS noche
+        LEFT JOIN ocupacion_diaria o ON o.fecha = noche::date
+        ORDER BY 1
+    """, (start_date, end_date))
+    return cursor.fetchall()
+
+def disponibilidad_por_noche(noches):
+    """
+    Ocupadas y disponibles por noche a partir de filas (fecha, ocupadas)
+    """
+    return [
+        {
+            'fecha': fecha,
+            'habitaciones_ocupadas': ocupadas,
+            'habitaciones_disponibles': max(MAX_HABITACIONES - ocupadas, 0)
+        }
+        for fecha, ocupadas in noches
+    ]
+
+def habitaciones_libres(noches):
+    """
+    Habitaciones libres por noche a partir de filas (fecha, ocupadas), un byte por noche
+    """
+    return bytes(max(MAX_HABITACIONES - ocupadas, 0) for _, ocupadas in noches)
+
+_OCUPACION_ESPERADA = """
+    SELECT noche::date AS fecha, SUM(r.cantidad_habitaciones)::int AS habitaciones_ocupadas
+    FROM reservas r
+    CROSS JOIN LATERAL generate_series(r.fecha_check_in, r.fecha_check_out - 1, INTERVAL '1 day') AS noche
+    WHERE r.estado IN %s
+    GROUP BY 1
+"""
+
+def verificar_ocupacion(cursor):
+    """
+    Compara ocupacion_diaria contra lo calculado desde reservas.
+    Retorna la lista de noches con diferencias (fecha, registrado, esperado)
+    """
+    cursor.execute(f"""
+        WITH esperada AS ({_OCUPACION_ESPERADA})
+        SELECT COALESCE(o.fecha, e.fecha) AS fecha,
+               COALESCE(o.habitaciones_ocupadas, 0) AS registrado,
+               COALESCE(e.habitaciones_ocupadas, 0) AS esperado
+        FROM ocupacion_diaria o
+        FULL OUTER JOIN esperada e ON e.fecha = o.fecha
+        WHERE COALESCE(o.habitaciones_ocupadas, 0) <> COALESCE(e.habitaciones_ocupadas, 0)
+        ORDER BY 1
+    """, (ESTADOS_ACTIVOS,))
+    return cursor.fetchall()
+
+def reconstruir_ocupacion(cursor, connection):
+    """
+    Reconstruye ocupacion_diaria desde cero a partir de reservas
+    """
+    try:
+        cursor.execute("LOCK TABLE reservas, ocupacion_diaria IN SHARE ROW EXCLUSIVE MODE")
+        cursor.execute("DELETE FROM ocupacion_diaria")
+        cursor.execute(f"""
+            INSERT INTO ocupacion_diaria (fecha, habitaciones_ocupadas)
+            {_OCUPACION_ESPERADA}
+        """, (ESTADOS_ACTIVOS,))
+        noches = cursor.rowcount
+        bump_version(cursor, 'reservas')
+        connection.commit()
+        logger.info(f"✅ Ocupación diaria reconstruida ({noches} noches con reservas)")
+        return True
+
+    except Error as error:
+        logger.error(f"❌ Error reconstruyendo ocupación diaria: {error}", exc_info=True)
+        connection.rollback()
+        return False
+
+def main(argv):
+    from .database_connection import connect_postgresql, close_connection
+
+    connection, cursor = connect_postgresql()
+    if not connection or not cursor:
+        return 1
+
+    try:
+        diferencias = verificar_ocupacion(cursor)
+        for fecha, registrado, esperado in diferencias:
+            print(f"{fecha}: registrado={registrado} esperado={esperado}")
+        print(f"Noches con diferencias: {len(diferencias)}")
+
+        if '--verificar' in argv:
+            return 1 if diferencias else 0
+        return 0 if reconstruir_ocupacion(cursor, connection) else 1
+    finally:
+        close_connection(connection, cursor)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,227 @@
+"""
+Cache en memoria de las páginas HTML
+
+Al iniciar se cargan todas las páginas (del build de config.static_build si
+existe, si no de public/pages) con sus variantes gzip/br ya comprimidas y el
+hash del contenido para el ETag: servir una página no toca el disco. Las
+plantillas Jinja2 que no dependen de la petición se renderizan una sola vez
+con memoize().
+
+Con PAGE_CACHE_WATCH=true (desarrollo) un hilo revisa cada
+PAGE_CACHE_WATCH_INTERVAL segundos las fechas de modificación: recarga las
+páginas que cambiaron, suma las nuevas, quita las borradas y descarta las
+plantillas renderizadas cuyo archivo cambió.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .logging_config import get_logger
+from .static_build import compress_variants, content_hash, get_static_config, load_manifest
+
+logger = get_logger(__name__)
+
+def get_page_cache_config():
+    return {
+        'watch': os.getenv('PAGE_CACHE_WATCH', 'false').lower() == 'true',
+        'watch_interval': float(os.getenv('PAGE_CACHE_WATCH_INTERVAL', '1.0'))
+    }
+
+def page_directories(config=None):
+    """
+    Directorios de páginas en orden de prioridad: el del build (si existe) y public/pages
+    """
+    config = config or get_static_config()
+    directorios = [Path(config['source_dir'], 'pages')]
+    if load_manifest(config['build_dir']):
+        directorios.insert(0, Path(config['build_dir'], 'pages'))
+    return directorios
+
+class Page:
+    """
+    Una página en memoria: el contenido, sus variantes comprimidas y el hash para el ETag
+    """
+
+    def __init__(self, body, mtime):
+        self.body = body
+        self.encoded = compress_variants(body)
+        self.digest = content_hash(body)
+        self.mtime = mtime
+        self.last_modified = datetime.fromtimestamp(int(mtime), tz=timezone.utc)
+
+    @classmethod
+    def read(cls, path):
+        mtime = path.stat().st_mtime
+        return cls(path.read_bytes(), mtime)
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(variante) for variante in self.encoded.values())
+
+class PageCache:
+    """
+    Páginas por ruta relativa a pages/ (home/home.html). Si una página está en
+    varios directorios gana el primero
+    """
+
+    def __init__(self, directories):
+        self.directories = [Path(directorio) for directorio in directories]
+        self._pages = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _scan(self):
+        encontradas = {}
+        for directorio in self.directories:
+            if directorio.is_dir():
+                for path in sorted(directorio.rglob('*.html')):
+                    encontradas.setdefault(path.relative_to(directorio).as_posix(), path)
+        return encontradas
+
+    def load(self):
+        pages = {relative: (path, Page.read(path)) for relative, path in self._scan().items()}
+        with self._lock:
+            self._pages = pages
+            self._memo.clear()
+        logger.info(f"📄 Cache de páginas: {len(pages)} páginas, {sum(page.size for _, page in pages.values())} bytes")
+
+    def get(self, relative):
+        """
+        Página en memoria, o None si no existe
+        """
+        entry = self._pages.get(relative)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry[1]
+
+    def memoize(self, key, path, render):
+        """
+        Página generada por render() (una plantilla sin contexto), calculada
+        la primera vez que se pide. En modo watch se vuelve a generar cuando
+        cambia `path`
+        """
+        entry = self._memo.get(key)
+        if entry is None:
+            path = Path(path)
+            mtime = path.stat().st_mtime
+            entry = (path, Page(render().encode('utf-8'), mtime))
+            with self._lock:
+                self._memo[key] = entry
+        return entry[1]
+
+    def refresh(self):
+        """
+        Recarga lo que cambió en disco. Retorna la cantidad de cambios
+        """
+        actuales = self._scan()
+        pages = dict(self._pages)
+        cambios = 0
+        for relative, path in actuales.items():
+            previa = pages.get(relative)
+            try:
+                if previa is None or previa[0] != path or previa[1].mtime != path.stat().st_mtime:
+                    pages[relative] = (path, Page.read(path))
+                    cambios += 1
+            except FileNotFoundError:
+                continue
+        for relative in pages.keys() - actuales.keys():
+            del pages[relative]
+            cambios += 1
+
+        with self._lock:
+            self._pages = pages
+            for key, (path, page) in list(self._memo.items()):
+                try:
+                    vigente = path.stat().st_mtime == page.mtime
+                except FileNotFoundError:
+                    vigente = False
+                if not vigente:
+                    del self._memo[key]
+                    cambios += 1
+            self.reloads += cambios
+        if cambios:
+            logger.info(f"🔄 Cache de páginas: {cambios} cambios recargados")
+        return cambios
+
+    def _watch_loop(self, interval):
+        while not self._watcher_stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as error:
+                logger.warning(f"⚠️ No se pudieron recargar las páginas: {error}")
+
+    def start_watcher(self, interval):
+        if self._watcher is not None:
+            return
+        self._watcher_stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(interval,), name='cache-paginas', daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"👀 Vigilando cambios en las páginas cada {interval}s")
+
+    def stop_watcher(self):
+        if self._watcher is None:
+            return
+        self._watcher_stop.set()
+        self._watcher.join(timeout=10)
+        self._watcher = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'paginas': len(self._pages),
+                'plantillas': len(self._memo),
+                'bytes': sum(page.size for _, page in (*self._pages.values(), *self._memo.values())),
+                'hits': self.hits,
+                'misses': self.misses,
+                'recargas': self.reloads,
+                'watch': self._watcher is not None
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_page_cache():
+    """
+    Retorna el cache de páginas del proceso, cargándolo bajo demanda
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache = PageCache(page_directories())
+                cache.load()
+                _cache = cache
+    return _cache
+
+def start_page_cache(config=None):
+    """
+    Carga las páginas al iniciar y, en modo watch, inicia el hilo que las vigila
+    """
+    config = config or get_page_cache_config()
+    cache = get_page_cache()
+    if config['watch']:
+        cache.start_watcher(config['watch_interval'])
+    return cache
+
+def stop_page_cache():
+    if _cache is not None:
+        _cache.stop_watcher()
+
+def get_page_cache_stats():
+    """
+    Estadísticas del cache de páginas, o None si no fue cargado
+    """
+    if _cache is None:
+        return None
+    return _cache.stats()
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from .logging_config import get_logger
+from .timing import span
+
+logger = get_logger(__name__)
+
+class HasherSaturatedError(Exception):
+    """La cola de hashing de contraseñas está llena"""
+
+def get_hasher_config():
+    """
+    Configuración del pool de hashing usando variables de entorno
+    """
+    workers = int(os.getenv('BCRYPT_WORKERS', str(min(4, os.cpu_count() or 1))))
+    return {
+        'workers': workers,
+        'max_queue': int(os.getenv('BCRYPT_MAX_QUEUE', '32')),
+        'rounds': int(os.getenv('BCRYPT_ROUNDS', '12')),
+        'batch_workers': int(os.getenv('BCRYPT_BATCH_WORKERS', str(max(1, workers // 2))))
+    }
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt en un pool de hilos de tamaño fijo con cola acotada.
+
+    bcrypt libera el GIL mientras calcula, así que los hilos trabajan en
+    paralelo sin bloquear el event loop. Cuando hay `workers + max_queue`
+    operaciones pendientes se rechaza la siguiente con HasherSaturatedError.
+
+    Los procesos por lotes (importaciones) usan sus propios `batch_workers`
+    hilos: no pasan por la cola acotada ni demoran los logins y registros.
+    """
+
+    def __init__(self, workers=4, max_queue=32, rounds=12, batch_workers=2):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.batch_workers = batch_workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._batch_executor = ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix='bcrypt-lotes')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+        self._completed_total = 0
+        self._rejected_total = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._run_seconds_total = 0.0
+
+        logger.info(
+            f"🔐 Pool de hashing creado (workers={workers}, cola={max_queue}, rounds={rounds}, lotes={batch_workers})"
+        )
+
+    def _run(self, func, args, enqueued_at):
+        started_at = time.monotonic()
+        with self._lock:
+            waited = started_at - enqueued_at
+            self._active += 1
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed_total += 1
+                self._run_seconds_total += time.monotonic() - started_at
+
+    async def _submit(self, func, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected_total += 1
+                raise HasherSaturatedError("Cola de hashing de contraseñas llena")
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(self._run, func, args, time.monotonic())
+        except BaseException:
+            self._release()
+            raise
+        # El lugar en la cola se libera cuando termina el trabajo, no cuando
+        # deja de esperarlo la petición: si el cliente se desconecta, bcrypt
+        # sigue ocupando el hilo (o la cola) hasta terminar o ser cancelado
+        future.add_done_callback(self._release)
+
+        with span('password_hash'):
+            return await asyncio.wrap_future(future)
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def hash_sync(self, password):
+        """Genera el hash bcrypt en el hilo actual"""
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds)).decode('utf-8')
+
+    @staticmethod
+    def verify_sync(plain_password, hashed_password):
+        """Verifica la contraseña en el hilo actual"""
+        if isinstance(hashed_password, str):
+            hashed_password = hashed_password.encode('utf-8')
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
+
+    def hash_batch_sync(self, passwords):
+        """
+        Genera los hashes de una lista de contraseñas en los hilos de lotes,
+        separados de los que atienden las peticiones
+        """
+        return list(self._batch_executor.map(self.hash_sync, passwords))
+
+    async def hash(self, password):
+        return await self._submit(self.hash_sync, password)
+
+    async def verify(self, plain_password, hashed_password):
+        return await self._submit(self.verify_sync, plain_password, hashed_password)
+
+    def stats(self):
+        """
+        Utilización del pool y tiempos de espera en cola
+        """
+        with self._lock:
+            completed = self._completed_total
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'batch_workers': self.batch_workers,
+                'rounds': self.rounds,
+                'active': self._active,
+                'queued': self._pending - self._active,
+                'utilization': round(self._active / self.workers, 3),
+                'completed_total': completed,
+                'rejected_total': self._rejected_total,
+                'queue_wait_seconds_avg': round(self._wait_seconds_total / completed, 6) if completed else 0.0,
+                'queue_wait_seconds_max': round(self._wait_seconds_max, 6),
+                'run_seconds_avg': round(self._run_seconds_total / completed, 6) if completed else 0.0
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        self._batch_executor.shutdown(wait=True)
+        logger.info("🔐 Pool de hashing cerrado")
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+def get_password_hasher():
+    """
+    Retorna el pool de hashing del proceso, creándolo bajo demanda
+    """
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher(**get_hasher_config())
+    return _hasher
+
+def get_hasher_stats():
+    """
+    Estadísticas del pool de hashing, o None si no fue inicializado
+    """
+    if _hasher is None:
+        return None
+    return _hasher.stats()
+
+def close_password_hasher():
+    global _hasher
+    with _hasher_lock:
+        if _hasher is not None:
+            _hasher.shutdown()
+            _hasher = None
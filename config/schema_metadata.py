@@ -0,0 +1,94 @@
+"""
+Metadatos del esquema cargados una vez por proceso
+
+Las columnas de cada tabla se leen del catálogo al iniciar (y de nuevo
+después de aplicar migraciones). Las operaciones de escritura arman sus
+INSERT a partir de estos metadatos, así que ninguna petición consulta
+information_schema.
+"""
+import threading
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_columns = None
+_insert_statements = {}
+_lock = threading.Lock()
+
+_COLUMNS_QUERY = """
+    SELECT c.relname, a.attname
+    FROM pg_attribute a
+    JOIN pg_class c ON c.oid = a.attrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = current_schema()
+      AND c.relkind IN ('r', 'p')
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+"""
+
+def load_schema_metadata(cursor=None):
+    """
+    Lee las columnas de todas las tablas del esquema actual y reemplaza los
+    metadatos del proceso. Sin cursor usa una conexión del pool
+    """
+    global _columns
+
+    if cursor is None:
+        from .database_pool import get_db_connection
+        with get_db_connection() as connection:
+            with connection.cursor() as pool_cursor:
+                return load_schema_metadata(pool_cursor)
+
+    cursor.execute(_COLUMNS_QUERY)
+    columns = {}
+    for table, column in cursor.fetchall():
+        columns.setdefault(table, set()).add(column)
+
+    with _lock:
+        _columns = {table: frozenset(names) for table, names in columns.items()}
+        _insert_statements.clear()
+
+    logger.info(f"📋 Metadatos del esquema cargados ({len(columns)} tablas)")
+    return _columns
+
+def get_schema_metadata():
+    """
+    Retorna {tabla: frozenset(columnas)}, cargándolo si todavía no se hizo
+    """
+    if _columns is None:
+        return load_schema_metadata()
+    return _columns
+
+def get_table_columns(table):
+    return get_schema_metadata().get(table, frozenset())
+
+def has_column(table, column):
+    return column in get_table_columns(table)
+
+def build_insert(table, columns):
+    """
+    Arma el INSERT ... RETURNING id para las columnas que existen en la tabla.
+    Retorna (query, posiciones), donde posiciones indica qué valores de la
+    fila original corresponden a las columnas incluidas
+    """
+    key = (table, tuple(columns))
+    statement = _insert_statements.get(key)
+    if statement is not None:
+        return statement
+
+    existing = get_table_columns(table)
+    positions = [index for index, column in enumerate(columns) if column in existing]
+    missing = [column for column in columns if column not in existing]
+    if missing:
+        logger.warning(f"⚠️ Columnas inexistentes en tabla '{table}', se omiten del INSERT: {missing}")
+
+    kept = [columns[index] for index in positions]
+    query = (
+        f"INSERT INTO {table} ({', '.join(kept)}) "
+        f"VALUES ({', '.join(['%s'] * len(kept))}) RETURNING id"
+    )
+
+    statement = (query, positions)
+    with _lock:
+        _insert_statements[key] = statement
+    return statement
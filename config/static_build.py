@@ -0,0 +1,205 @@
+"""
+Build de los archivos estáticos
+
+Copia public/assets a STATIC_BUILD_DIR con el hash del contenido en el nombre
+(theme.css -> theme.1a2b3c4d5e.css) y escribe manifest.json con la
+correspondencia. Las páginas de public/pages, los JS y los CSS se reescriben
+para apuntar a los nombres con hash: las URLs /static/assets/... y los url()
+relativos de los CSS. Las imágenes se procesan antes que los CSS y JS, así el
+hash de estos refleja las referencias ya reescritas.
+
+Para los archivos de texto genera además variantes .gz y .br (esta última
+solo si está instalado el paquete brotli) cuando son más chicas que el
+original. El servidor elige la variante según Accept-Encoding.
+
+Si config.image_build generó derivadas, los <img> de las páginas que declaran
+sizes se convierten en <picture> con srcset AVIF y WebP.
+
+Uso:
+    python -m config.static_build             # Genera STATIC_BUILD_DIR (por defecto build/)
+    python -m config.static_build --limpiar   # Borra el build: se vuelve a servir public/
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+from pathlib import Path
+
+from .image_build import derivative_files, expand_pictures, get_image_config, load_index
+from .logging_config import get_logger
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = get_logger(__name__)
+
+MANIFEST = 'manifest.json'
+
+# Extensiones que vale la pena comprimir (las imágenes ya vienen comprimidas)
+COMPRESSIBLE = {'.css', '.js', '.html', '.svg', '.json', '.txt', '.xml', '.map', '.ico'}
+
+# Extensiones cuyas referencias a otros archivos se reescriben
+REWRITABLE = {'.css', '.js', '.html'}
+
+# Una variante comprimida se guarda solo si ahorra al menos este porcentaje
+MIN_AHORRO = 0.1
+
+HASH_LENGTH = 10
+
+# Extensión de cada variante comprimida
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+_STATIC_URL = re.compile(r'/static/(assets/[A-Za-z0-9_./-]+)(\?[^"\'\s)]*)?')
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+def get_static_config():
+    return {
+        'source_dir': Path(os.getenv('STATIC_SOURCE_DIR', 'public')),
+        'build_dir': Path(os.getenv('STATIC_BUILD_DIR', 'build'))
+    }
+
+def load_manifest(build_dir):
+    """
+    Nombres con hash por ruta original (relativas a public/), o {} si no hay build
+    """
+    try:
+        return json.loads((Path(build_dir) / MANIFEST).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def hashed_name(relative, digest):
+    base, extension = posixpath.splitext(relative)
+    return f'{base}.{digest}{extension}'
+
+def rewrite(text, relative, manifest):
+    """
+    Reemplaza las referencias a assets por sus nombres con hash. `relative` es
+    la ruta del archivo dentro de public/, para resolver los url() relativos
+    """
+    def static_url(match):
+        hashed = manifest.get(match.group(1))
+        return f'/static/{hashed}' if hashed else match.group(0)
+
+    def css_url(match):
+        url = match.group(2).strip()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(relative), url.split('?')[0]))
+        hashed = manifest.get(target)
+        return f"url('/static/{hashed}')" if hashed else match.group(0)
+
+    text = _STATIC_URL.sub(static_url, text)
+    if relative.endswith('.css'):
+        text = _CSS_URL.sub(css_url, text)
+    return text
+
+def compress_variants(data):
+    """
+    Variantes gzip y br (si está brotli) que ahorran al menos MIN_AHORRO: {encoding: bytes}
+    """
+    compresores = {'gzip': lambda: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compresores['br'] = lambda: brotli.compress(data, quality=11)
+    variantes = {}
+    for encoding, comprimir in compresores.items():
+        comprimido = comprimir()
+        if len(comprimido) <= len(data) * (1 - MIN_AHORRO):
+            variantes[encoding] = comprimido
+    return variantes
+
+def write_variants(path, data):
+    """
+    Escribe path y, si corresponde, path.gz y path.br. Retorna los bytes escritos por variante
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    escritos = {'identity': len(data)}
+    if path.suffix not in COMPRESSIBLE:
+        return escritos
+
+    for encoding, comprimido in compress_variants(data).items():
+        path.with_name(path.name + SUFFIXES[encoding]).write_bytes(comprimido)
+        escritos[encoding] = len(comprimido)
+    return escritos
+
+def build(config=None):
+    """
+    Genera el build completo en un directorio temporal y lo reemplaza al
+    final, para no dejar un build a medias. Retorna un resumen
+    """
+    config = config or get_static_config()
+    source = config['source_dir']
+    destino = config['build_dir']
+    temporal = destino.with_name(destino.name + '.tmp')
+    shutil.rmtree(temporal, ignore_errors=True)
+
+    assets = sorted(path for path in (source / 'assets').rglob('*') if path.is_file())
+    # Primero los que no referencian a otros, después los que se reescriben
+    assets.sort(key=lambda path: path.suffix in REWRITABLE)
+
+    manifest = {}
+    totales = {}
+    for path in assets:
+        relative = path.relative_to(source).as_posix()
+        data = path.read_bytes()
+        if path.suffix in REWRITABLE:
+            data = rewrite(data.decode('utf-8'), relative, manifest).encode('utf-8')
+        hashed = hashed_name(relative, content_hash(data))
+        manifest[relative] = hashed
+        for encoding, size in write_variants(temporal / hashed, data).items():
+            totales[encoding] = totales.get(encoding, 0) + size
+
+    # Solo las imágenes cuyas derivadas entraron en el build
+    imagenes = {
+        relative: entrada for relative, entrada in load_index(get_image_config()['index']).get('imagenes', {}).items()
+        if relative in manifest and derivative_files(entrada) <= manifest.keys()
+    }
+
+    paginas = sorted((source / 'pages').rglob('*.html'))
+    for path in paginas:
+        relative = path.relative_to(source).as_posix()
+        html = expand_pictures(path.read_text(encoding='utf-8'), imagenes)
+        data = rewrite(html, relative, manifest).encode('utf-8')
+        for encoding, size in write_variants(temporal / relative, data).items():
+            totales[encoding] = totales.get(encoding, 0) + size
+
+    (temporal / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+
+    shutil.rmtree(destino, ignore_errors=True)
+    temporal.rename(destino)
+
+    resumen = {
+        'assets': len(manifest), 'paginas': len(paginas), 'imagenes_responsive': len(imagenes),
+        'bytes': totales, 'brotli': brotli is not None
+    }
+    logger.info(f"📦 Build estático en {destino}: {len(manifest)} assets, {len(paginas)} páginas")
+    if brotli is None:
+        logger.warning("⚠️ Paquete brotli no instalado: solo se generaron variantes gzip")
+    return resumen
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--limpiar', action='store_true', help='Borrar el build existente')
+    args = parser.parse_args(argv)
+
+    config = get_static_config()
+    if args.limpiar:
+        shutil.rmtree(config['build_dir'], ignore_errors=True)
+        print(f"Build {config['build_dir']} eliminado")
+        return 0
+
+    print(json.dumps(build(config), indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,95 @@
+"""
+Tiempos por fase de cada petición
+
+El middleware de la aplicación abre un RequestTiming por petición y lo deja
+en una ContextVar. Las operaciones instrumentadas (conexiones del pool,
+consultas, bcrypt, JWT, serialización) suman su duración con span(). Los
+hilos de run_db heredan el contexto, así que también suman a la misma
+petición. Fuera de una petición (CLI, tareas de fondo) span() no registra
+nada.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Orden en que se informan las fases conocidas
+FASES = ('db_connect', 'db_query', 'password_hash', 'jwt', 'serialize')
+
+_current = contextvars.ContextVar('posada_request_timing', default=None)
+
+class RequestTiming:
+    """
+    Acumula duración y cantidad de operaciones por fase de una petición
+    """
+
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.start = time.perf_counter()
+        self.fases = {}
+        self._lock = threading.Lock()
+
+    def add(self, fase, seconds):
+        with self._lock:
+            total, count = self.fases.get(fase, (0.0, 0))
+            self.fases[fase] = (total + seconds, count + 1)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def _ordenadas(self):
+        with self._lock:
+            fases = dict(self.fases)
+        orden = [fase for fase in FASES if fase in fases] + sorted(set(fases) - set(FASES))
+        return [(fase, *fases[fase]) for fase in orden]
+
+    def server_timing(self):
+        """
+        Valor del header Server-Timing: cada fase con su duración en ms y la
+        cantidad de operaciones, más el total hasta el momento
+        """
+        partes = [f'{fase};dur={total * 1000:.1f};desc="{count}x"' for fase, total, count in self._ordenadas()]
+        partes.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(partes)
+
+    def as_dict(self):
+        return {
+            fase: {'ms': round(total * 1000, 2), 'n': count}
+            for fase, total, count in self._ordenadas()
+        }
+
+def start_request(request_id):
+    """
+    Abre la medición de una petición. Retorna (timing, token) para end_request
+    """
+    timing = RequestTiming(request_id)
+    return timing, _current.set(timing)
+
+def end_request(token):
+    _current.reset(token)
+
+def current_timing():
+    return _current.get()
+
+@contextmanager
+def span(fase):
+    """
+    Suma la duración del bloque a la fase de la petición actual
+    """
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(fase, time.perf_counter() - start)
+
+def record_span(fase, seconds):
+    """
+    Suma una duración ya medida a la fase de la petición actual
+    """
+    timing = _current.get()
+    if timing is not None:
+        timing.add(fase, seconds)
@@ -0,0 +1,279 @@
+"""
+Versiones de los recursos
+
+Cada escritura incrementa, en su misma transacción, la versión de su
+recurso en la tabla versiones: una tabla ('reservas', 'usuarios') o las
+filas de un usuario (('reservas', usuario_id), ('usuario', usuario_id)).
+Los endpoints de lectura derivan de ella sus ETag y Last-Modified y las
+claves de sus caches, así que un cambio invalida ambos sin recorrerlos.
+
+Cada proceso de la aplicación guarda una copia de la tabla en memoria:
+bump_versions() publica cada versión nueva con pg_notify, que PostgreSQL
+entrega al confirmarse la transacción, y un hilo con LISTEN la aplica. Así
+un 304 se responde sin pedir una conexión del pool y todos los workers (y
+los procesos por lotes como config.importacion) comparten la misma versión.
+
+Mientras la copia no es confiable se lee la tabla: si el hilo no está
+conectado (al iniciar o tras perder la conexión) y, en el proceso que
+escribió, hasta recibir la notificación de su propia escritura.
+"""
+import os
+import select
+import threading
+import time
+from datetime import datetime, timezone
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from .database_config import get_database_config
+from .database_pool import get_db_connection
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CANAL = 'versiones'
+
+# Last-Modified de un recurso que todavía no registró cambios
+SIN_CAMBIOS = datetime.fromtimestamp(0, timezone.utc)
+
+# Segundos que el proceso que escribió espera la notificación de su propia
+# escritura antes de volver a usar la copia (si la transacción se revirtió
+# la notificación nunca llega)
+ESPERA_NOTIFICACION = 5.0
+
+def get_versiones_config():
+    return {
+        'listen': os.getenv('VERSIONES_LISTEN', 'true').lower() == 'true',
+        'reconnect_seconds': float(os.getenv('VERSIONES_RECONNECT_SECONDS', '1.0'))
+    }
+
+def _clave(recurso):
+    return recurso if isinstance(recurso, str) else ':'.join(str(parte) for parte in recurso)
+
+def bump_versions(cursor, *recursos):
+    """
+    Incrementa la versión de los recursos dentro de la transacción del
+    cursor: el cambio de versión (y su notificación) se confirma o revierte
+    con la escritura. Las filas se bloquean en orden para que dos
+    transacciones no se traben
+    """
+    cursor.execute("""
+        WITH cambios AS (
+            INSERT INTO versiones (recurso, version, modificado_en)
+            SELECT recurso, 1, clock_timestamp() FROM unnest(%s::varchar[]) AS recurso ORDER BY recurso
+            ON CONFLICT (recurso) DO UPDATE
+            SET version = versiones.version + 1,
+                modificado_en = GREATEST(versiones.modificado_en, EXCLUDED.modificado_en)
+            RETURNING recurso, version, modificado_en
+        )
+        SELECT recurso, version,
+               pg_notify(%s, version || ' ' || extract(epoch FROM modificado_en) || ' ' || recurso)
+        FROM cambios
+    """, (sorted({_clave(recurso) for recurso in recursos}), CANAL))
+    filas = cursor.fetchall()
+    if _listener is not None:
+        # El cursor de quien escribe puede ser un RealDictCursor
+        _listener.expect(tuple(fila.values())[:2] if isinstance(fila, dict) else fila[:2] for fila in filas)
+
+def bump_version(cursor, recurso):
+    bump_versions(cursor, recurso)
+
+def _resumen(entries):
+    last_modified = max(changed for _, changed in entries).replace(microsecond=0)
+    return tuple(version for version, _ in entries), last_modified
+
+def read_versions(*recursos):
+    """
+    Lee de la tabla (tupla de versiones, fecha del cambio más reciente en
+    UTC) de varios recursos. Los que no registraron cambios tienen versión 0
+    """
+    claves = [_clave(recurso) for recurso in recursos]
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT recurso, version, modificado_en FROM versiones WHERE recurso = ANY(%s)",
+                (claves,)
+            )
+            filas = {
+                recurso: (version, modificado_en.astimezone(timezone.utc))
+                for recurso, version, modificado_en in cursor.fetchall()
+            }
+    if _listener is not None:
+        _listener.count_table_read()
+    return _resumen([filas.get(clave, (0, SIN_CAMBIOS)) for clave in claves])
+
+def get_cached_versions(*recursos):
+    """
+    Igual que read_versions, desde la copia en memoria. Retorna None si la
+    copia no es confiable para alguno de los recursos
+    """
+    if _listener is None:
+        return None
+    entries = _listener.get([_clave(recurso) for recurso in recursos])
+    return None if entries is None else _resumen(entries)
+
+class VersionListener:
+    """
+    Copia en memoria de la tabla versiones, al día por LISTEN/NOTIFY sobre
+    una conexión propia (fuera del pool)
+    """
+
+    def __init__(self, reconnect_seconds=1.0):
+        self.reconnect_seconds = reconnect_seconds
+        self._versions = {}
+        self._pendientes = {}
+        self._synced = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.notificaciones = 0
+        self.reconexiones = 0
+        self.lecturas_memoria = 0
+        self.lecturas_base = 0
+
+    def expect(self, versiones):
+        """
+        Registra versiones escritas por este proceso: sus recursos se leen de
+        la tabla hasta que llegue la notificación (o pase ESPERA_NOTIFICACION)
+        """
+        now = time.monotonic()
+        vence = now + ESPERA_NOTIFICACION
+        with self._lock:
+            # Las de transacciones revertidas nunca reciben su notificación
+            for clave in [clave for clave, (_, limite) in self._pendientes.items() if limite <= now]:
+                del self._pendientes[clave]
+            for clave, version in versiones:
+                anterior = self._pendientes.get(clave)
+                self._pendientes[clave] = (max(version, anterior[0]) if anterior else version, vence)
+
+    def get(self, claves):
+        now = time.monotonic()
+        with self._lock:
+            if not self._synced:
+                return None
+            entries = []
+            for clave in claves:
+                entry = self._versions.get(clave, (0, SIN_CAMBIOS))
+                pendiente = self._pendientes.get(clave)
+                if pendiente is not None:
+                    if entry[0] < pendiente[0] and now < pendiente[1]:
+                        return None
+                    del self._pendientes[clave]
+                entries.append(entry)
+            self.lecturas_memoria += 1
+            return entries
+
+    def count_table_read(self):
+        with self._lock:
+            self.lecturas_base += 1
+
+    def _apply(self, payload):
+        version, epoch, clave = payload.split(' ', 2)
+        version = int(version)
+        with self._lock:
+            actual = self._versions.get(clave)
+            if actual is None or version > actual[0]:
+                self._versions[clave] = (version, datetime.fromtimestamp(float(epoch), timezone.utc))
+            pendiente = self._pendientes.get(clave)
+            if pendiente is not None and version >= pendiente[0]:
+                del self._pendientes[clave]
+            self.notificaciones += 1
+
+    def _listen(self):
+        connection = psycopg2.connect(**get_database_config())
+        try:
+            connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with connection.cursor() as cursor:
+                # LISTEN antes de la carga: lo que cambie en el medio llega como notificación
+                cursor.execute(f"LISTEN {CANAL}")
+                cursor.execute("SELECT recurso, version, modificado_en FROM versiones")
+                versions = {
+                    recurso: (version, modificado_en.astimezone(timezone.utc))
+                    for recurso, version, modificado_en in cursor.fetchall()
+                }
+            with self._lock:
+                self._versions = versions
+                self._synced = True
+            logger.info(f"🔔 Versiones en memoria: {len(versions)} recursos, escuchando '{CANAL}'")
+
+            while not self._stop.is_set():
+                if select.select([connection], [], [], 1.0)[0]:
+                    connection.poll()
+                    while connection.notifies:
+                        self._apply(connection.notifies.pop(0).payload)
+        finally:
+            with self._lock:
+                self._synced = False
+            connection.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as error:
+                self.reconexiones += 1
+                logger.warning(f"⚠️ Se perdió la escucha de versiones, se leerá la tabla: {error}")
+                self._stop.wait(self.reconnect_seconds)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='versiones', daemon=True)
+        self._thread.start()
+
+    def wait_synced(self, timeout):
+        """Espera la carga inicial. Retorna si la copia quedó lista"""
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            with self._lock:
+                if self._synced:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=10)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sincronizado': self._synced,
+                'recursos': len(self._versions),
+                'pendientes': len(self._pendientes),
+                'notificaciones': self.notificaciones,
+                'reconexiones': self.reconexiones,
+                'lecturas_memoria': self.lecturas_memoria,
+                'lecturas_base': self.lecturas_base
+            }
+
+_listener = None
+
+def start_version_listener(config=None):
+    """
+    Inicia la copia en memoria de las versiones (una vez por proceso) y
+    espera brevemente su carga inicial
+    """
+    global _listener
+    config = config or get_versiones_config()
+    if _listener is not None or not config['listen']:
+        return
+    _listener = VersionListener(config['reconnect_seconds'])
+    _listener.start()
+    if not _listener.wait_synced(timeout=5):
+        logger.warning("⚠️ Versiones en memoria aún no disponibles, se leerá la tabla")
+
+def stop_version_listener():
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+
+def get_version_listener_stats():
+    """
+    Estado de la copia en memoria de las versiones, o None si no fue iniciada
+    """
+    if _listener is None:
+        return None
+    return _listener.stats()
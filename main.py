@@ -1,17 +1,56 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from api import crear_usuario, autenticar_creacion_usuario, reservas, login, usuarios
+from api import crear_usuario, autenticar_creacion_usuario, reservas, login, usuarios, monitoreo, admin
+from api.server_timing import ServerTimingMiddleware, TimedJSONResponse
+from api.static_files import PrecompressedStaticFiles
 from dotenv import load_dotenv
-from config.logging_config import logger
+from config.logging_config import get_logger, log_startup, log_shutdown
+from config.database_pool import init_pool, close_pool, PoolTimeoutError
+from config.schema_metadata import get_schema_metadata
+from config.database_connection import bootstrap_database
+from config.database_async import reset_db_limiter
+from config.password_hashing import get_password_hasher, close_password_hasher
+from config.metrics import start_metrics_refresher, stop_metrics_refresher
+from config.page_cache import start_page_cache, stop_page_cache
+from config.versiones import start_version_listener, stop_version_listener
 import os
+
+logger = get_logger(__name__)
+
 load_dotenv()  # Carga las variables desde el archivo .env
 logger.info(f"Main.py: DB_PASSWORD loaded: {bool(os.getenv('DB_PASSWORD'))}")
 logger.info(f"Main.py: CWD: {os.getcwd()}")
 
-app = FastAPI(debug=False)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_startup()
+    # Crear BD, tablas y datos iniciales una sola vez al iniciar (desactivable con DB_BOOTSTRAP_ON_STARTUP=false)
+    if os.getenv('DB_BOOTSTRAP_ON_STARTUP', 'true').lower() != 'false':
+        if not bootstrap_database():
+            raise RuntimeError("No se pudo inicializar la base de datos")
+    init_pool()
+    # Metadatos del esquema cargados antes de atender peticiones (ya presentes si hubo bootstrap)
+    get_schema_metadata()
+    get_password_hasher()
+    start_metrics_refresher()
+    # Versiones de los recursos en memoria, al día por LISTEN/NOTIFY
+    start_version_listener()
+    # Páginas HTML en memoria (y vigiladas si PAGE_CACHE_WATCH=true)
+    start_page_cache()
+    yield
+    stop_page_cache()
+    stop_version_listener()
+    stop_metrics_refresher()
+    close_password_hasher()
+    close_pool()
+    reset_db_limiter()
+    log_shutdown()
+
+app = FastAPI(debug=False, lifespan=lifespan, default_response_class=TimedJSONResponse)
+app.add_middleware(ServerTimingMiddleware)
 
 # Handler personalizado para errores de validación
 @app.exception_handler(RequestValidationError)
@@ -39,6 +78,16 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         content={'detail': exc.detail}
     )
 
+# Handler para pool de conexiones agotado
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    logger.warning(f"Pool de conexiones saturado en {request.url.path}")
+    return JSONResponse(
+        status_code=503,
+        content={'detail': 'Servicio temporalmente saturado. Intente nuevamente'},
+        headers={'Retry-After': '1'}
+    )
+
 # Handler para excepciones generales no manejadas
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
@@ -48,39 +97,42 @@ async def general_exception_handler(request: Request, exc: Exception):
         content={'detail': 'Error interno del servidor'}
     )
 
+# Build de config.static_build si existe, si no public/
+static_files = PrecompressedStaticFiles()
+
 @app.get("/")
-def root():
-    return FileResponse("public/pages/home/home.html")
+async def root(request: Request):
+    return await static_files.page_response(request, "home/home.html")
 
 @app.get("/crear_usuario")
-def crear_usuario_page():
-    return FileResponse("public/pages/crear_usuario/crear_usuario.html")
+async def crear_usuario_page(request: Request):
+    return await static_files.page_response(request, "crear_usuario/crear_usuario.html")
 
 @app.get("/ya_tengo_sesion")
-def ya_tengo_sesion():
-    return FileResponse("public/pages/ya_tengo_sesion/ya_tengo_sesion.html")
+async def ya_tengo_sesion(request: Request):
+    return await static_files.page_response(request, "ya_tengo_sesion/ya_tengo_sesion.html")
 
 @app.get("/login")
-def login_page():
-    return FileResponse("public/pages/login/login.html")
+async def login_page(request: Request):
+    return await static_files.page_response(request, "login/login.html")
 
 @app.get("/crear_reserva")
-def crear_reserva():
-    return FileResponse('public/pages/crear_reserva/crear_reserva.html')
+async def crear_reserva(request: Request):
+    return await static_files.page_response(request, "crear_reserva/crear_reserva.html")
 
 @app.get("/gestion_usuarios")
-def gestion_usuarios():
-    return FileResponse('public/pages/gestion_usuarios/gestion_usuarios.html')
+async def gestion_usuarios(request: Request):
+    return await static_files.page_response(request, "gestion_usuarios/gestion_usuarios.html")
 
 @app.get("/sobre_nosotros")
-def sobre_nosotros():
-    return FileResponse('public/pages/sobre_nosotros/sobre_nosotros.html')
+async def sobre_nosotros(request: Request):
+    return await static_files.page_response(request, "sobre_nosotros/sobre_nosotros.html")
 
 @app.get("/galeria")
-def galeria():
-    return FileResponse('public/pages/galeria/galeria.html')
+async def galeria(request: Request):
+    return await static_files.page_response(request, "galeria/galeria.html")
 
-app.mount("/static", StaticFiles(directory='public'), name='static')
+app.mount("/static", static_files, name='static')
 
 # Incluir routers
 app.include_router(crear_usuario.router, prefix="/usuarios", tags=["Usuarios"])
@@ -88,5 +140,8 @@ app.include_router(autenticar_creacion_usuario.router, prefix="/autenticar_creac
 app.include_router(reservas.router, prefix="/api", tags=["Reservas"])
 app.include_router(login.router, prefix="/api", tags=["Autenticación"])
 app.include_router(usuarios.router, prefix="/api", tags=["Usuarios"])
+app.include_router(monitoreo.router, prefix="/api", tags=["Monitoreo"])
+app.include_router(monitoreo.metrics_router, tags=["Monitoreo"])
+app.include_router(admin.router, prefix="/api", tags=["Administración"])
 
 logger.info(f"FastAPI debug mode enabled: {app.debug}")
\ No newline at end of file
@@ -5,7 +5,7 @@ from enum import Enum
 
 class Estado(str, Enum):
     pendiente = "Pendiente"
-    confirmado = "Confirmado"
+    confirmada = "Confirmada"
     cancelada = "Cancelada"
     finalizada = "Finalizada"
 
@@ -108,10 +108,10 @@ document.addEventListener('DOMContentLoaded', function() {
             var dni = document.getElementById('login-dni').value;
             var password = document.getElementById('login-password').value;
             
-            fetch('/api/login', {
+            fetch('/api/auth/login', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ dni: dni, password: password })
+                body: JSON.stringify({ usuario: dni, password: password })
             })
             .then(function(response) {
                 if (!response.ok) {
@@ -120,20 +120,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 return response.json();
             })
             .then(function(loginData) {
-                return fetch('/autenticar_creacion_usuario/login', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-                    body: 'username=' + loginData.user.email + '&password=' + password
-                });
-            })
-            .then(function(tokenResponse) {
-                if (!tokenResponse.ok) {
-                    throw new Error('Error al generar token');
-                }
-                return tokenResponse.json();
-            })
-            .then(function(tokenData) {
-                localStorage.setItem('token', tokenData.access_token);
+                localStorage.setItem('token', loginData.access_token);
                 alert('Inicio de sesión exitoso!');
                 window.location.href = '/crear_reserva';
             })
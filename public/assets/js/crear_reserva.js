@@ -18,7 +18,7 @@ document.addEventListener('DOMContentLoaded', async function () {
         minDate: new Date().fp_incr(2)
     });
 
-    flatpickr(fechaCheckIn, {
+    const fpCheckIn = flatpickr(fechaCheckIn, {
         locale: "es",
         dateFormat: "Y-m-d",
         altInput: true,
@@ -38,6 +38,27 @@ document.addEventListener('DOMContentLoaded', async function () {
         }
     });
 
+    // Deshabilitar las noches sin habitaciones libres (un byte por noche desde 'desde')
+    async function cargarCalendario() {
+        try {
+            const response = await fetch('/api/disponibilidad/calendario');
+            if (!response.ok) return;
+            const calendario = await response.json();
+            const libres = atob(calendario.libres);
+            const [anio, mes, dia] = calendario.desde.split('-').map(Number);
+            const completas = [];
+            for (let i = 0; i < libres.length; i++) {
+                if (libres.charCodeAt(i) === 0) {
+                    completas.push(new Date(anio, mes - 1, dia + i));
+                }
+            }
+            fpCheckIn.set('disable', completas);
+        } catch (err) {
+            console.error('DEBUG: Error loading availability calendar:', err);
+        }
+    }
+    cargarCalendario();
+
     if (logoutBtn) {
         console.log('DEBUG: Logout button found and listener attached');
         logoutBtn.addEventListener('click', function () {
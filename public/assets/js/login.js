@@ -4,17 +4,13 @@ document.querySelector('.login-form').addEventListener('submit', async function(
     const email = document.getElementById('email').value;
     const password = document.getElementById('password').value;
 
-    const formData = new URLSearchParams();
-    formData.append('username', email);  
-    formData.append('password', password);
-
     try {
-        const response = await fetch('/autenticar_creacion_usuario/login', {
+        const response = await fetch('/api/auth/login', {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/x-www-form-urlencoded'
+                'Content-Type': 'application/json'
             },
-            body: formData.toString()
+            body: JSON.stringify({ usuario: email, password: password })
         });
 
         if (!response.ok) {
@@ -8,38 +8,22 @@ document.addEventListener('DOMContentLoaded', function() {
         const password = document.getElementById('password').value;
         
         try {
-            const response = await fetch('/api/login', {
+            const response = await fetch('/api/auth/login', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
-                    dni: dni,
+                    usuario: dni,
                     password: password
                 })
             });
             
             if (response.ok) {
+                // La respuesta ya trae el token de sesión
                 const loginData = await response.json();
-                // Generate JWT token for the user
-                const tokenResponse = await fetch('/autenticar_creacion_usuario/login', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/x-www-form-urlencoded'
-                    },
-                    body: new URLSearchParams({
-                        username: loginData.user.email, // Use email as username
-                        password: password
-                    }).toString()
-                });
-
-                if (tokenResponse.ok) {
-                    const tokenData = await tokenResponse.json();
-                    localStorage.setItem('token', tokenData.access_token);
-                    window.location.href = '/crear_reserva';
-                } else {
-                    alert('Error al generar token de sesión');
-                }
+                localStorage.setItem('token', loginData.access_token);
+                window.location.href = '/crear_reserva';
             } else {
                 const errorData = await response.json();
                 // Check if it's a credential error vs server error